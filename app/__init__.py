@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +12,152 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Modelos IA
+    WHISPER_MODELO: str = "small"
+    WHISPER_COMPUTE_TYPE: str = "int8"
+    WHISPER_CPU_THREADS: int = 4
+    GENERADOR_MODELO: str = "google/flan-t5-small"
+    # "float32" o "int8" (cuantización dinámica de las capas Linear)
+    GENERADOR_COMPUTE_TYPE: str = "float32"
+    # Hilos de torch (0 = los núcleos que dejan libres los perfiles ASR, restando
+    # cpu_threads * num_workers de cada uno)
+    GENERADOR_HILOS: int = 0
+    GENERADOR_HILOS_INTER_OP: int = 1
+    # Decodificación guiada por la plantilla de la actividad (siempre produce
+    # una actividad completa); en False se pide JSON libre y se parsea
+    GENERADOR_DECODIFICACION_RESTRINGIDA: bool = True
+    # Prompts por llamada a generate (generación en lote con padding)
+    GENERADOR_LOTE_MAX: int = 8
+
+    # Perfiles de motor ASR (modelo, compute_type, hilos y decodificación)
+    # y qué perfil atiende cada tipo de petición
+    ASR_PERFILES: Dict[str, Dict[str, Any]] = {
+        "practice-fast": {
+            "modelo": "base",
+            "compute_type": "int8",
+            "cpu_threads": 2,
+            "num_workers": 2,
+            "beam_size": 1,
+            "temperature": 0.0,
+        },
+        "assessment": {
+            "modelo": "small",
+            "compute_type": "int8",
+            "cpu_threads": 4,
+            "num_workers": 1,
+            "beam_size": 3,
+            "temperature": 0.0,
+        },
+    }
+    ASR_PERFIL_EVALUACION: str = "assessment"
+    ASR_PERFIL_PRACTICA: str = "practice-fast"
+    ASR_PERFIL_STREAMING: str = "practice-fast"
+
+    # Práctica: decodificación guiada por las palabras objetivo, con vuelta a la
+    # decodificación completa si la confianza (exp(avg_logprob)) es menor
+    PRACTICA_RAPIDA_ACTIVA: bool = True
+    PRACTICA_CONFIANZA_MINIMA: float = 0.55
+    # Eco del prompt: si la salida repite las pistas o el texto esperado y hay
+    # indicios de que no se leyó (no_speech alto o muy poca voz por palabra),
+    # no se acepta aunque la confianza sea alta
+    PRACTICA_ECO_SIN_VOZ: float = 0.2
+    PRACTICA_SEGUNDOS_MIN_PALABRA: float = 0.25
+
+    # Precarga de modelos en segundo plano al arrancar la API
+    IA_PRECARGA_AL_INICIAR: bool = True
+
+    # Servidor de modelos compartido (socket Unix). Vacío = modelos en el propio worker.
+    # La clave es obligatoria si hay socket (los mensajes son pickle): generarla
+    # con `python -c "import secrets; print(secrets.token_hex(32))"`
+    MODELOS_SOCKET: str = ""
+    MODELOS_SOCKET_CLAVE: str = ""
+
+    # Micro-lotes de transcripción (ventana de espera y tamaño máximo)
+    WHISPER_LOTES_ACTIVO: bool = False
+    WHISPER_LOTE_VENTANA_MS: int = 100
+    WHISPER_LOTE_MAX: int = 8
+
+    # Límites de audio subido (se validan antes de Whisper)
+    AUDIO_MAX_MB: int = 25
+    AUDIO_MAX_SEGUNDOS: int = 180
+
+    # Lectura en streaming por WebSocket (PCM 16-bit mono 16 kHz)
+    STREAMING_UMBRAL_VOZ: float = 0.015
+    STREAMING_SILENCIO_MS: int = 450
+    STREAMING_SEGMENTO_MAX_S: int = 12
+
+    # Caché de transcripciones (hash del audio + modelo + parámetros)
+    CACHE_TRANSCRIPCION_ACTIVO: bool = True
+    CACHE_TRANSCRIPCION_DIR: str = "uploads/cache/transcripciones"
+    CACHE_TRANSCRIPCION_MAX_MB: int = 256
+
+    # Caché de actividades generadas (texto de la lectura + opciones + modelo)
+    CACHE_GENERACION_ACTIVO: bool = True
+    CACHE_GENERACION_DIR: str = "uploads/cache/generacion"
+    CACHE_GENERACION_MAX_MB: int = 64
+
+    # Preprocesado: el audio subido se decodifica una vez (16 kHz mono) y se
+    # guarda como .npy para transcripciones posteriores
+    PREPROCESADO_AUDIO_ACTIVO: bool = True
+    CACHE_AUDIO_DIR: str = "uploads/cache/audio"
+    CACHE_AUDIO_MAX_MB: int = 1024
+
+    # Almacén de grabaciones direccionado por contenido ("local" o "s3").
+    # Con s3 las credenciales salen de AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY
+    ALMACEN_AUDIO_BACKEND: str = "local"
+    ALMACEN_AUDIO_DIR: str = "uploads/almacen"
+    ALMACEN_S3_BUCKET: str = ""
+    ALMACEN_S3_PREFIJO: str = "audio/"
+    ALMACEN_S3_ENDPOINT: str = ""
+    ALMACEN_S3_REGION: str = ""
+    ALMACEN_S3_CACHE_MB: int = 512
+
+    # Almacenamiento de grabaciones: se pasan a Opus y se borran al vencer
+    # la retención de cada tipo (días desde la subida). `directorio` es
+    # donde quedaron las subidas anteriores al almacén
+    ALMACENAMIENTO_RETENCION: Dict[str, Dict[str, Any]] = {
+        "practica": {"directorio": "uploads/practica", "dias": 7},
+        "evaluacion": {"directorio": "uploads/audio", "dias": 300},
+    }
+    ALMACENAMIENTO_OPUS_KBPS: int = 24
+    # No se tocan archivos más nuevos que esto (pueden estar en la cola IA)
+    ALMACENAMIENTO_EDAD_MINIMA_HORAS: int = 24
+    ALMACENAMIENTO_INTERVALO_HORAS: float = 6.0
+    ALMACENAMIENTO_EN_API: bool = False
+
+    # Audio de referencia TTS ("gtts" o "stub", sin red), cacheado por texto
+    TTS_MOTOR: str = "gtts"
+    TTS_IDIOMA: str = "es"
+    TTS_CACHE_DIR: str = "uploads/cache/tts"
+    TTS_CACHE_MAX_MB: int = 512
+    TTS_LOTE_MAX: int = 8
+    TTS_ESPERA_SEGUNDOS: int = 30
+
+    # Entrega del audio de lecturas: metadatos en memoria y políticas de caché HTTP.
+    # La caché de metadatos es de cada proceso: invalidar en un worker no llega
+    # a los demás, que sirven lo anterior hasta que vence el TTL
+    AUDIO_LECTURA_METADATOS_TTL: int = 60
+    AUDIO_LECTURA_METADATOS_MAX: int = 10000
+    # Grabación y TTS se pueden reemplazar bajo la misma URL: el cliente
+    # revalida siempre con ETag (un 304 no vuelve a enviar el audio)
+    AUDIO_LECTURA_CACHE_CONTROL: str = "private, no-cache"
+    AUDIO_TTS_CACHE_CONTROL: str = "private, no-cache"
+
+    # Ejecutor IA (0 hilos = núcleos / WHISPER_CPU_THREADS, o WHISPER_LOTE_MAX con lotes)
+    IA_EJECUTOR_HILOS: int = 0
+    IA_COLA_MAX_PENDIENTES: int = 16
+    IA_COLA_RETRY_AFTER_SEGUNDOS: int = 15
+
+    # Cola de trabajos IA (tabla trabajo_ia)
+    TRABAJOS_IA_EN_API: bool = True
+    TRABAJOS_IA_INTERVALO_SEGUNDOS: float = 1.0
+    TRABAJOS_IA_TIMEOUT_MINUTOS: int = 30
+    # Un trabajo que tumba al worker vuelve a la cola hasta este número de intentos
+    TRABAJOS_IA_MAX_INTENTOS: int = 3
+    TRABAJOS_ANALISIS_HILOS: int = 1
+    # FLAN-T5 en CPU: pocos hilos para no quitarle núcleos a Whisper
+    TRABAJOS_GENERACION_HILOS: int = 1
+
     class Config:
         env_file = ".env"
 
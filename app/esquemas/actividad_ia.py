@@ -54,6 +54,8 @@ class GenerarActividadesIARequest(BaseModel):
     incluir_multiple_choice: bool = True
     dificultad: int = 1
     idioma: str = "es"
+    # Ignora la caché y vuelve a generar con el modelo
+    regenerar: bool = False
 
     model_config = {
         "json_schema_extra": {
@@ -62,7 +64,8 @@ class GenerarActividadesIARequest(BaseModel):
                 "incluir_verdadero_falso": True,
                 "incluir_multiple_choice": True,
                 "dificultad": 1,
-                "idioma": "es"
+                "idioma": "es",
+                "regenerar": False
             }
         }
     }
@@ -0,0 +1,21 @@
+# app/esquemas/trabajo_ia.py
+
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class TrabajoIAResponse(BaseModel):
+    id: int
+    tipo: str
+    estado: str
+    estudiante_id: Optional[int] = None
+    error: Optional[str] = None
+    intentos: int = 0
+    fecha_creacion: Optional[datetime] = None
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -1,19 +1,50 @@
 # app/main.py
 
+import time
+from contextlib import asynccontextmanager
+
+import psutil
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import SQLAlchemyError
 
+from app import settings
 from app.logs.logger import logger
 from app.config import SessionLocal
 from app.routers import api_router
+from app.servicios.cola_trabajos import cola_trabajos
+from app.servicios.compactacion_audio import gestor_almacenamiento
+from app.servicios.registro_modelos import registro_modelos
+
+
+# =====================================================
+# CICLO DE VIDA (modelos y trabajos IA en segundo plano)
+# =====================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los modelos se cargan en un hilo: las rutas no-IA responden ya,
+    # las rutas IA devuelven 503 hasta que estén listos
+    if settings.IA_PRECARGA_AL_INICIAR:
+        registro_modelos.iniciar_precarga()
+    if settings.TRABAJOS_IA_EN_API:
+        cola_trabajos.iniciar()
+    if settings.ALMACENAMIENTO_EN_API:
+        gestor_almacenamiento.iniciar()
+
+    arranque = time.time() - psutil.Process().create_time()
+    logger.info(f"⚡ API lista para recibir peticiones en {arranque:.1f}s desde el inicio del proceso")
+    yield
+    cola_trabajos.detener()
+    gestor_almacenamiento.detener()
+
 
 # =====================================================
 # APP
 # =====================================================
 app = FastAPI(
     title="Tutor IA - Backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 logger.info("🚀 Backend TutorIA iniciado correctamente")
@@ -14,6 +14,7 @@ from app.modelos.curso import Curso
 from app.modelos.estudiante_curso import EstudianteCurso
 from app.modelos.categoria_lectura import CategoriaLectura
 from app.modelos.contenido_lectura import ContenidoLectura
+from app.modelos.indice_lectura import IndiceLectura
 from app.modelos.evaluacion_lectura import EvaluacionLectura
 from app.modelos.analisis_ia import AnalisisIA
 from app.modelos.intento_lectura import IntentoLectura
@@ -34,6 +35,7 @@ from app.modelos.mision_diaria import MisionDiaria
 from app.modelos.historial_puntos import HistorialPuntos
 from app.modelos.auditoria import Auditoria
 from app.modelos.sesion_usuario import SesionUsuario
+from app.modelos.trabajo_ia import TrabajoIA
 from .historial_pronunciacion import HistorialPronunciacion
 from .historial_practica_pronunciacion import HistorialPracticaPronunciacion
 from .historial_mejoras_ia import HistorialMejorasIA
@@ -51,6 +53,7 @@ __all__ = [
     "EstudianteCurso",
     "CategoriaLectura",
     "ContenidoLectura",
+    "IndiceLectura",
     "EvaluacionLectura",
     "AnalisisIA",
     "IntentoLectura",
@@ -71,4 +74,5 @@ __all__ = [
     "HistorialPuntos",
     "Auditoria",
     "SesionUsuario",
+    "TrabajoIA",
 ]
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.modelos import Base
+
+class IndiceLectura(Base):
+    __tablename__ = 'indice_lectura'
+    
+    contenido_id = Column(BigInteger, ForeignKey('contenido_lectura.id', ondelete='CASCADE'), primary_key=True)
+    hash_contenido = Column(String(64), nullable=False)
+    tokens = Column(JSON, nullable=False)
+    mascara_puntuacion = Column(JSON, nullable=False)
+    posiciones = Column(JSON, nullable=False)
+    fecha_actualizacion = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+    
+    contenido = relationship("ContenidoLectura")
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, Integer, Text, JSON, ForeignKey, CheckConstraint, Index
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.modelos import Base
+
+class TrabajoIA(Base):
+    __tablename__ = 'trabajo_ia'
+    
+    id = Column(BigInteger, primary_key=True, index=True)
+    tipo = Column(String(50), nullable=False)
+    estado = Column(String(20), nullable=False, default='pendiente')
+    usuario_id = Column(BigInteger, ForeignKey('usuario.id', ondelete='SET NULL'))
+    estudiante_id = Column(BigInteger, ForeignKey('estudiante.id', ondelete='CASCADE'))
+    parametros = Column(JSON, nullable=False)
+    resultado = Column(JSON)
+    error = Column(Text)
+    intentos = Column(Integer, default=0)
+    fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
+    fecha_inicio = Column(DateTime(timezone=True))
+    fecha_fin = Column(DateTime(timezone=True))
+    
+    usuario = relationship("Usuario")
+    estudiante = relationship("Estudiante")
+    
+    __table_args__ = (
+        CheckConstraint("estado IN ('pendiente', 'procesando', 'completado', 'error')", name='check_estado_trabajo_ia'),
+        Index('ix_trabajo_ia_tipo_estado', 'tipo', 'estado'),
+    )
@@ -3,25 +3,70 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app import settings
 from app.config import get_db
-from app.modelos import ContenidoLectura, Actividad, Usuario
+from app.modelos import ContenidoLectura, Actividad, Curso, TrabajoIA, Usuario
 from app.servicios.seguridad import obtener_usuario_actual
-from app.servicios.ia_actividades import generar_actividad_ia_para_contenido
+from app.servicios.ia_actividades import (
+    procesar_trabajo_generacion,
+    procesar_trabajo_generacion_curso,
+)
+from app.servicios.cola_trabajos import cola_trabajos
 from app.esquemas.actividad_ia import (
     GenerarActividadesIARequest,
-    GenerarActividadesIAResponse,
     ActividadResponse
 )
+from app.esquemas.trabajo_ia import TrabajoIAResponse
 
 router = APIRouter(prefix="/ia", tags=["ia-actividades"])
 
+TRABAJO_GENERACION = "generar_actividades"
+TRABAJO_GENERACION_CURSO = "generar_actividades_curso"
+
+# La generación corre en la cola de trabajos IA con un número fijo de
+# hilos: un docente generando para todo un curso no ocupa el threadpool
+# de la API ni compite con más hilos de los previstos contra Whisper
+cola_trabajos.registrar(
+    TRABAJO_GENERACION,
+    procesar_trabajo_generacion,
+    hilos=settings.TRABAJOS_GENERACION_HILOS,
+)
+cola_trabajos.registrar(
+    TRABAJO_GENERACION_CURSO,
+    procesar_trabajo_generacion_curso,
+    hilos=settings.TRABAJOS_GENERACION_HILOS,
+)
+
+
+def _encolar_generacion(db: Session, tipo: str, parametros: dict, usuario_actual: Usuario) -> TrabajoIA:
+    # Un doble clic no genera dos veces: se devuelve el trabajo que ya está en cola
+    for trabajo in (
+        db.query(TrabajoIA)
+        .filter(
+            TrabajoIA.tipo == tipo,
+            TrabajoIA.usuario_id == usuario_actual.id,
+            TrabajoIA.estado.in_(("pendiente", "procesando")),
+        )
+        .all()
+    ):
+        if trabajo.parametros == parametros:
+            return trabajo
+
+    return cola_trabajos.encolar(
+        db,
+        tipo,
+        parametros=parametros,
+        usuario_id=usuario_actual.id,
+    )
+
 
 # =====================================================
 # 1️⃣ GENERAR ACTIVIDAD IA PARA UNA LECTURA
 # =====================================================
 @router.post(
     "/lecturas/{contenido_id}/generar-actividades",
-    response_model=GenerarActividadesIAResponse
+    status_code=202,
+    response_model=TrabajoIAResponse,
 )
 def generar_actividades_ia(
     contenido_id: int,
@@ -29,6 +74,11 @@ def generar_actividades_ia(
     db: Session = Depends(get_db),
     usuario_actual: Usuario = Depends(obtener_usuario_actual)
 ):
+    """
+    Encola la generación y devuelve el trabajo de inmediato.
+    Estado en GET /ia/trabajos/{id}; al completarse, /ia/trabajos/{id}/resultado
+    devuelve `actividad_id` y `total_preguntas`.
+    """
 
     contenido = (
         db.query(ContenidoLectura)
@@ -46,17 +96,43 @@ def generar_actividades_ia(
     # if contenido.docente_id != usuario_actual.docente.id:
     #     raise HTTPException(status_code=403, detail="No autorizado")
 
-    try:
-        actividad = generar_actividad_ia_para_contenido(db, contenido, opciones)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
-    return GenerarActividadesIAResponse(
-        contenido_id=contenido.id,
-        actividad_id=actividad.id,
-        total_preguntas=len(actividad.preguntas),
-        mensaje="Actividad generada correctamente por IA.",
-        actividad=ActividadResponse.from_attributes(actividad)
+    return _encolar_generacion(
+        db,
+        TRABAJO_GENERACION,
+        {"contenido_id": contenido.id, "opciones": opciones.model_dump()},
+        usuario_actual,
+    )
+
+
+# =====================================================
+# 1️⃣.b GENERAR ACTIVIDADES IA PARA TODAS LAS LECTURAS DE UN CURSO
+# =====================================================
+@router.post(
+    "/cursos/{curso_id}/generar-actividades",
+    status_code=202,
+    response_model=TrabajoIAResponse,
+)
+def generar_actividades_ia_curso(
+    curso_id: int,
+    opciones: GenerarActividadesIARequest,
+    db: Session = Depends(get_db),
+    usuario_actual: Usuario = Depends(obtener_usuario_actual)
+):
+    """
+    Una actividad por lectura activa del curso, generadas en lote
+    (GENERADOR_LOTE_MAX prompts por pasada). El resultado del trabajo
+    lista `actividad_id` o `error` por lectura.
+    """
+
+    curso = db.query(Curso).filter(Curso.id == curso_id).first()
+    if not curso:
+        raise HTTPException(status_code=404, detail="Curso no encontrado")
+
+    return _encolar_generacion(
+        db,
+        TRABAJO_GENERACION_CURSO,
+        {"curso_id": curso.id, "opciones": opciones.model_dump()},
+        usuario_actual,
     )
 
 
@@ -1,40 +1,77 @@
 # app/routers/ia_routes.py
 
+import json
 import os
-import uuid
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    UploadFile,
+    File,
+    Form,
+    WebSocket,
+    WebSocketDisconnect,
+    Request,
+)
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app import settings
 from app.config import get_db
 from app.logs.logger import logger
 from app.modelos import (
     ContenidoLectura,
+    EjercicioPractica,
     Estudiante,
     Padre,
+    TrabajoIA,
 )
+from app.esquemas.trabajo_ia import TrabajoIAResponse
 from app.servicios.seguridad import obtener_usuario_actual
+from app.servicios.lectura_streaming import SesionLecturaStreaming
+from app.servicios.indice_lectura import obtener_tokens_referencia
 from app.modelos import Usuario
-from app.servicios.ia_lectura_service import ServicioAnalisisLectura
 from app.servicios.manager_aprendizaje_ia import ManagerAprendizajeIA
+from app.servicios.ejecutor_ia import ejecutor_ia, ColaIASaturadaError
+from app.servicios.cola_trabajos import cola_trabajos
+from app.servicios.compactacion_audio import gestor_almacenamiento
+from app.servicios.registro_modelos import registro_modelos, requiere_modelo
+from app.servicios.ia_lectura_service import cache_transcripcion
+from app.servicios.ia_actividades import estado_cache_generacion
+from app.servicios.preprocesado_audio import cache_audio, ingerir_audio
+from app.servicios.almacen_audio import almacen_audio
+from app.servicios.tts import servicio_tts
+from app.servicios.audio_lectura import (
+    etag_tts,
+    metadatos_audio_lectura,
+    resolver_audio_lectura,
+)
+from app.servicios.subida_audio import (
+    AudioInvalidoError,
+    guardar_audio_en_disco,
+    validar_duracion_audio,
+)
 
 router = APIRouter(prefix="/ia", tags=["IA Lectura"])
 
-# Directorios para guardar audios
-UPLOAD_AUDIO_DIR = "uploads/audio"
-TTS_DIR = "uploads/tts"
-PRACTICA_AUDIO_DIR = "uploads/practica"
+# Tipos de grabación en el almacén de audio (cada uno con su retención)
+TIPO_EVALUACION = "evaluacion"
+TIPO_PRACTICA = "practica"
+
+manager_ia = ManagerAprendizajeIA()  # Usa el modelo compartido del registro
 
-analizador = ServicioAnalisisLectura(modelo="small")
-manager_ia = ManagerAprendizajeIA()  # ✅ Ya lo tienes instanciado
 
+def _procesar_trabajo_analisis(db: Session, parametros: dict) -> dict:
+    return manager_ia.procesar_lectura(db=db, **parametros)
 
-def _asegurar_directorios() -> None:
-    os.makedirs(UPLOAD_AUDIO_DIR, exist_ok=True)
-    os.makedirs(TTS_DIR, exist_ok=True)
-    os.makedirs(PRACTICA_AUDIO_DIR, exist_ok=True)
+
+cola_trabajos.registrar(
+    "analisis_lectura",
+    _procesar_trabajo_analisis,
+    hilos=settings.TRABAJOS_ANALISIS_HILOS,
+)
 
 
 def _obtener_padre_actual(db: Session, usuario_actual: Usuario) -> Padre:
@@ -51,6 +88,56 @@ def _obtener_padre_actual(db: Session, usuario_actual: Usuario) -> Padre:
     return padre
 
 
+async def _guardar_audio(audio: UploadFile, tipo: str) -> dict:
+    """
+    Recibe el upload por bloques, valida tamaño y duración, lo deja
+    decodificado en la caché y lo pasa al almacén de audio.
+    `ruta` queda con la referencia del almacén (`almacen://...`).
+    """
+    ext = os.path.splitext(audio.filename or "")[1].lower() or ".wav"
+    try:
+        subida = await guardar_audio_en_disco(audio, almacen_audio.ruta_entrante(ext))
+        subida["duracion"] = await run_in_threadpool(validar_duracion_audio, subida["ruta"])
+        if settings.PREPROCESADO_AUDIO_ACTIVO:
+            subida["duracion_voz"] = await run_in_threadpool(
+                ingerir_audio, subida["ruta"], subida["sha256"]
+            )
+    except AudioInvalidoError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+    subida["ruta"] = await run_in_threadpool(
+        almacen_audio.guardar, subida["ruta"], tipo, subida["sha256"], ext
+    )
+    return subida
+
+
+def _obtener_trabajo_usuario(
+    db: Session,
+    trabajo_id: int,
+    usuario_actual: Usuario,
+) -> TrabajoIA:
+    trabajo = (
+        db.query(TrabajoIA)
+        .filter(
+            TrabajoIA.id == trabajo_id,
+            TrabajoIA.usuario_id == usuario_actual.id,
+        )
+        .first()
+    )
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return trabajo
+
+
+def _error_cola_saturada(error: ColaIASaturadaError) -> HTTPException:
+    logger.warning(f"⏳ Cola IA saturada | estado={ejecutor_ia.estado()}")
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
 def _verificar_estudiante_de_padre(
     db: Session,
     padre: Padre,
@@ -72,6 +159,37 @@ def _verificar_estudiante_de_padre(
     return estudiante
 
 
+# ============================================================
+# 0. Estado de los modelos cargados en este worker
+# ============================================================
+@router.get("/modelos")
+def obtener_estado_modelos(
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    return registro_modelos.estado()
+
+
+@router.get("/estado-cola")
+def obtener_estado_cola(
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    return ejecutor_ia.estado()
+
+
+@router.get("/caches")
+def obtener_estado_caches(
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    return {
+        "transcripcion": cache_transcripcion.estado(),
+        "audio": cache_audio.estado(),
+        "almacenamiento": gestor_almacenamiento.ultimo_reporte,
+        "tts": servicio_tts.estado(),
+        "metadatos_audio": metadatos_audio_lectura.estado(),
+        "generacion": estado_cache_generacion(),
+    }
+
+
 # ============================================================
 # 1. Obtener texto de la lectura
 # ============================================================
@@ -102,27 +220,75 @@ def obtener_texto_lectura(
 @router.get("/lectura-audio/{contenido_id}")
 def obtener_audio_lectura(
     contenido_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     usuario_actual: Usuario = Depends(obtener_usuario_actual),
 ):
-    contenido = (
-        db.query(ContenidoLectura)
-        .filter(ContenidoLectura.id == contenido_id)
-        .first()
+    # Grabación propia o, si no hay, audio TTS (precalculado al crear la lectura).
+    # Los metadatos se resuelven en memoria: una reproducción repetida no
+    # consulta la BD y con If-None-Match / Range no transfiere el archivo entero
+    meta = resolver_audio_lectura(db, contenido_id)
+    if not meta:
+        raise HTTPException(status_code=404, detail="No hay audio disponible para esta lectura.")
+
+    return almacen_audio.respuesta(
+        request,
+        meta["referencia"],
+        media_type=meta["media_type"],
+        etag=meta["etag"],
+        cache_control=meta["cache_control"],
+        tamano=meta["tamano"],
     )
-    if not contenido:
-        raise HTTPException(status_code=404, detail="Contenido de lectura no encontrado.")
 
-    if contenido.audio_url and os.path.exists(contenido.audio_url):
-        return FileResponse(contenido.audio_url, media_type="audio/mpeg")
 
-    raise HTTPException(status_code=404, detail="No hay audio disponible para esta lectura.")
+@router.get("/palabra-audio")
+def obtener_audio_palabra(
+    palabra: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    """
+    Botón "escuchar la palabra" de los ejercicios de práctica. Solo sirve
+    palabras ya sintetizadas, en cola o de algún ejercicio: una palabra
+    cualquiera no dispara una síntesis contra el motor externo.
+    """
+    palabra = palabra.strip()
+    if not palabra or len(palabra) > 100:
+        raise HTTPException(status_code=400, detail="Palabra inválida.")
+
+    permitida = (
+        servicio_tts.en_cache(palabra, lento=True)
+        or servicio_tts.encolado(palabra, lento=True)
+        # Salió de la caché o se encoló en otro worker
+        or db.query(EjercicioPractica.id)
+        .filter(EjercicioPractica.palabras_objetivo.any(palabra))
+        .first()
+    )
+    if not permitida:
+        raise HTTPException(status_code=404, detail="No hay audio para esa palabra.")
+
+    try:
+        ruta = servicio_tts.obtener(palabra, lento=True)
+    except Exception as e:
+        logger.warning(f"TTS no disponible para '{palabra}': {e}")
+        raise HTTPException(status_code=503, detail="El audio de la palabra no está disponible.")
+    return almacen_audio.respuesta(
+        request,
+        ruta,
+        media_type=servicio_tts.motor.media_type,
+        etag=etag_tts(ruta),
+        cache_control=settings.AUDIO_LECTURA_CACHE_CONTROL,
+    )
 
 
 # ============================================================
 # 3. ✅ ANALIZAR LECTURA COMPLETA CON EJERCICIOS
 # ============================================================
-@router.post("/analizar-lectura")
+@router.post(
+    "/analizar-lectura",
+    dependencies=[Depends(requiere_modelo(f"asr:{settings.ASR_PERFIL_EVALUACION}"))],
+)
 async def analizar_lectura_endpoint(
     estudiante_id: int = Form(...),
     contenido_id: int = Form(...),
@@ -135,27 +301,21 @@ async def analizar_lectura_endpoint(
     ✅ CAMBIO CLAVE: Ahora usa manager_ia.procesar_lectura()
     que incluye tanto el análisis como la generación de ejercicios.
     """
-    _asegurar_directorios()
-
     padre = _obtener_padre_actual(db, usuario_actual)
     _verificar_estudiante_de_padre(db, padre, estudiante_id)
 
-    ext = os.path.splitext(audio.filename or "")[1] or ".wav"
-    filename = f"lectura_{estudiante_id}_{contenido_id}_{uuid.uuid4().hex}{ext}"
-    audio_path = os.path.join(UPLOAD_AUDIO_DIR, filename)
-
     try:
-        with open(audio_path, "wb") as f:
-            contenido_bytes = await audio.read()
-            f.write(contenido_bytes)
+        subida = await _guardar_audio(audio, TIPO_EVALUACION)
 
-        # ✅ CAMBIO: Usar manager_ia en lugar de analizador directamente
-        resultado = manager_ia.procesar_lectura(
+        # Whisper y la BD corren en el ejecutor IA, no en el event loop
+        resultado = await ejecutor_ia.ejecutar(
+            manager_ia.procesar_lectura,
             db=db,
             estudiante_id=estudiante_id,
             contenido_id=contenido_id,
-            audio_path=audio_path,
+            audio_path=subida["ruta"],
             evaluacion_id=evaluacion_id,
+            hash_audio=subida["sha256"],
         )
 
         logger.info(f"✅ Análisis completo | Ejercicios generados: {len(resultado.get('ejercicios_recomendados', []))}")
@@ -164,6 +324,8 @@ async def analizar_lectura_endpoint(
 
     except HTTPException:
         raise
+    except ColaIASaturadaError as e:
+        raise _error_cola_saturada(e)
     except Exception as e:
         logger.exception("Error al analizar lectura con IA")
         raise HTTPException(status_code=500, detail=str(e))
@@ -172,7 +334,10 @@ async def analizar_lectura_endpoint(
 # ============================================================
 # 4. Práctica de ejercicio
 # ============================================================
-@router.post("/practicar-ejercicio")
+@router.post(
+    "/practicar-ejercicio",
+    dependencies=[Depends(requiere_modelo(f"asr:{settings.ASR_PERFIL_PRACTICA}"))],
+)
 async def practicar_ejercicio_endpoint(
     estudiante_id: int = Form(...),
     ejercicio_id: int = Form(...),
@@ -182,29 +347,21 @@ async def practicar_ejercicio_endpoint(
 ):
     logger.info(f"📥 Recibida petición de práctica | estudiante={estudiante_id} | ejercicio={ejercicio_id}")
     
-    _asegurar_directorios()
-
     try:
         padre = _obtener_padre_actual(db, usuario_actual)
         _verificar_estudiante_de_padre(db, padre, estudiante_id)
 
-        ext = os.path.splitext(audio.filename or "")[1] or ".wav"
-        filename = f"practica_{ejercicio_id}_{uuid.uuid4().hex}{ext}"
-        audio_path = os.path.join(PRACTICA_AUDIO_DIR, filename)
-
-        logger.info(f"💾 Guardando audio | path={audio_path}")
-        
-        with open(audio_path, "wb") as f:
-            contenido_bytes = await audio.read()
-            f.write(contenido_bytes)
+        subida = await _guardar_audio(audio, TIPO_PRACTICA)
 
-        logger.info(f"✅ Audio guardado | size={len(contenido_bytes)} bytes")
+        logger.info(f"✅ Audio guardado | path={subida['ruta']} | size={subida['tamano']} bytes")
 
-        resultado = manager_ia.practicar_ejercicio(
+        resultado = await ejecutor_ia.ejecutar(
+            manager_ia.practicar_ejercicio,
             db=db,
             estudiante_id=estudiante_id,
             ejercicio_id=ejercicio_id,
-            audio_path=audio_path,
+            audio_path=subida["ruta"],
+            hash_audio=subida["sha256"],
         )
 
         logger.info("🎉 Práctica completada exitosamente")
@@ -212,9 +369,185 @@ async def practicar_ejercicio_endpoint(
 
     except HTTPException:
         raise
+    except ColaIASaturadaError as e:
+        raise _error_cola_saturada(e)
     except ValueError as ve:
         logger.error(f"❌ Error de validación: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.exception("❌ Error al analizar práctica de ejercicio con IA")
-        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+
+# ============================================================
+# 5. Análisis de lectura en segundo plano (trabajos)
+# ============================================================
+@router.post("/trabajos/analizar-lectura", status_code=202, response_model=TrabajoIAResponse)
+async def encolar_analisis_lectura(
+    estudiante_id: int = Form(...),
+    contenido_id: int = Form(...),
+    audio: UploadFile = File(...),
+    evaluacion_id: Optional[int] = Form(None),
+    db: Session = Depends(get_db),
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    """
+    Guarda el audio y devuelve de inmediato el id del trabajo.
+    El análisis completo lo ejecuta la cola de trabajos IA.
+    """
+    padre = _obtener_padre_actual(db, usuario_actual)
+    _verificar_estudiante_de_padre(db, padre, estudiante_id)
+
+    subida = await _guardar_audio(audio, TIPO_EVALUACION)
+
+    return cola_trabajos.encolar(
+        db,
+        "analisis_lectura",
+        parametros={
+            "estudiante_id": estudiante_id,
+            "contenido_id": contenido_id,
+            "audio_path": subida["ruta"],
+            "evaluacion_id": evaluacion_id,
+            "hash_audio": subida["sha256"],
+        },
+        usuario_id=usuario_actual.id,
+        estudiante_id=estudiante_id,
+    )
+
+
+@router.get("/trabajos/{trabajo_id}", response_model=TrabajoIAResponse)
+def obtener_estado_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    return _obtener_trabajo_usuario(db, trabajo_id, usuario_actual)
+
+
+@router.get("/trabajos/{trabajo_id}/resultado")
+def obtener_resultado_trabajo(
+    trabajo_id: int,
+    db: Session = Depends(get_db),
+    usuario_actual: Usuario = Depends(obtener_usuario_actual),
+):
+    trabajo = _obtener_trabajo_usuario(db, trabajo_id, usuario_actual)
+
+    if trabajo.estado == "error":
+        raise HTTPException(status_code=422, detail=trabajo.error or "El análisis falló.")
+    if trabajo.estado != "completado":
+        raise HTTPException(
+            status_code=409,
+            detail=f"El trabajo aún no termina (estado={trabajo.estado}).",
+            headers={"Retry-After": "2"},
+        )
+
+    return trabajo.resultado
+
+
+
+# ============================================================
+# 6. Lectura en tiempo real (WebSocket)
+# ============================================================
+@router.websocket("/ws/analizar-lectura")
+async def analizar_lectura_streaming(
+    websocket: WebSocket,
+    token: str,
+    estudiante_id: int,
+    contenido_id: int,
+    db: Session = Depends(get_db),
+):
+    """
+    El cliente envía tramas binarias PCM 16-bit mono a 16 kHz mientras el
+    niño lee y un mensaje de texto {"accion": "fin"} al terminar.
+    El servidor responde con eventos "parcial" y "palabra" y, al final,
+    un evento "resultado" con la evaluación ya guardada.
+    """
+    await websocket.accept()
+
+    try:
+        usuario_actual = await obtener_usuario_actual(token=token, db=db)
+        padre = _obtener_padre_actual(db, usuario_actual)
+        _verificar_estudiante_de_padre(db, padre, estudiante_id)
+    except HTTPException as e:
+        await websocket.send_json({"tipo": "error", "detalle": e.detail})
+        await websocket.close(code=1008)
+        return
+
+    contenido = db.get(ContenidoLectura, contenido_id)
+    if not contenido:
+        await websocket.send_json({"tipo": "error", "detalle": "Contenido de lectura no encontrado."})
+        await websocket.close(code=1008)
+        return
+
+    if not registro_modelos.modelo_listo(f"asr:{settings.ASR_PERFIL_STREAMING}"):
+        registro_modelos.iniciar_precarga()
+        await websocket.send_json(
+            {
+                "tipo": "error",
+                "detalle": "Los modelos de IA se están cargando, intenta de nuevo en unos segundos.",
+                "retry_after": settings.IA_COLA_RETRY_AFTER_SEGUNDOS,
+            }
+        )
+        await websocket.close(code=1013)
+        return
+
+    sesion = SesionLecturaStreaming(
+        manager_ia.analizador,
+        contenido.contenido,
+        ref_tokens=obtener_tokens_referencia(db, contenido),
+    )
+    await websocket.send_json({"tipo": "listo", "total_palabras": len(sesion.ref_tokens)})
+
+    try:
+        while True:
+            mensaje = await websocket.receive()
+            if mensaje["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(mensaje.get("code", 1000))
+
+            if mensaje.get("bytes"):
+                if sesion.duracion > settings.AUDIO_MAX_SEGUNDOS:
+                    await websocket.send_json({"tipo": "error", "detalle": "Se superó la duración máxima."})
+                    break
+
+                for segmento in sesion.agregar_audio(mensaje["bytes"]):
+                    for evento in await ejecutor_ia.ejecutar(sesion.procesar_segmento, segmento):
+                        await websocket.send_json(evento)
+
+            elif mensaje.get("text"):
+                try:
+                    datos = json.loads(mensaje["text"])
+                except ValueError:
+                    await websocket.send_json({"tipo": "error", "detalle": "Mensaje JSON inválido."})
+                    continue
+                if isinstance(datos, dict) and datos.get("accion") == "fin":
+                    break
+
+        for evento in await ejecutor_ia.ejecutar(sesion.finalizar):
+            await websocket.send_json(evento)
+
+        audio_path = await run_in_threadpool(
+            almacen_audio.guardar,
+            sesion.guardar_wav(almacen_audio.ruta_entrante(".wav")),
+            TIPO_EVALUACION,
+        )
+
+        resultado = await ejecutor_ia.ejecutar(
+            manager_ia.procesar_transcripcion,
+            db=db,
+            estudiante_id=estudiante_id,
+            contenido=contenido,
+            trans=sesion.transcripcion(),
+            audio_path=audio_path,
+        )
+        await websocket.send_json({"tipo": "resultado", **resultado})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info(f"🔌 Streaming de lectura desconectado | estudiante={estudiante_id}")
+    except ColaIASaturadaError as e:
+        await websocket.send_json({"tipo": "error", "detalle": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=1013)
+    except Exception as e:
+        logger.exception("Error en el streaming de lectura")
+        await websocket.send_json({"tipo": "error", "detalle": str(e)})
+        await websocket.close(code=1011)
@@ -5,6 +5,8 @@ from typing import List
 from app.config import get_db
 from app.servicios.seguridad import requiere_docente
 from app.modelos import ContenidoLectura, CategoriaLectura, Curso
+from app.servicios.indice_lectura import actualizar_indice
+from app.servicios.contenido import audio_contenido_actualizado
 from pydantic import BaseModel
 from typing import Optional
 
@@ -91,8 +93,11 @@ def crear_lectura(
     )
 
     db.add(lectura)
+    db.flush()
+    actualizar_indice(db, lectura)
     db.commit()
     db.refresh(lectura)
+    audio_contenido_actualizado(lectura, {"contenido"})
 
     return lectura
 
@@ -118,11 +123,16 @@ def actualizar_lectura(
     if not lectura:
         raise HTTPException(404, "Lectura no encontrada")
 
-    for key, value in datos.dict(exclude_unset=True).items():
+    cambios = datos.dict(exclude_unset=True)
+    for key, value in cambios.items():
         setattr(lectura, key, value)
 
+    if "contenido" in cambios:
+        actualizar_indice(db, lectura)
+
     db.commit()
     db.refresh(lectura)
+    audio_contenido_actualizado(lectura, cambios)
 
     return lectura
 
@@ -0,0 +1,51 @@
+# app/scripts/compactar_audio.py
+#
+# Pasa las grabaciones retenidas a Opus y borra las vencidas según
+# ALMACENAMIENTO_RETENCION. Pensado para cron (una pasada) o como proceso
+# propio (--continuo).
+# Uso: python -m app.scripts.compactar_audio [--simular] [--continuo] [--json salida.json]
+
+import argparse
+import json
+import signal
+import threading
+
+from app.logs.logger import logger
+from app.servicios.compactacion_audio import gestor_almacenamiento
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compactación y retención de audios")
+    parser.add_argument("--simular", action="store_true", help="Solo medir, sin modificar nada")
+    parser.add_argument("--continuo", action="store_true", help="Repetir cada ALMACENAMIENTO_INTERVALO_HORAS")
+    parser.add_argument("--json", help="Guardar el reporte en un archivo JSON")
+    args = parser.parse_args()
+
+    if args.continuo:
+        detener = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: detener.set())
+        signal.signal(signal.SIGTERM, lambda *_: detener.set())
+
+        gestor_almacenamiento.iniciar()
+        print("🗜️ Compactación de audio en ejecución (Ctrl+C para salir)")
+        detener.wait()
+        logger.info("Deteniendo compactación de audio...")
+        gestor_almacenamiento.detener()
+        return
+
+    reporte = gestor_almacenamiento.ejecutar(simular=args.simular)
+    for tipo, r in reporte.get("tipos", {}).items():
+        print(
+            f"  {tipo:<12} {r['compactados']:5d} a Opus  {r['eliminados']:5d} vencidos  "
+            f"{r['errores']:3d} errores  {r['bytes_liberados'] / (1024**2):9.1f} MB liberados"
+        )
+    if "mb_liberados" in reporte:
+        print(f"💾 Total liberado: {reporte['mb_liberados']} MB en {reporte['duracion_s']} s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# app/scripts/perfil_arranque.py
+#
+# Perfil de arranque de la API: cuánto tarda `import app.main` y qué
+# módulos pesan más, y opcionalmente cuánto tarda la precarga de modelos.
+# Uso: python -m app.scripts.perfil_arranque [--top 20] [--modelos] [--json salida.json]
+#      python -m app.scripts.perfil_arranque --modulo app.routers
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+
+def medir_imports(modulo: str = "app.main") -> List[Dict]:
+    """Ejecuta `python -X importtime` en un proceso limpio y parsea la salida."""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True,
+        text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1])
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        filas.append(
+            {
+                "modulo": nombre.strip(),
+                "propio_ms": int(propio) / 1000,
+                "acumulado_ms": int(acumulado) / 1000,
+            }
+        )
+    return filas
+
+
+def resumir(filas: List[Dict], top: int) -> Dict:
+    raiz = filas[-1] if filas else None
+
+    # Tiempo propio agrupado por paquete de primer nivel (torch, faster_whisper, app...)
+    por_paquete: Dict[str, float] = defaultdict(float)
+    for f in filas:
+        por_paquete[f["modulo"].split(".")[0]] += f["propio_ms"]
+
+    return {
+        "modulo": raiz["modulo"] if raiz else None,
+        "import_ms": raiz["acumulado_ms"] if raiz else None,
+        "modulos_mas_lentos": sorted(filas, key=lambda f: f["acumulado_ms"], reverse=True)[:top],
+        "paquetes": dict(sorted(por_paquete.items(), key=lambda x: x[1], reverse=True)[:top]),
+    }
+
+
+def medir_precarga() -> Dict:
+    from app.servicios.registro_modelos import registro_modelos
+
+    inicio = time.time()
+    registro_modelos.iniciar_precarga()
+    registro_modelos.esperar_precarga()
+    estado = registro_modelos.estado()
+    return {
+        "total_s": round(time.time() - inicio, 2),
+        "precarga": estado["precarga"],
+        "modelos": estado["modelos"],
+        "memoria_proceso_mb": estado["memoria_proceso_mb"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de arranque de la API")
+    parser.add_argument("--modulo", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--modelos", action="store_true", help="Medir también la precarga de modelos")
+    parser.add_argument("--json", help="Guardar el reporte en un archivo JSON")
+    args = parser.parse_args()
+
+    reporte = resumir(medir_imports(args.modulo), args.top)
+
+    print(f"⏱️  import {reporte['modulo']}: {reporte['import_ms']:.0f} ms")
+    print("\nMódulos más lentos (acumulado):")
+    for f in reporte["modulos_mas_lentos"]:
+        print(f"  {f['acumulado_ms']:9.1f} ms  {f['modulo']}")
+    print("\nTiempo propio por paquete:")
+    for paquete, ms in reporte["paquetes"].items():
+        print(f"  {ms:9.1f} ms  {paquete}")
+
+    if args.modelos:
+        reporte["modelos"] = medir_precarga()
+        print(f"\n🔥 Precarga de modelos: {reporte['modelos']['total_s']} s")
+        for m in reporte["modelos"]["modelos"]:
+            print(f"  {m['tiempo_carga_s']:7.2f} s  {m['memoria_mb']:8.1f} MB  {m['modelo']} ({m['compute_type']})")
+        for nombre, error in reporte["modelos"]["precarga"]["errores"].items():
+            print(f"  ❌ {nombre}: {error}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Reporte guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
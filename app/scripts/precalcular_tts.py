@@ -0,0 +1,62 @@
+# app/scripts/precalcular_tts.py
+#
+# Genera el audio TTS de todas las lecturas activas y de las palabras de
+# los ejercicios de práctica pendientes (lo que ya está en caché se salta).
+# Uso: python -m app.scripts.precalcular_tts [--solo-lecturas] [--solo-palabras]
+
+import argparse
+import time
+
+from app.config import SessionLocal
+from app.modelos import ContenidoLectura, EjercicioPractica
+from app.servicios.tts import servicio_tts
+
+
+def _generar(textos, lento: bool) -> dict:
+    resumen = {"total": 0, "en_cache": 0, "generados": 0, "errores": 0}
+    for texto in textos:
+        resumen["total"] += 1
+        if servicio_tts.en_cache(texto, lento):
+            resumen["en_cache"] += 1
+            continue
+        try:
+            servicio_tts.obtener(texto, lento)
+            resumen["generados"] += 1
+        except Exception as e:
+            print(f"  ❌ {texto[:40]!r}: {e}")
+            resumen["errores"] += 1
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcular audio TTS")
+    parser.add_argument("--solo-lecturas", action="store_true")
+    parser.add_argument("--solo-palabras", action="store_true")
+    args = parser.parse_args()
+
+    inicio = time.time()
+    db = SessionLocal()
+    try:
+        if not args.solo_palabras:
+            lecturas = [
+                c for (c,) in db.query(ContenidoLectura.contenido)
+                .filter(ContenidoLectura.activo.is_(True), ContenidoLectura.deleted_at.is_(None))
+            ]
+            print(f"📚 Lecturas: {_generar(lecturas, lento=False)}")
+
+        if not args.solo_lecturas:
+            palabras = {
+                p
+                for (lista,) in db.query(EjercicioPractica.palabras_objetivo)
+                .filter(EjercicioPractica.completado.is_(False), EjercicioPractica.deleted_at.is_(None))
+                for p in lista or []
+            }
+            print(f"🔤 Palabras: {_generar(sorted(palabras), lento=True)}")
+    finally:
+        db.close()
+
+    print(f"🔊 Motor {servicio_tts.motor.nombre} | {time.time() - inicio:.1f}s | caché: {servicio_tts.cache.estado()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# app/scripts/servidor_modelos.py
+#
+# Servidor local de modelos: carga Whisper y FLAN-T5 una sola vez y los
+# comparte con todos los workers de la API por un socket Unix.
+# Uso: MODELOS_SOCKET=/run/tutoria/modelos.sock MODELOS_SOCKET_CLAVE=<secreto> \
+#      python -m app.scripts.servidor_modelos
+# (los workers de la API se levantan con las mismas variables y el mismo
+# usuario: el socket queda con 0600 en un directorio 0700)
+
+import signal
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.registro_modelos import registro_modelos
+from app.servicios.servidor_modelos import ServidorModelos, clave_socket
+
+
+def _terminar(*_):
+    raise KeyboardInterrupt
+
+
+def main():
+    if not settings.MODELOS_SOCKET:
+        raise SystemExit("Definir MODELOS_SOCKET con la ruta del socket Unix.")
+    try:
+        clave_socket()
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+
+    # Este proceso es el dueño de los modelos: nunca debe delegarlos
+    ruta_socket = settings.MODELOS_SOCKET
+    settings.MODELOS_SOCKET = ""
+
+    servidor = ServidorModelos(ruta_socket)
+
+    signal.signal(signal.SIGTERM, _terminar)
+
+    registro_modelos.iniciar_precarga()
+    print(f"🧠 Servidor de modelos en {ruta_socket} (Ctrl+C para salir)")
+
+    try:
+        servidor.servir()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.detener()
+        logger.info("Servidor de modelos detenido.")
+
+
+if __name__ == "__main__":
+    main()
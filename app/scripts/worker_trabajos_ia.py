@@ -0,0 +1,33 @@
+# app/scripts/worker_trabajos_ia.py
+#
+# Proceso dedicado a consumir la cola de trabajos IA.
+# Uso: python -m app.scripts.worker_trabajos_ia
+# (con TRABAJOS_IA_EN_API=false en los workers de la API)
+
+import signal
+import threading
+
+import app.routers  # noqa: F401  registra los manejadores de cada tipo de trabajo
+from app.logs.logger import logger
+from app.servicios.cola_trabajos import cola_trabajos
+from app.servicios.registro_modelos import registro_modelos
+
+
+def main():
+    detener = threading.Event()
+
+    signal.signal(signal.SIGINT, lambda *_: detener.set())
+    signal.signal(signal.SIGTERM, lambda *_: detener.set())
+
+    registro_modelos.iniciar_precarga()
+    cola_trabajos.iniciar()
+    print("🧵 Worker de trabajos IA en ejecución (Ctrl+C para salir)")
+
+    detener.wait()
+
+    logger.info("Deteniendo worker de trabajos IA...")
+    cola_trabajos.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.servicios.indice_lectura import es_puntuacion
+
+IGUAL = "igual"
+SUSTITUCION = "sustitucion"
+OMISION = "omision"
+INSERCION = "insercion"
+
+# Saltarse o inventar un signo de puntuación casi no cuenta
+COSTO_PUNTUACION = 0.1
+# Confundir palabras con el mismo comienzo ("perro" / "pero") pesa menos
+# que una sustitución cualquiera, así el error se empareja con la palabra
+# que el niño intentó leer
+FACTOR_SUSTITUCION_PARECIDA = 0.75
+LARGO_RAIZ = 3
+# Con más celdas que esto se restringe la búsqueda a una banda diagonal
+CELDAS_SIN_BANDA = 250_000
+BANDA_MINIMA = 64
+
+
+def _codificar(
+    ref: Sequence[str],
+    hyp: Sequence[str],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tokens a enteros (vocabulario común). Por id devuelve además la
+    máscara de puntuación y el id de su raíz (primeras letras).
+    """
+    vocabulario: Dict[str, int] = {}
+    ref_ids = np.fromiter(
+        (vocabulario.setdefault(t, len(vocabulario)) for t in ref),
+        dtype=np.int32,
+        count=len(ref),
+    )
+    hyp_ids = np.fromiter(
+        (vocabulario.setdefault(t, len(vocabulario)) for t in hyp),
+        dtype=np.int32,
+        count=len(hyp),
+    )
+    puntuacion = np.fromiter(
+        (es_puntuacion(t) for t in vocabulario),
+        dtype=bool,
+        count=len(vocabulario),
+    )
+    raices_vocab: Dict[str, int] = {}
+    raices = np.fromiter(
+        (raices_vocab.setdefault(t[:LARGO_RAIZ], len(raices_vocab)) for t in vocabulario),
+        dtype=np.int32,
+        count=len(vocabulario),
+    )
+    return ref_ids, hyp_ids, puntuacion, raices
+
+
+def _costos_token(ids: np.ndarray, puntuacion: np.ndarray, costo: float) -> np.ndarray:
+    return np.where(puntuacion[ids], COSTO_PUNTUACION, costo)
+
+
+def _prefijo_comun(a: np.ndarray, b: np.ndarray) -> int:
+    k = min(a.shape[0], b.shape[0])
+    distintos = np.flatnonzero(a[:k] != b[:k])
+    return int(distintos[0]) if distintos.size else k
+
+
+def alinear(
+    ref: Sequence[str],
+    hyp: Sequence[str],
+    costo_sustitucion: float = 1.0,
+    costo_omision: float = 1.0,
+    costo_insercion: float = 1.0,
+    banda: Optional[int] = None,
+) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Alineación de mínima distancia de edición ponderada entre los tokens
+    de referencia y los de la hipótesis.
+
+    Devuelve la lista de operaciones (op, i, j) en orden, donde `i` indexa
+    `ref` (None en inserciones) y `j` indexa `hyp` (None en omisiones).
+
+    El prefijo y el sufijo comunes se emparejan directamente y solo el
+    tramo central pasa por la DP.
+    """
+    ref_ids, hyp_ids, puntuacion, raices = _codificar(ref, hyp)
+
+    p = _prefijo_comun(ref_ids, hyp_ids)
+    s = _prefijo_comun(ref_ids[p:][::-1], hyp_ids[p:][::-1])
+    n, m = len(ref) - p - s, len(hyp) - p - s
+
+    operaciones = [(IGUAL, k, k) for k in range(p)]
+
+    if n == 0:
+        operaciones.extend((INSERCION, None, p + j) for j in range(m))
+    elif m == 0:
+        operaciones.extend((OMISION, p + i, None) for i in range(n))
+    else:
+        centrales = _alinear_dp(
+            ref_ids[p:p + n],
+            hyp_ids[p:p + m],
+            _costos_token(ref_ids[p:p + n], puntuacion, costo_omision),
+            _costos_token(hyp_ids[p:p + m], puntuacion, costo_insercion),
+            costo_sustitucion,
+            raices,
+            banda,
+        )
+        operaciones.extend(
+            (op, None if i is None else p + i, None if j is None else p + j)
+            for op, i, j in centrales
+        )
+
+    operaciones.extend((IGUAL, len(ref) - s + k, len(hyp) - s + k) for k in range(s))
+    return operaciones
+
+
+def _alinear_dp(
+    ref_ids: np.ndarray,
+    hyp_ids: np.ndarray,
+    c_omision: np.ndarray,
+    c_insercion: np.ndarray,
+    costo_sustitucion: float,
+    raices: np.ndarray,
+    banda: Optional[int],
+) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    DP por filas vectorizadas. Se guarda R[i, j] = D[i, j] - acumulado[j]
+    (acumulado = costo de insertar hyp[:j]); así el paso horizontal
+    (inserción) se reduce a un mínimo acumulado sobre la fila y cada fila
+    cuesta cuatro operaciones de NumPy.
+    """
+    n, m = ref_ids.shape[0], hyp_ids.shape[0]
+    acumulado = np.zeros(m + 1)
+    np.cumsum(c_insercion, out=acumulado[1:])
+
+    # Diagonal relativa: costo de sustitución menos el de insertar hyp[j]
+    diagonal = np.where(
+        raices[ref_ids][:, None] == raices[hyp_ids][None, :],
+        costo_sustitucion * FACTOR_SUSTITUCION_PARECIDA,
+        costo_sustitucion,
+    )
+    diagonal[ref_ids[:, None] == hyp_ids[None, :]] = 0.0
+    diagonal -= c_insercion[None, :]
+
+    if banda is None and n * m > CELDAS_SIN_BANDA:
+        banda = BANDA_MINIMA
+    if banda is not None:
+        banda = max(banda, abs(n - m) + 1)
+
+    R = np.full((n + 1, m + 1), np.inf) if banda is not None else np.empty((n + 1, m + 1))
+    R[0] = 0.0
+    omision = c_omision.tolist()
+
+    if banda is None:
+        _filas_completas(R, diagonal, omision)
+    else:
+        _filas_banda(R, diagonal, omision, banda)
+
+    return _reconstruir(R, diagonal, omision, ref_ids, hyp_ids)
+
+
+def _filas_completas(R: np.ndarray, diagonal: np.ndarray, omision: List[float]) -> None:
+    """
+    Sin banda todas las filas tienen el mismo largo: las vistas de fila se
+    sacan de una vez y cada paso del bucle son solo las cuatro operaciones.
+    """
+    tmp = np.empty(R.shape[1] - 1)
+    for fila, previa, dg, om in zip(R[1:], R[:-1], diagonal, omision):
+        # vertical (omisión)
+        np.add(previa, om, out=fila)
+        # diagonal (acierto / sustitución)
+        np.add(previa[:-1], dg, out=tmp)
+        np.minimum(fila[1:], tmp, out=fila[1:])
+        # horizontal (inserción)
+        np.minimum.accumulate(fila, out=fila)
+
+
+def _filas_banda(R: np.ndarray, diagonal: np.ndarray, omision: List[float], banda: int) -> None:
+    n, m = R.shape[0] - 1, R.shape[1] - 1
+    tmp = np.empty(m)
+    for i in range(1, n + 1):
+        centro = (i * m) // n
+        lo, hi = max(0, centro - banda), min(m, centro + banda)
+
+        previa = R[i - 1, lo:hi + 1]
+        fila = R[i, lo:hi + 1]
+        np.add(previa, omision[i - 1], out=fila)
+        if lo == 0:
+            t = tmp[:hi]
+            np.add(previa[:-1], diagonal[i - 1, :hi], out=t)
+            np.minimum(fila[1:], t, out=fila[1:])
+        else:
+            t = tmp[:hi - lo + 1]
+            np.add(R[i - 1, lo - 1:hi], diagonal[i - 1, lo - 1:hi], out=t)
+            np.minimum(fila, t, out=fila)
+        np.minimum.accumulate(fila, out=fila)
+
+
+def _reconstruir(
+    R: np.ndarray,
+    diagonal: np.ndarray,
+    omision: List[float],
+    ref_ids: np.ndarray,
+    hyp_ids: np.ndarray,
+) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    i, j = R.shape[0] - 1, R.shape[1] - 1
+    operaciones = []
+
+    # item() devuelve floats de Python: mucho más barato que indexar NumPy
+    valor, costo_diagonal = R.item, diagonal.item
+    ref, hyp = ref_ids.tolist(), hyp_ids.tolist()
+    while i > 0 and j > 0:
+        actual = valor(i, j)
+        if abs(actual - (valor(i - 1, j - 1) + costo_diagonal(i - 1, j - 1))) < 1e-9:
+            op = IGUAL if ref[i - 1] == hyp[j - 1] else SUSTITUCION
+            operaciones.append((op, i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif abs(actual - (valor(i - 1, j) + omision[i - 1])) < 1e-9:
+            operaciones.append((OMISION, i - 1, None))
+            i -= 1
+        else:
+            operaciones.append((INSERCION, None, j - 1))
+            j -= 1
+
+    operaciones.extend((OMISION, k, None) for k in range(i - 1, -1, -1))
+    operaciones.extend((INSERCION, None, k) for k in range(j - 1, -1, -1))
+    operaciones.reverse()
+    return operaciones
@@ -0,0 +1,479 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.cache_disco import CacheDiscoLRU, hash_archivo
+
+ESQUEMA = "almacen://"
+TAMANO_BLOQUE = 64 * 1024
+
+
+# ================= BACKENDS =================
+class BackendAlmacen(ABC):
+    """Operaciones mínimas que necesita el almacén sobre un blob por clave."""
+
+    nombre = "base"
+
+    @abstractmethod
+    def existe(self, clave: str) -> bool:
+        ...
+
+    @abstractmethod
+    def guardar(self, clave: str, origen: str, modificado: Optional[float] = None) -> None:
+        """Guarda el archivo `origen` (puede moverlo: el llamador no lo reutiliza)."""
+
+    @abstractmethod
+    def tocar(self, clave: str, modificado: Optional[float] = None) -> None:
+        """
+        Adelanta la fecha de modificación del blob (a `modificado` o ahora)
+        para que su retención vuelva a contar. Nunca la atrasa.
+        """
+
+    @abstractmethod
+    def eliminar(self, clave: str) -> None:
+        ...
+
+    @abstractmethod
+    def tamano(self, clave: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def modificado(self, clave: str) -> Optional[float]:
+        """Fecha de modificación actual del blob (None si no existe)."""
+
+    @abstractmethod
+    def listar(self, prefijo: str) -> Iterator[Tuple[str, float, int]]:
+        """(clave, fecha de modificación, tamaño) de cada blob bajo el prefijo."""
+
+    @abstractmethod
+    def ruta_local(self, clave: str) -> str:
+        """Ruta en disco para decodificar con PyAV / Whisper."""
+
+    @abstractmethod
+    def leer(self, clave: str, inicio: int, fin: int) -> Iterator[bytes]:
+        """Bytes [inicio, fin] (ambos incluidos) en bloques."""
+
+
+class BackendLocal(BackendAlmacen):
+    nombre = "local"
+
+    def __init__(self, raiz: str) -> None:
+        self.raiz = raiz
+        os.makedirs(self.raiz, exist_ok=True)
+
+    def ruta_local(self, clave: str) -> str:
+        return os.path.join(self.raiz, clave)
+
+    def existe(self, clave: str) -> bool:
+        return os.path.isfile(self.ruta_local(clave))
+
+    def guardar(self, clave: str, origen: str, modificado: Optional[float] = None) -> None:
+        destino = self.ruta_local(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+        # Mover es un rename si está en el mismo disco; se publica con
+        # os.replace para que nunca quede un blob a medio escribir
+        tmp = f"{destino}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.move(origen, tmp)
+            if modificado:
+                os.utime(tmp, (modificado, modificado))
+            os.replace(tmp, destino)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def tocar(self, clave: str, modificado: Optional[float] = None) -> None:
+        ruta = self.ruta_local(clave)
+        try:
+            fecha = max(os.path.getmtime(ruta), modificado or time.time())
+            os.utime(ruta, (fecha, fecha))
+        except OSError:
+            pass
+
+    def eliminar(self, clave: str) -> None:
+        try:
+            os.remove(self.ruta_local(clave))
+        except FileNotFoundError:
+            pass
+
+    def tamano(self, clave: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self.ruta_local(clave))
+        except OSError:
+            return None
+
+    def modificado(self, clave: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.ruta_local(clave))
+        except OSError:
+            return None
+
+    def listar(self, prefijo: str) -> Iterator[Tuple[str, float, int]]:
+        base = self.ruta_local(prefijo)
+        for raiz, _, archivos in os.walk(base):
+            for nombre in archivos:
+                if nombre.endswith(".tmp"):
+                    continue
+                ruta = os.path.join(raiz, nombre)
+                try:
+                    info = os.stat(ruta)
+                except OSError:
+                    continue
+                yield os.path.relpath(ruta, self.raiz), info.st_mtime, info.st_size
+
+    def leer(self, clave: str, inicio: int, fin: int) -> Iterator[bytes]:
+        return _leer_archivo(self.ruta_local(clave), inicio, fin)
+
+
+class BackendS3(BackendAlmacen):
+    """
+    Bucket S3 o compatible (MinIO, Ceph, o un stand-in local como moto)
+    vía `endpoint_url`. Las credenciales salen de las variables estándar
+    de AWS. Para decodificar se baja una copia a una caché local LRU.
+    """
+
+    nombre = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefijo: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        cache_dir: str = "uploads/cache/almacen",
+        cache_mb: int = 512,
+        cliente=None,
+    ) -> None:
+        if cliente is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("ALMACEN_AUDIO_BACKEND=s3 necesita el paquete boto3")
+            cliente = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url or None,
+                region_name=region or None,
+            )
+        self.cliente = cliente
+        self.bucket = bucket
+        self.prefijo = prefijo
+        self.copias = CacheDiscoLRU(cache_dir, max_mb=cache_mb, extension="")
+
+    def _objeto(self, clave: str) -> str:
+        return f"{self.prefijo}{clave}"
+
+    def _no_encontrado(self, error) -> bool:
+        codigo = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return codigo in ("404", "NoSuchKey", "NotFound")
+
+    def existe(self, clave: str) -> bool:
+        return self.tamano(clave) is not None
+
+    def guardar(self, clave: str, origen: str, modificado: Optional[float] = None) -> None:
+        # LastModified lo fija S3: en este backend la retención de un blob
+        # compactado cuenta desde la compactación
+        self.cliente.upload_file(origen, self.bucket, self._objeto(clave))
+
+    def tocar(self, clave: str, modificado: Optional[float] = None) -> None:
+        # LastModified solo avanza copiando el objeto sobre sí mismo; una
+        # fecha explícita (compactación) es siempre anterior a la actual
+        if modificado is not None:
+            return
+        objeto = self._objeto(clave)
+        self.cliente.copy_object(
+            Bucket=self.bucket,
+            Key=objeto,
+            CopySource={"Bucket": self.bucket, "Key": objeto},
+            MetadataDirective="REPLACE",
+        )
+
+    def eliminar(self, clave: str) -> None:
+        self.cliente.delete_object(Bucket=self.bucket, Key=self._objeto(clave))
+
+    def tamano(self, clave: str) -> Optional[int]:
+        try:
+            cabecera = self.cliente.head_object(Bucket=self.bucket, Key=self._objeto(clave))
+        except Exception as e:
+            if self._no_encontrado(e):
+                return None
+            raise
+        return cabecera["ContentLength"]
+
+    def modificado(self, clave: str) -> Optional[float]:
+        try:
+            cabecera = self.cliente.head_object(Bucket=self.bucket, Key=self._objeto(clave))
+        except Exception as e:
+            if self._no_encontrado(e):
+                return None
+            raise
+        return cabecera["LastModified"].timestamp()
+
+    def listar(self, prefijo: str) -> Iterator[Tuple[str, float, int]]:
+        paginador = self.cliente.get_paginator("list_objects_v2")
+        for pagina in paginador.paginate(Bucket=self.bucket, Prefix=self._objeto(prefijo)):
+            for objeto in pagina.get("Contents", []):
+                yield (
+                    objeto["Key"][len(self.prefijo):],
+                    objeto["LastModified"].timestamp(),
+                    objeto["Size"],
+                )
+
+    def ruta_local(self, clave: str) -> str:
+        # El nombre ya es el hash del contenido: la copia nunca queda desactualizada
+        nombre = os.path.basename(clave)
+        ruta = self.copias.obtener_ruta(nombre)
+        if ruta:
+            return ruta
+
+        fd, tmp = tempfile.mkstemp(suffix=".tmp")
+        os.close(fd)
+        try:
+            self.cliente.download_file(self.bucket, self._objeto(clave), tmp)
+            return self.copias.guardar_archivo(nombre, tmp)
+        finally:
+            os.remove(tmp)
+
+    def leer(self, clave: str, inicio: int, fin: int) -> Iterator[bytes]:
+        respuesta = self.cliente.get_object(
+            Bucket=self.bucket,
+            Key=self._objeto(clave),
+            Range=f"bytes={inicio}-{fin}",
+        )
+        yield from respuesta["Body"].iter_chunks(TAMANO_BLOQUE)
+
+
+# ================= ALMACÉN =================
+class AlmacenAudio:
+    """
+    Grabaciones direccionadas por contenido.
+
+    Cada blob vive en `<tipo>/<h[:2]>/<h[2:4]>/<sha256><ext>`: dos subidas
+    iguales comparten blob y ningún directorio acumula cientos de miles de
+    archivos. En la BD se guarda la referencia `almacen://<clave>`; las
+    rutas locales anteriores al almacén se siguen aceptando.
+    """
+
+    def __init__(self, backend: BackendAlmacen, entrantes: str) -> None:
+        self.backend = backend
+        self.entrantes = entrantes
+        os.makedirs(self.entrantes, exist_ok=True)
+
+    # ----- referencias -----
+    @staticmethod
+    def clave(tipo: str, sha256: str, extension: str) -> str:
+        return f"{tipo}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}"
+
+    @staticmethod
+    def es_referencia(valor: Optional[str]) -> bool:
+        return bool(valor) and valor.startswith(ESQUEMA)
+
+    def _clave_de(self, referencia: str) -> str:
+        return referencia[len(ESQUEMA):]
+
+    def hash_audio(self, referencia: str) -> str:
+        """SHA-256 del contenido: sale de la clave sin leer el archivo."""
+        if self.es_referencia(referencia):
+            return os.path.splitext(os.path.basename(referencia))[0]
+        return hash_archivo(referencia)
+
+    # ----- escritura -----
+    def ruta_entrante(self, extension: str) -> str:
+        """Archivo temporal para recibir una subida antes de conocer su hash."""
+        return os.path.join(self.entrantes, f"{uuid.uuid4().hex}{extension}")
+
+    def guardar(
+        self,
+        origen: str,
+        tipo: str,
+        sha256: Optional[str] = None,
+        extension: Optional[str] = None,
+        modificado: Optional[float] = None,
+    ) -> str:
+        """
+        Pasa `origen` al almacén (no queda en su lugar) y devuelve la referencia.
+        Si el contenido ya estaba, no se vuelve a escribir.
+        """
+        sha256 = sha256 or hash_archivo(origen)
+        extension = extension if extension is not None else os.path.splitext(origen)[1]
+        clave = self.clave(tipo, sha256, extension)
+
+        try:
+            if self.backend.existe(clave):
+                # La retención cuenta desde la subida más reciente que lo usa
+                self.backend.tocar(clave, modificado)
+                logger.info(f"♻️ Audio duplicado, se reutiliza {clave}")
+            else:
+                self.backend.guardar(clave, origen, modificado)
+        finally:
+            if os.path.exists(origen):
+                os.remove(origen)
+        return f"{ESQUEMA}{clave}"
+
+    def eliminar(self, referencia: str) -> None:
+        if self.es_referencia(referencia):
+            self.backend.eliminar(self._clave_de(referencia))
+        elif os.path.exists(referencia):
+            os.remove(referencia)
+
+    # ----- lectura -----
+    def ruta_local(self, referencia: str) -> str:
+        if self.es_referencia(referencia):
+            return self.backend.ruta_local(self._clave_de(referencia))
+        return referencia
+
+    def tamano(self, referencia: str) -> Optional[int]:
+        if self.es_referencia(referencia):
+            return self.backend.tamano(self._clave_de(referencia))
+        try:
+            return os.path.getsize(referencia)
+        except OSError:
+            return None
+
+    def modificado(self, referencia: str) -> Optional[float]:
+        if self.es_referencia(referencia):
+            return self.backend.modificado(self._clave_de(referencia))
+        try:
+            return os.path.getmtime(referencia)
+        except OSError:
+            return None
+
+    def existe(self, referencia: Optional[str]) -> bool:
+        return bool(referencia) and self.tamano(referencia) is not None
+
+    def listar(self, tipo: str) -> Iterator[Tuple[str, float, int]]:
+        for clave, modificado, tamano in self.backend.listar(f"{tipo}/"):
+            yield f"{ESQUEMA}{clave}", modificado, tamano
+
+    # ----- HTTP -----
+    def etag(self, referencia: str) -> str:
+        """ETag fuerte: el SHA-256 del contenido."""
+        return f'"{self.hash_audio(referencia)}"'
+
+    def respuesta(
+        self,
+        request: Request,
+        referencia: str,
+        media_type: str,
+        etag: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        tamano: Optional[int] = None,
+    ) -> Response:
+        """
+        Sirve el audio con soporte de `Range` (un solo rango, que es lo que
+        piden <audio> y los reproductores nativos). Con `etag` responde 304
+        a un `If-None-Match` que coincida y respeta `If-Range`.
+        """
+        cabeceras = {"Accept-Ranges": "bytes"}
+        if etag:
+            cabeceras["ETag"] = etag
+        if cache_control:
+            cabeceras["Cache-Control"] = cache_control
+
+        if etag and _coincide_etag(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cabeceras)
+
+        if tamano is None:
+            tamano = self.tamano(referencia)
+        if tamano is None:
+            raise FileNotFoundError(referencia)
+
+        # Con If-Range de otra versión se responde el archivo completo
+        if_range = request.headers.get("if-range")
+        cabecera_rango = request.headers.get("range")
+        if if_range and (not etag or if_range.strip() != etag):
+            cabecera_rango = None
+        rango = _parsear_rango(cabecera_rango, tamano)
+
+        if rango is None:
+            if not self.es_referencia(referencia) or self.backend.nombre == "local":
+                return FileResponse(self.ruta_local(referencia), media_type=media_type, headers=cabeceras)
+            inicio, fin, estado = 0, tamano - 1, 200
+        elif rango == "invalido":
+            return Response(
+                status_code=416,
+                headers={**cabeceras, "Content-Range": f"bytes */{tamano}"},
+            )
+        else:
+            inicio, fin = rango
+            estado = 206
+            cabeceras["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+
+        cabeceras["Content-Length"] = str(fin - inicio + 1)
+        if self.es_referencia(referencia):
+            cuerpo = self.backend.leer(self._clave_de(referencia), inicio, fin)
+        else:
+            cuerpo = _leer_archivo(referencia, inicio, fin)
+        return StreamingResponse(cuerpo, status_code=estado, media_type=media_type, headers=cabeceras)
+
+
+def _coincide_etag(cabecera: Optional[str], etag: str) -> bool:
+    if not cabecera:
+        return False
+    if cabecera.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    candidatos = [c.strip() for c in cabecera.split(",")]
+    return any(c == etag or c == f"W/{etag}" for c in candidatos)
+
+
+def _leer_archivo(ruta: str, inicio: int, fin: int) -> Iterator[bytes]:
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        pendiente = fin - inicio + 1
+        while pendiente > 0:
+            bloque = f.read(min(TAMANO_BLOQUE, pendiente))
+            if not bloque:
+                break
+            pendiente -= len(bloque)
+            yield bloque
+
+
+def _parsear_rango(cabecera: Optional[str], tamano: int):
+    """
+    (inicio, fin) de un `Range: bytes=...` de un solo rango, "invalido" si
+    no se puede satisfacer, o None para responder el archivo completo.
+    """
+    if not cabecera or not cabecera.startswith("bytes=") or "," in cabecera:
+        return None
+    desde, _, hasta = cabecera[len("bytes="):].strip().partition("-")
+    try:
+        if desde == "":
+            sufijo = int(hasta)
+            if sufijo <= 0:
+                return "invalido"
+            return max(0, tamano - sufijo), tamano - 1
+        inicio = int(desde)
+        fin = int(hasta) if hasta else tamano - 1
+    except ValueError:
+        return None
+    if inicio >= tamano or fin < inicio:
+        return "invalido"
+    return inicio, min(fin, tamano - 1)
+
+
+def crear_backend() -> BackendAlmacen:
+    if settings.ALMACEN_AUDIO_BACKEND == "s3":
+        return BackendS3(
+            bucket=settings.ALMACEN_S3_BUCKET,
+            prefijo=settings.ALMACEN_S3_PREFIJO,
+            endpoint_url=settings.ALMACEN_S3_ENDPOINT,
+            region=settings.ALMACEN_S3_REGION,
+            cache_mb=settings.ALMACEN_S3_CACHE_MB,
+        )
+    return BackendLocal(settings.ALMACEN_AUDIO_DIR)
+
+
+almacen_audio = AlmacenAudio(
+    crear_backend(),
+    entrantes=os.path.join(settings.ALMACEN_AUDIO_DIR, ".entrantes"),
+)
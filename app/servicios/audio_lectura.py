@@ -0,0 +1,135 @@
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import settings
+from app.logs.logger import logger
+from app.modelos import ContenidoLectura
+from app.servicios.almacen_audio import almacen_audio
+from app.servicios.tts import servicio_tts
+
+
+class CacheMetadatosAudio:
+    """
+    Metadatos del audio de cada lectura (referencia, tamaño, ETag, tipo y
+    política de caché) en memoria del proceso, con TTL y tope de entradas.
+    Las reproducciones repetidas no consultan la BD ni leen el archivo.
+
+    Es por proceso: `invalidar` solo limpia la copia del worker que atiende
+    el cambio; en los demás la entrada vive hasta el TTL, así que este
+    debe ser corto (AUDIO_LECTURA_METADATOS_TTL).
+    """
+
+    def __init__(self, ttl_segundos: int, max_entradas: int) -> None:
+        self.ttl = ttl_segundos
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, contenido_id: int) -> Optional[Dict]:
+        with self._lock:
+            meta = self._entradas.get(contenido_id)
+            if meta and meta["expira"] > time.time():
+                self._entradas.move_to_end(contenido_id)
+                self.aciertos += 1
+                return meta
+            self.fallos += 1
+            return None
+
+    def guardar(self, contenido_id: int, meta: Dict) -> Dict:
+        meta["expira"] = time.time() + self.ttl
+        with self._lock:
+            self._entradas[contenido_id] = meta
+            self._entradas.move_to_end(contenido_id)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return meta
+
+    def invalidar(self, contenido_id: int) -> None:
+        with self._lock:
+            self._entradas.pop(contenido_id, None)
+
+    def estado(self) -> Dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+            }
+
+
+metadatos_audio_lectura = CacheMetadatosAudio(
+    ttl_segundos=settings.AUDIO_LECTURA_METADATOS_TTL,
+    max_entradas=settings.AUDIO_LECTURA_METADATOS_MAX,
+)
+
+
+def _media_type(referencia: str, por_defecto: str) -> str:
+    tipo, _ = mimetypes.guess_type(os.path.basename(referencia))
+    return tipo if tipo and tipo.startswith("audio/") else por_defecto
+
+
+def _vigente(meta: Dict) -> bool:
+    # Los blobs remotos no cambian bajo su clave; un archivo local pudo
+    # salir de la caché TTS o compactarse, y eso se ve con un stat
+    if almacen_audio.es_referencia(meta["referencia"]) and almacen_audio.backend.nombre != "local":
+        return True
+    return os.path.isfile(almacen_audio.ruta_local(meta["referencia"]))
+
+
+def etag_tts(ruta: str) -> str:
+    """El nombre en la caché TTS ya es el hash de motor, idioma y texto."""
+    return f'"{os.path.splitext(os.path.basename(ruta))[0]}"'
+
+
+def resolver_audio_lectura(db: Session, contenido_id: int) -> Optional[Dict]:
+    """
+    Audio a servir para la lectura: su grabación si la tiene, si no el
+    audio TTS. Devuelve None si la lectura no existe o no hay audio.
+    """
+    meta = metadatos_audio_lectura.obtener(contenido_id)
+    if meta and _vigente(meta):
+        return meta
+
+    contenido = db.get(ContenidoLectura, contenido_id)
+    if not contenido:
+        return None
+
+    if almacen_audio.existe(contenido.audio_url):
+        referencia = contenido.audio_url
+        origen = "grabacion"
+        etag = almacen_audio.etag(referencia)
+        media_type = _media_type(referencia, "audio/mpeg")
+        cache_control = settings.AUDIO_LECTURA_CACHE_CONTROL
+    else:
+        try:
+            referencia = servicio_tts.obtener(contenido.contenido)
+        except Exception as e:
+            logger.warning(f"TTS no disponible para la lectura {contenido_id}: {e}")
+            return None
+        origen = "tts"
+        etag = etag_tts(referencia)
+        media_type = servicio_tts.motor.media_type
+        # El TTS se reemplaza si el docente sube una grabación: revalidar siempre
+        cache_control = settings.AUDIO_TTS_CACHE_CONTROL
+
+    return metadatos_audio_lectura.guardar(
+        contenido_id,
+        {
+            "referencia": referencia,
+            "origen": origen,
+            "tamano": almacen_audio.tamano(referencia),
+            "etag": etag,
+            "media_type": media_type,
+            "cache_control": cache_control,
+        },
+    )
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from app.logs.logger import logger
+
+
+def hash_archivo(ruta: str, bloque: int = 1024 * 1024) -> str:
+    """SHA-256 de un archivo leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+
+class CacheDiscoLRU:
+    """
+    Caché en disco con expulsión LRU por tamaño total.
+
+    Cada entrada es un archivo `<dir>/<clave[:2]>/<clave><extension>`;
+    la fecha de modificación hace de marca de último uso.
+    """
+
+    def __init__(self, directorio: str, max_mb: int, extension: str = ".json") -> None:
+        self.directorio = directorio
+        self.max_bytes = max_mb * 1024 * 1024
+        self.extension = extension
+
+        self._lock = threading.Lock()
+        # Una sola expulsión a la vez: dos recorridos en paralelo borrarían
+        # de más y descontarían dos veces los mismos bytes
+        self._lock_expulsion = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+        os.makedirs(self.directorio, exist_ok=True)
+        self._total_bytes = sum(os.path.getsize(r) for r, _ in self._entradas())
+
+    # ================= RUTAS =================
+    def ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave[:2], f"{clave}{self.extension}")
+
+    def _entradas(self):
+        for raiz, _, archivos in os.walk(self.directorio):
+            for nombre in archivos:
+                # Los .tmp son escrituras en curso (de esta caché o de quien
+                # comparta el directorio): ni cuentan ni se expulsan
+                if nombre.endswith(self.extension) and not nombre.endswith(".tmp"):
+                    ruta = os.path.join(raiz, nombre)
+                    try:
+                        yield ruta, os.path.getmtime(ruta)
+                    except OSError:
+                        continue
+
+    # ================= LECTURA =================
+    def obtener_ruta(self, clave: str) -> Optional[str]:
+        ruta = self.ruta(clave)
+        try:
+            os.utime(ruta, None)
+        except OSError:
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        with self._lock:
+            self.aciertos += 1
+        return ruta
+
+    def leer_json(self, clave: str) -> Optional[Dict]:
+        ruta = self.obtener_ruta(clave)
+        if not ruta:
+            return None
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ================= ESCRITURA =================
+    def _publicar(self, clave: str, ruta_tmp: str) -> str:
+        destino = self.ruta(clave)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tamano = os.path.getsize(ruta_tmp)
+
+        with self._lock:
+            # Al sobrescribir una entrada solo cuenta la diferencia
+            try:
+                anterior = os.path.getsize(destino)
+            except OSError:
+                anterior = 0
+            os.replace(ruta_tmp, destino)
+            self._total_bytes += tamano - anterior
+            excedido = self._total_bytes > self.max_bytes
+        if excedido:
+            self._expulsar()
+        return destino
+
+    def guardar_json(self, clave: str, datos: Dict) -> str:
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+        return self._publicar(clave, tmp)
+
+    def guardar_array(self, clave: str, array) -> str:
+        """Guarda un array de numpy como `.npy` (se puede abrir con mmap)."""
+        import numpy as np
+
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        return self._publicar(clave, tmp)
+
+    def guardar_archivo(self, clave: str, origen: str) -> str:
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(origen, tmp)
+        return self._publicar(clave, tmp)
+
+    def _expulsar(self) -> None:
+        """Borra las entradas menos usadas hasta bajar al 90 % del límite."""
+        if not self._lock_expulsion.acquire(blocking=False):
+            # Ya hay otra expulsión en curso y deja la caché bajo el límite
+            return
+        try:
+            objetivo = int(self.max_bytes * 0.9)
+            with self._lock:
+                total = self._total_bytes
+
+            for ruta, _ in sorted(self._entradas(), key=lambda e: e[1]):
+                if total <= objetivo:
+                    break
+                try:
+                    tamano = os.path.getsize(ruta)
+                    os.remove(ruta)
+                except OSError:
+                    continue
+                total -= tamano
+                with self._lock:
+                    self._total_bytes -= tamano
+                    self.expulsiones += 1
+        finally:
+            self._lock_expulsion.release()
+        logger.info(f"🧹 Caché {self.directorio} recortada a {total / (1024**2):.1f} MB")
+
+    def estado(self) -> Dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "directorio": self.directorio,
+                "tamano_mb": round(self._total_bytes / (1024**2), 2),
+                "max_mb": round(self.max_bytes / (1024**2), 2),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+                "expulsiones": self.expulsiones,
+            }
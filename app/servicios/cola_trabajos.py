@@ -0,0 +1,188 @@
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import settings
+from app.config import SessionLocal
+from app.logs.logger import logger
+from app.modelos import TrabajoIA
+
+
+class ColaTrabajosIA:
+    """
+    Cola de trabajos IA respaldada por la tabla `trabajo_ia`.
+
+    Los hilos trabajadores reclaman filas con SELECT ... FOR UPDATE SKIP LOCKED,
+    así que varios procesos (workers de uvicorn o el script dedicado)
+    pueden consumir la misma cola sin pisarse.
+    """
+
+    def __init__(self) -> None:
+        self._manejadores: Dict[str, Callable[[Session, Dict], Dict]] = {}
+        self._hilos_por_tipo: Dict[str, int] = {}
+        self._hilos: List[threading.Thread] = []
+        self._detener = threading.Event()
+
+    def registrar(
+        self,
+        tipo: str,
+        manejador: Callable[[Session, Dict], Dict],
+        hilos: int = 1,
+    ) -> None:
+        self._manejadores[tipo] = manejador
+        self._hilos_por_tipo[tipo] = max(1, hilos)
+
+    # ================= PRODUCTOR =================
+    def encolar(
+        self,
+        db: Session,
+        tipo: str,
+        parametros: Dict,
+        usuario_id: Optional[int] = None,
+        estudiante_id: Optional[int] = None,
+    ) -> TrabajoIA:
+        trabajo = TrabajoIA(
+            tipo=tipo,
+            estado="pendiente",
+            usuario_id=usuario_id,
+            estudiante_id=estudiante_id,
+            parametros=parametros,
+            intentos=0,
+        )
+        db.add(trabajo)
+        db.commit()
+        db.refresh(trabajo)
+
+        logger.info(f"📨 Trabajo IA encolado | id={trabajo.id} | tipo={tipo}")
+        return trabajo
+
+    # ================= CONSUMIDOR =================
+    def _reclamar(self, db: Session, tipo: str) -> Optional[TrabajoIA]:
+        trabajo = (
+            db.query(TrabajoIA)
+            .filter(
+                TrabajoIA.tipo == tipo,
+                TrabajoIA.estado == "pendiente",
+            )
+            .order_by(TrabajoIA.id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not trabajo:
+            db.rollback()
+            return None
+
+        trabajo.estado = "procesando"
+        trabajo.intentos = (trabajo.intentos or 0) + 1
+        trabajo.fecha_inicio = datetime.now(timezone.utc)
+        db.commit()
+        return trabajo
+
+    def _recuperar_huerfanos(self) -> None:
+        """
+        Devuelve a 'pendiente' los trabajos que quedaron colgados. Los que ya
+        agotaron sus intentos pasan a 'error': si siempre tumban al worker,
+        reintentarlos sin fin bloquea la cola.
+        """
+        ahora = datetime.now(timezone.utc)
+        limite = ahora - timedelta(minutes=settings.TRABAJOS_IA_TIMEOUT_MINUTOS)
+        db = SessionLocal()
+        try:
+            colgados = db.query(TrabajoIA).filter(
+                TrabajoIA.estado == "procesando",
+                TrabajoIA.fecha_inicio < limite,
+            )
+            agotados = colgados.filter(
+                TrabajoIA.intentos >= settings.TRABAJOS_IA_MAX_INTENTOS
+            ).update(
+                {
+                    "estado": "error",
+                    "error": f"Sin terminar tras {settings.TRABAJOS_IA_MAX_INTENTOS} intentos",
+                    "fecha_fin": ahora,
+                },
+                synchronize_session=False,
+            )
+            total = colgados.update({"estado": "pendiente"}, synchronize_session=False)
+            db.commit()
+            if total:
+                logger.warning(f"♻️ Trabajos IA recuperados: {total}")
+            if agotados:
+                logger.error(f"❌ Trabajos IA descartados por intentos agotados: {agotados}")
+        except Exception:
+            db.rollback()
+            logger.exception("Error recuperando trabajos IA huérfanos")
+        finally:
+            db.close()
+
+    def _procesar_uno(self, tipo: str) -> bool:
+        db = SessionLocal()
+        try:
+            trabajo = self._reclamar(db, tipo)
+            if not trabajo:
+                return False
+
+            trabajo_id = trabajo.id
+            logger.info(f"⚙️ Procesando trabajo IA | id={trabajo_id} | tipo={tipo}")
+
+            try:
+                resultado = self._manejadores[tipo](db, dict(trabajo.parametros or {}))
+            except Exception as e:
+                db.rollback()
+                logger.error(f"❌ Trabajo IA fallido | id={trabajo_id} | {e}")
+                logger.debug(traceback.format_exc())
+                trabajo = db.get(TrabajoIA, trabajo_id)
+                trabajo.estado = "error"
+                trabajo.error = str(e)
+            else:
+                trabajo = db.get(TrabajoIA, trabajo_id)
+                trabajo.estado = "completado"
+                trabajo.resultado = resultado
+                trabajo.error = None
+
+            trabajo.fecha_fin = datetime.now(timezone.utc)
+            db.commit()
+            logger.info(f"✅ Trabajo IA terminado | id={trabajo_id} | estado={trabajo.estado}")
+            return True
+        except Exception:
+            db.rollback()
+            logger.exception(f"Error en el consumidor de trabajos IA ({tipo})")
+            return False
+        finally:
+            db.close()
+
+    def _bucle(self, tipo: str) -> None:
+        while not self._detener.is_set():
+            if not self._procesar_uno(tipo):
+                self._detener.wait(settings.TRABAJOS_IA_INTERVALO_SEGUNDOS)
+
+    def iniciar(self) -> None:
+        if self._hilos:
+            return
+
+        self._detener.clear()
+        self._recuperar_huerfanos()
+
+        for tipo, hilos in self._hilos_por_tipo.items():
+            for n in range(hilos):
+                hilo = threading.Thread(
+                    target=self._bucle,
+                    args=(tipo,),
+                    name=f"trabajos-ia-{tipo}-{n}",
+                    daemon=True,
+                )
+                hilo.start()
+                self._hilos.append(hilo)
+
+        logger.info(f"🧵 Cola de trabajos IA iniciada | hilos={len(self._hilos)}")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=timeout)
+        self._hilos = []
+
+
+cola_trabajos = ColaTrabajosIA()
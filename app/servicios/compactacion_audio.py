@@ -0,0 +1,263 @@
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import settings
+from app.config import SessionLocal
+from app.logs.logger import logger
+from app.modelos import EvaluacionLectura
+from app.servicios.almacen_audio import almacen_audio
+
+EXTENSIONES_COMPACTAS = (".ogg", ".opus")
+FRECUENCIA_OPUS = 16000
+
+# Tipos de grabación cuya ruta queda guardada en la BD
+MODELOS_REFERENCIA = {
+    "evaluacion": EvaluacionLectura,
+}
+
+
+def transcodificar_opus(origen: str, destino: str, kbps: int) -> None:
+    """Cualquier formato que lea PyAV a Ogg/Opus mono 16 kHz."""
+    import av
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=FRECUENCIA_OPUS)
+    with av.open(origen) as entrada, av.open(destino, "w", format="ogg") as salida:
+        stream = salida.add_stream("libopus", rate=FRECUENCIA_OPUS)
+        stream.bit_rate = kbps * 1000
+        stream.layout = "mono"
+
+        def escribir(frames):
+            for frame in frames:
+                for paquete in stream.encode(frame):
+                    salida.mux(paquete)
+
+        for frame in entrada.decode(audio=0):
+            escribir(resampler.resample(frame))
+        escribir(resampler.resample(None))
+        for paquete in stream.encode(None):
+            salida.mux(paquete)
+
+
+class GestorAlmacenamientoAudio:
+    """
+    Compacta las grabaciones del almacén de audio (y las que quedan en los
+    directorios anteriores al almacén):
+
+    - las que siguen dentro de la retención de su tipo se pasan a Opus de
+      bajo bitrate como un blob nuevo; la referencia en la BD se actualiza
+      y se confirma antes de borrar el original;
+    - las vencidas se borran y su referencia queda en NULL.
+
+    Un lock de archivo evita que dos procesos compacten a la vez.
+    """
+
+    def __init__(self) -> None:
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self.ultimo_reporte: Optional[Dict] = None
+
+    # ================= ARCHIVOS =================
+    def _entradas(self, tipo: str, politica: Dict) -> Iterator[Tuple[str, float, int]]:
+        yield from almacen_audio.listar(tipo)
+        if politica.get("directorio"):
+            yield from self._archivos(politica["directorio"])
+
+    def _archivos(self, directorio: str) -> Iterator[Tuple[str, float, int]]:
+        if not os.path.isdir(directorio):
+            return
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file() or entrada.name.endswith(".tmp"):
+                    continue
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue
+                yield entrada.path, info.st_mtime, info.st_size
+
+    def _actualizar_referencias(self, db: Session, tipo: str, ruta: str, nueva: Optional[str]) -> int:
+        modelo = MODELOS_REFERENCIA.get(tipo)
+        if modelo is None:
+            return 0
+        return (
+            db.query(modelo)
+            .filter(modelo.audio_url == ruta)
+            .update({modelo.audio_url: nueva}, synchronize_session=False)
+        )
+
+    @staticmethod
+    def _sin_tocar(ruta: str, modificado: float) -> bool:
+        """
+        Si el blob sigue con la fecha del listado. Una subida duplicada lo
+        toca (almacen_audio.guardar) y vuelve a contar su retención: entonces
+        ya no se borra ni se reemplaza.
+        """
+        actual = almacen_audio.modificado(ruta)
+        if actual is not None and actual <= modificado:
+            return True
+        logger.info(f"♻️ {ruta} se reutilizó durante la compactación, se conserva")
+        return False
+
+    def _eliminar(self, db: Session, tipo: str, ruta: str, modificado: float, simular: bool) -> bool:
+        if simular:
+            return True
+        if not self._sin_tocar(ruta, modificado):
+            return False
+        self._actualizar_referencias(db, tipo, ruta, None)
+        db.commit()
+        # Una subida que lo reutilizó después del UPDATE ya lo referencia
+        if self._sin_tocar(ruta, modificado):
+            almacen_audio.eliminar(ruta)
+        return True
+
+    def _compactar(self, db: Session, tipo: str, ruta: str, modificado: float, simular: bool) -> Optional[int]:
+        """
+        Devuelve el tamaño del archivo Opus resultante, o None si el original
+        se reutilizó mientras tanto y no se reemplazó.
+        """
+        fd, tmp = tempfile.mkstemp(dir=almacen_audio.entrantes, suffix=".ogg")
+        os.close(fd)
+        try:
+            transcodificar_opus(almacen_audio.ruta_local(ruta), tmp, settings.ALMACENAMIENTO_OPUS_KBPS)
+            tamano = os.path.getsize(tmp)
+            if simular:
+                return tamano
+            if not self._sin_tocar(ruta, modificado):
+                return None
+
+            # La retención se sigue contando desde la subida original
+            nueva = almacen_audio.guardar(tmp, tipo, extension=".ogg", modificado=modificado)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+        try:
+            self._actualizar_referencias(db, tipo, ruta, nueva)
+            db.commit()
+        except Exception:
+            db.rollback()
+            almacen_audio.eliminar(nueva)
+            raise
+
+        if self._sin_tocar(ruta, modificado):
+            almacen_audio.eliminar(ruta)
+        return tamano
+
+    # ================= EJECUCIÓN =================
+    def _compactar_tipo(self, db: Session, tipo: str, politica: Dict, simular: bool) -> Dict:
+        ahora = time.time()
+        vencimiento = ahora - politica["dias"] * 86400
+        edad_minima = ahora - settings.ALMACENAMIENTO_EDAD_MINIMA_HORAS * 3600
+
+        reporte = {
+            "retencion_dias": politica["dias"],
+            "compactados": 0,
+            "eliminados": 0,
+            "reutilizados": 0,
+            "errores": 0,
+            "bytes_antes": 0,
+            "bytes_despues": 0,
+        }
+
+        for ruta, modificado, tamano in list(self._entradas(tipo, politica)):
+            reporte["bytes_antes"] += tamano
+            try:
+                if modificado < vencimiento:
+                    if self._eliminar(db, tipo, ruta, modificado, simular):
+                        reporte["eliminados"] += 1
+                    else:
+                        reporte["reutilizados"] += 1
+                        reporte["bytes_despues"] += tamano
+                    continue
+
+                if modificado > edad_minima or ruta.endswith(EXTENSIONES_COMPACTAS):
+                    reporte["bytes_despues"] += tamano
+                    continue
+
+                compactado = self._compactar(db, tipo, ruta, modificado, simular)
+                if compactado is None:
+                    reporte["reutilizados"] += 1
+                    reporte["bytes_despues"] += tamano
+                else:
+                    reporte["bytes_despues"] += compactado
+                    reporte["compactados"] += 1
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"No se pudo compactar {ruta}: {e}")
+                reporte["errores"] += 1
+                reporte["bytes_despues"] += tamano
+
+        reporte["bytes_liberados"] = reporte["bytes_antes"] - reporte["bytes_despues"]
+        return reporte
+
+    def ejecutar(self, simular: bool = False) -> Dict:
+        """Una pasada completa. Con `simular` no se borra ni se modifica nada."""
+        os.makedirs("uploads", exist_ok=True)
+        with open(os.path.join("uploads", ".compactacion.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info("Compactación de audio ya en curso en otro proceso")
+                return {"en_curso": True}
+
+            inicio = time.time()
+            db = SessionLocal()
+            try:
+                tipos = {
+                    tipo: self._compactar_tipo(db, tipo, politica, simular)
+                    for tipo, politica in settings.ALMACENAMIENTO_RETENCION.items()
+                }
+            finally:
+                db.close()
+
+        liberados = sum(r["bytes_liberados"] for r in tipos.values())
+        reporte = {
+            "simulacion": simular,
+            "tipos": tipos,
+            "mb_liberados": round(liberados / (1024**2), 2),
+            "duracion_s": round(time.time() - inicio, 2),
+        }
+        self.ultimo_reporte = reporte
+
+        logger.info(
+            f"🗜️ Compactación de audio{' (simulada)' if simular else ''} | "
+            f"liberados={reporte['mb_liberados']} MB | "
+            + " | ".join(
+                f"{t}: {r['compactados']} a Opus, {r['eliminados']} vencidos"
+                for t, r in tipos.items()
+            )
+        )
+        return reporte
+
+    # ================= SEGUNDO PLANO =================
+    def _bucle(self) -> None:
+        intervalo = settings.ALMACENAMIENTO_INTERVALO_HORAS * 3600
+        while not self._detener.is_set():
+            try:
+                self.ejecutar()
+            except Exception:
+                logger.exception("Error en la compactación de audio")
+            self._detener.wait(intervalo)
+
+    def iniciar(self) -> None:
+        if self._hilo:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="compactacion-audio", daemon=True)
+        self._hilo.start()
+        logger.info("🗜️ Compactación de audio en segundo plano iniciada")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=timeout)
+        self._hilo = None
+
+
+gestor_almacenamiento = GestorAlmacenamientoAudio()
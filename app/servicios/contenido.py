@@ -4,12 +4,28 @@ from typing import List, Optional
 
 from app.modelos import ContenidoLectura, CategoriaLectura, AudioReferencia
 from app.esquemas.contenido import ContenidoLecturaCreate, ContenidoLecturaUpdate, CategoriaLecturaCreate, CategoriaLecturaUpdate, AudioReferenciaCreate
+from app.servicios.indice_lectura import actualizar_indice
+from app.servicios.audio_lectura import metadatos_audio_lectura
+from app.servicios.tts import servicio_tts
+
+def audio_contenido_actualizado(db_contenido: ContenidoLectura, campos) -> None:
+    """
+    Tras guardar una lectura: descarta los metadatos de su audio y agenda
+    el TTS del texto nuevo, así la primera reproducción no lo sintetiza.
+    """
+    if "contenido" in campos or "audio_url" in campos:
+        metadatos_audio_lectura.invalidar(db_contenido.id)
+    if "contenido" in campos:
+        servicio_tts.encolar_contenido(db_contenido)
 
 def crear_contenido_lectura(db: Session, contenido: ContenidoLecturaCreate):
     db_contenido = ContenidoLectura(**contenido.dict())
     db.add(db_contenido)
+    db.flush()
+    actualizar_indice(db, db_contenido)
     db.commit()
     db.refresh(db_contenido)
+    audio_contenido_actualizado(db_contenido, {"contenido"})
     return db_contenido
 
 def obtener_contenidos(db: Session, skip: int = 0, limit: int = 100, 
@@ -38,8 +54,12 @@ def actualizar_contenido(db: Session, contenido_id: int, contenido: ContenidoLec
     for field, value in update_data.items():
         setattr(db_contenido, field, value)
     
+    if "contenido" in update_data:
+        actualizar_indice(db, db_contenido)
+    
     db.commit()
     db.refresh(db_contenido)
+    audio_contenido_actualizado(db_contenido, update_data)
     return db_contenido
 
 def eliminar_contenido(db: Session, contenido_id: int):
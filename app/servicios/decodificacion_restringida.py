@@ -0,0 +1,233 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.esquemas.actividad_ia import GenerarActividadesIARequest
+
+# El vocabulario de T5 no tiene "{" ni "}": el modelo no puede escribir JSON
+# literal. La plantilla fija los rótulos de cada campo y deja al modelo solo
+# los valores; el JSON se arma después a partir de los tokens. Los rótulos
+# van en mayúscula porque su primer token cierra el valor anterior.
+FIJO = "fijo"
+LIBRE = "libre"
+ELEGIR = "elegir"
+
+# Tokens máximos por valor (acotan también max_new_tokens)
+LIMITES = {
+    "titulo": 16,
+    "descripcion": 24,
+    "pregunta": 32,
+    "opcion": 8,
+    "explicacion": 24,
+}
+LETRAS = ("A", "B", "C")
+
+Segmento = Tuple  # (tipo, datos, campo, indice_pregunta)
+
+
+def tipos_preguntas(opciones: GenerarActividadesIARequest) -> List[str]:
+    """Tipo de cada pregunta, alternando los que piden las opciones."""
+    tipos = []
+    if opciones.incluir_multiple_choice:
+        tipos.append("multiple_choice")
+    if opciones.incluir_verdadero_falso:
+        tipos.append("verdadero_falso")
+    tipos.append("texto_libre")
+    return [tipos[k % len(tipos)] for k in range(max(1, opciones.num_preguntas))]
+
+
+def construir_plantilla(tokenizer, opciones: GenerarActividadesIARequest) -> List[Segmento]:
+    def ids(texto: str) -> List[int]:
+        return tokenizer(texto, add_special_tokens=False).input_ids
+
+    def rotulo(texto: str) -> Segmento:
+        return (FIJO, ids(texto), None, None)
+
+    plantilla = [
+        rotulo("Titulo:"),
+        (LIBRE, LIMITES["titulo"], "titulo", None),
+        rotulo("Descripcion:"),
+        (LIBRE, LIMITES["descripcion"], "descripcion", None),
+    ]
+    for k, tipo in enumerate(tipos_preguntas(opciones)):
+        plantilla += [rotulo(f"Pregunta {k + 1}:"), (LIBRE, LIMITES["pregunta"], "pregunta", k)]
+
+        if tipo == "multiple_choice":
+            for letra in LETRAS:
+                plantilla += [rotulo(f"Opcion {letra}:"), (LIBRE, LIMITES["opcion"], "opciones", k)]
+            alternativas = [(ids(letra), letra) for letra in LETRAS]
+            plantilla += [rotulo("Correcta:"), (ELEGIR, alternativas, "respuesta_correcta", k)]
+        elif tipo == "verdadero_falso":
+            alternativas = [(ids(valor), valor) for valor in ("verdadero", "falso")]
+            plantilla += [rotulo("Correcta:"), (ELEGIR, alternativas, "respuesta_correcta", k)]
+
+        plantilla += [rotulo("Explicacion:"), (LIBRE, LIMITES["explicacion"], "explicacion", k)]
+    return plantilla
+
+
+def tokens_maximos(plantilla: List[Segmento]) -> int:
+    total = 1  # EOS
+    for tipo, datos, _, _ in plantilla:
+        if tipo == FIJO:
+            total += len(datos)
+        elif tipo == LIBRE:
+            total += datos
+        else:
+            total += max(len(alt) for alt, _ in datos)
+    return total
+
+
+# ================= MÁQUINA DE ESTADOS =================
+class EstadoPlantilla:
+    """Posición dentro de la plantilla según los tokens generados."""
+
+    def __init__(self, plantilla: List[Segmento], eos_id: int) -> None:
+        self.plantilla = plantilla
+        self.eos_id = eos_id
+        self.segmento = 0
+        self.tokens: List[int] = []
+        self.valores: List[Tuple[int, List[int]]] = []
+        self.terminado = False
+
+    def _terminador(self) -> int:
+        """Token que cierra el valor libre actual: el inicio del rótulo siguiente."""
+        siguiente = self.segmento + 1
+        if siguiente < len(self.plantilla):
+            return self.plantilla[siguiente][1][0]
+        return self.eos_id
+
+    def _cerrar(self) -> None:
+        self.valores.append((self.segmento, self.tokens))
+        self.segmento += 1
+        self.tokens = []
+
+    def permitidos(self) -> Tuple[Optional[List[int]], List[int]]:
+        """
+        (únicos tokens válidos, o None si el valor es libre; tokens prohibidos).
+        """
+        if self.terminado or self.segmento >= len(self.plantilla):
+            return [self.eos_id], []
+
+        tipo, datos, _, _ = self.plantilla[self.segmento]
+        n = len(self.tokens)
+        if tipo == FIJO:
+            return [datos[n]], []
+        if tipo == ELEGIR:
+            return sorted({alt[n] for alt, _ in datos if alt[:n] == self.tokens}), []
+
+        terminador = self._terminador()
+        if n >= datos:
+            return [terminador], []
+        # Un valor vacío no sirve: el rótulo siguiente espera al menos un token.
+        # EOS solo vale para cerrar el último valor
+        prohibidos = [terminador] if n == 0 else []
+        if terminador != self.eos_id:
+            prohibidos.append(self.eos_id)
+        return None, prohibidos
+
+    def avanzar(self, token: int) -> None:
+        if self.terminado:
+            return
+        if self.segmento >= len(self.plantilla):
+            self.terminado = token == self.eos_id
+            return
+
+        tipo, datos, _, _ = self.plantilla[self.segmento]
+        if tipo == LIBRE:
+            if self.tokens and token == self._terminador():
+                self._cerrar()
+                if self.segmento >= len(self.plantilla):
+                    self.terminado = True
+                    return
+                tipo, datos, _, _ = self.plantilla[self.segmento]
+            else:
+                self.tokens.append(token)
+                return
+
+        self.tokens.append(token)
+        if tipo == FIJO and len(self.tokens) == len(datos):
+            self.segmento += 1
+            self.tokens = []
+        elif tipo == ELEGIR and any(alt == self.tokens for alt, _ in datos):
+            self._cerrar()
+
+
+class ProcesadorPlantillaJSON:
+    """
+    Logits processor para `model.generate`: en cada paso deja solo los
+    tokens que respetan la plantilla de su fila y fuerza EOS al terminarla.
+    Sirve para greedy o muestreo (no para beam search, que reordena filas).
+    """
+
+    def __init__(self, plantillas: List[List[Segmento]], eos_id: int, prohibidos: List[int]) -> None:
+        self.plantillas = plantillas
+        self.eos_id = eos_id
+        self.prohibidos = list(prohibidos)
+        self._estados: List[Optional[EstadoPlantilla]] = [None] * len(plantillas)
+        self._vistos = [0] * len(plantillas)
+
+    def _estado(self, fila: int, generados) -> EstadoPlantilla:
+        # La primera posición es el token de inicio del decoder
+        nuevos = [int(t) for t in generados[1:]]
+        estado = self._estados[fila]
+        if estado is None or len(nuevos) < self._vistos[fila]:
+            estado = self._estados[fila] = EstadoPlantilla(self.plantillas[fila], self.eos_id)
+            self._vistos[fila] = 0
+        for token in nuevos[self._vistos[fila]:]:
+            estado.avanzar(token)
+        self._vistos[fila] = len(nuevos)
+        return estado
+
+    def __call__(self, input_ids, scores):
+        for fila in range(scores.shape[0]):
+            permitidos, prohibidos = self._estado(fila, input_ids[fila]).permitidos()
+            if permitidos is not None:
+                valores = scores[fila, permitidos]
+                scores[fila, :] = float("-inf")
+                scores[fila, permitidos] = valores
+            else:
+                scores[fila, self.prohibidos + prohibidos] = float("-inf")
+        return scores
+
+
+# ================= RESULTADO =================
+def extraer_actividad(tokenizer, plantilla: List[Segmento], ids, tipos: List[str]) -> Dict:
+    """Recorre los tokens generados con la plantilla y arma el JSON de la actividad."""
+    estado = EstadoPlantilla(plantilla, tokenizer.eos_token_id)
+    for token in [int(t) for t in ids[1:]]:
+        estado.avanzar(token)
+        if estado.terminado:
+            break
+    if not estado.terminado:
+        raise ValueError("La generación terminó antes de completar la actividad.")
+
+    def texto(tokens: List[int]) -> str:
+        return tokenizer.decode(tokens, skip_special_tokens=True).strip()
+
+    actividad = {"titulo": "", "descripcion": "", "preguntas": []}
+    for k, tipo in enumerate(tipos):
+        pregunta = {"tipo": tipo, "pregunta": "", "explicacion": ""}
+        if tipo == "verdadero_falso":
+            pregunta["opciones"] = ["verdadero", "falso"]
+        elif tipo == "multiple_choice":
+            pregunta["opciones"] = []
+        actividad["preguntas"].append(pregunta)
+
+    for segmento, tokens in estado.valores:
+        tipo, datos, campo, k = plantilla[segmento]
+        if k is None:
+            actividad[campo] = texto(tokens)
+            continue
+
+        pregunta = actividad["preguntas"][k]
+        if campo == "opciones":
+            pregunta["opciones"].append(texto(tokens))
+        elif tipo == ELEGIR:
+            pregunta[campo] = next(valor for alt, valor in datos if alt == tokens)
+        else:
+            pregunta[campo] = texto(tokens)
+
+    # En opción múltiple la respuesta es el texto de la opción elegida
+    for pregunta in actividad["preguntas"]:
+        if pregunta["tipo"] == "multiple_choice":
+            indice = LETRAS.index(pregunta["respuesta_correcta"])
+            pregunta["respuesta_correcta"] = pregunta["opciones"][indice]
+    return actividad
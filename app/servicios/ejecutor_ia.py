@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app import settings
+from app.logs.logger import logger
+
+
+class ColaIASaturadaError(Exception):
+    """Se lanza cuando la cola de IA alcanzó su límite de peticiones."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("La cola de análisis IA está llena, intenta más tarde.")
+        self.retry_after = retry_after
+
+
+class EjecutorIA:
+    """
+    Pool acotado de hilos para transcripción y puntuación.
+
+    Saca el trabajo pesado (Whisper + SQLAlchemy síncrono) del event loop
+    y limita cuántas peticiones pueden esperar turno.
+    """
+
+    def __init__(
+        self,
+        max_hilos: Optional[int] = None,
+        max_pendientes: Optional[int] = None,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        hilos_modelo = max(1, settings.WHISPER_CPU_THREADS)
+        if settings.WHISPER_LOTES_ACTIVO:
+            # Con micro-lotes los hilos solo esperan su lote: hacen falta
+            # tantos como audios quepan en un lote
+            por_defecto = settings.WHISPER_LOTE_MAX
+        else:
+            por_defecto = max(1, (os.cpu_count() or 1) // hilos_modelo)
+        self.max_hilos = max_hilos or settings.IA_EJECUTOR_HILOS or por_defecto
+        self.max_pendientes = max_pendientes or settings.IA_COLA_MAX_PENDIENTES
+        self.retry_after = retry_after or settings.IA_COLA_RETRY_AFTER_SEGUNDOS
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_hilos,
+            thread_name_prefix="ejecutor-ia",
+        )
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._en_ejecucion = 0
+        self._completadas = 0
+        self._rechazadas = 0
+        self._esperas = deque(maxlen=200)
+
+        logger.info(
+            f"Ejecutor IA listo | hilos={self.max_hilos} | "
+            f"max_pendientes={self.max_pendientes}"
+        )
+
+    async def ejecutar(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self._rechazadas += 1
+                raise ColaIASaturadaError(self.retry_after)
+            self._pendientes += 1
+
+        encolado = time.monotonic()
+
+        def _tarea():
+            with self._lock:
+                self._esperas.append(time.monotonic() - encolado)
+                self._en_ejecucion += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._en_ejecucion -= 1
+                    self._completadas += 1
+
+        futuro = self._pool.submit(_tarea)
+        # El cupo se libera cuando termina el hilo, no cuando deja de esperar
+        # la petición: si no, un cliente que corta deja trabajo sin contar
+        futuro.add_done_callback(self._liberar)
+        try:
+            return await asyncio.shield(asyncio.wrap_future(futuro))
+        except asyncio.CancelledError:
+            # Si ya arrancó, la tarea usa recursos de la petición (la sesión
+            # de BD): la petición no termina, ni la cierra, hasta que acabe
+            if not futuro.cancel():
+                await self._esperar(futuro)
+            raise
+
+    def _liberar(self, _futuro) -> None:
+        with self._lock:
+            self._pendientes -= 1
+
+    @staticmethod
+    async def _esperar(futuro) -> None:
+        while not futuro.done():
+            try:
+                await asyncio.shield(asyncio.wrap_future(futuro))
+            except asyncio.CancelledError:
+                continue
+            except Exception:
+                break
+
+    def estado(self) -> Dict:
+        with self._lock:
+            esperas = sorted(self._esperas)
+            en_cola = self._pendientes - self._en_ejecucion
+            return {
+                "hilos": self.max_hilos,
+                "max_pendientes": self.max_pendientes,
+                "en_cola": max(0, en_cola),
+                "en_ejecucion": self._en_ejecucion,
+                "completadas": self._completadas,
+                "rechazadas": self._rechazadas,
+                "espera_promedio_s": round(sum(esperas) / len(esperas), 3) if esperas else 0.0,
+                "espera_p95_s": round(esperas[min(len(esperas) - 1, int(len(esperas) * 0.95))], 3) if esperas else 0.0,
+            }
+
+
+ejecutor_ia = EjecutorIA()
@@ -3,6 +3,7 @@ from fastapi import HTTPException, status
 from typing import List, Optional
 
 from app.modelos import EjercicioPractica, ResultadoEjercicio, FragmentoPractica
+from app.servicios.tts import servicio_tts
 from app.esquemas.ejercicio import EjercicioPracticaCreate, EjercicioPracticaUpdate, ResultadoEjercicioCreate, FragmentoPracticaCreate
 
 def crear_ejercicio(db: Session, ejercicio: EjercicioPracticaCreate):
@@ -10,6 +11,7 @@ def crear_ejercicio(db: Session, ejercicio: EjercicioPracticaCreate):
     db.add(db_ejercicio)
     db.commit()
     db.refresh(db_ejercicio)
+    servicio_tts.encolar_palabras(db_ejercicio.palabras_objetivo or [])
     return db_ejercicio
 
 def obtener_ejercicios(db: Session, skip: int = 0, limit: int = 100, 
@@ -38,6 +40,8 @@ def actualizar_ejercicio(db: Session, ejercicio_id: int, ejercicio: EjercicioPra
     
     db.commit()
     db.refresh(db_ejercicio)
+    if "palabras_objetivo" in update_data:
+        servicio_tts.encolar_palabras(db_ejercicio.palabras_objetivo or [])
     return db_ejercicio
 
 def eliminar_ejercicio(db: Session, ejercicio_id: int):
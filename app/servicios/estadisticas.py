@@ -3,7 +3,7 @@ from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 from typing import List
 
-from app.modelos import Estudiante, Curso, EvaluacionLectura, ProgresoActividad, NivelEstudiante, RecompensaEstudiante
+from app.modelos import Estudiante, Curso, EvaluacionLectura, AnalisisIA, ProgresoActividad, NivelEstudiante, RecompensaEstudiante
 from app.esquemas.estadisticas import EstadisticasEstudiante, ProgresoCurso, ReporteEvaluacion, TendenciaProgreso, DashboardDocente
 
 def obtener_estadisticas_estudiante(db: Session, estudiante_id: int):
@@ -67,16 +67,23 @@ def obtener_progreso_cursos(db: Session, docente_id: int):
     return resultados
 
 def obtener_reportes_evaluacion(db: Session, estudiante_id: int, limite: int = 10):
-    evaluaciones = db.query(EvaluacionLectura).filter(
+    # Palabras por minuto del último análisis IA de cada evaluación, en la misma consulta
+    ultimo_analisis = db.query(
+        AnalisisIA.evaluacion_id,
+        func.max(AnalisisIA.id).label("analisis_id")
+    ).group_by(AnalisisIA.evaluacion_id).subquery()
+
+    filas = db.query(EvaluacionLectura, AnalisisIA.palabras_por_minuto).outerjoin(
+        ultimo_analisis, ultimo_analisis.c.evaluacion_id == EvaluacionLectura.id
+    ).outerjoin(
+        AnalisisIA, AnalisisIA.id == ultimo_analisis.c.analisis_id
+    ).filter(
         EvaluacionLectura.estudiante_id == estudiante_id
     ).order_by(EvaluacionLectura.fecha_evaluacion.desc()).limit(limite).all()
     
     reportes = []
-    for eval in evaluaciones:
-        # Obtener análisis IA para palabras por minuto
-        from app.modelos import AnalisisIA
-        analisis = db.query(AnalisisIA).filter(AnalisisIA.evaluacion_id == eval.id).first()
-        ppm = analisis.palabras_por_minuto if analisis else 0
+    for eval, ppm_analisis in filas:
+        ppm = ppm_analisis if ppm_analisis is not None else (eval.velocidad_lectura or 0)
         
         reportes.append(ReporteEvaluacion(
             evaluacion_id=eval.id,
@@ -0,0 +1,85 @@
+from typing import Dict, List, Optional
+
+# Silencio entre dos palabras que ya cuenta como pausa
+PAUSA_MINIMA_S = 0.3
+# Pausas que se marcan como problema de fluidez
+PAUSA_LARGA_S = 1.0
+
+
+def palabras_de_segmentos(segmentos) -> List[Dict]:
+    """Palabras con tiempos de los segmentos de Whisper (word_timestamps=True)."""
+    palabras = []
+    for seg in segmentos:
+        for w in getattr(seg, "words", None) or []:
+            texto = w.word.strip()
+            if not texto:
+                continue
+            palabras.append(
+                {
+                    "palabra": texto,
+                    "inicio": round(float(w.start), 3),
+                    "fin": round(float(w.end), 3),
+                    "probabilidad": round(float(w.probability), 3),
+                }
+            )
+    return palabras
+
+
+def _ritmo(inicios: List[float]) -> Optional[float]:
+    """
+    0-100 según lo parejo del intervalo entre comienzos de palabra
+    (100 = ritmo constante). Se usa el coeficiente de variación.
+    """
+    intervalos = [b - a for a, b in zip(inicios, inicios[1:]) if b > a]
+    if len(intervalos) < 2:
+        return None
+    media = sum(intervalos) / len(intervalos)
+    varianza = sum((x - media) ** 2 for x in intervalos) / len(intervalos)
+    cv = (varianza ** 0.5) / media
+    return round(max(0.0, 1.0 - cv) * 100, 1)
+
+
+def analizar_fluidez(palabras: List[Dict], duracion_total: float) -> Optional[Dict]:
+    """
+    Pausas, velocidad y ritmo a partir de los tiempos por palabra.
+
+    - palabras_por_minuto: sobre el tramo con voz (primera a última palabra),
+      sin los silencios del comienzo y del final de la grabación.
+    - tasa_articulacion: palabras por minuto descontando además las pausas.
+    """
+    if not palabras:
+        return None
+
+    pausas = []
+    for k in range(1, len(palabras)):
+        silencio = palabras[k]["inicio"] - palabras[k - 1]["fin"]
+        if silencio >= PAUSA_MINIMA_S:
+            pausas.append(
+                {
+                    "posicion": k,
+                    "antes_de": palabras[k]["palabra"],
+                    "inicio": palabras[k - 1]["fin"],
+                    "fin": palabras[k]["inicio"],
+                    "duracion": round(silencio, 3),
+                    "larga": silencio >= PAUSA_LARGA_S,
+                }
+            )
+
+    tiempo_habla = max(0.0, palabras[-1]["fin"] - palabras[0]["inicio"])
+    tiempo_pausas = sum(p["duracion"] for p in pausas)
+    tiempo_articulacion = max(0.0, tiempo_habla - tiempo_pausas)
+    n = len(palabras)
+
+    return {
+        "palabras": [
+            {**p, "duracion": round(p["fin"] - p["inicio"], 3)}
+            for p in palabras
+        ],
+        "pausas": pausas,
+        "duracion_audio": round(duracion_total, 3),
+        "tiempo_habla": round(tiempo_habla, 3),
+        "tiempo_pausas": round(tiempo_pausas, 3),
+        "palabras_por_minuto": round(n / (tiempo_habla / 60), 1) if tiempo_habla else 0.0,
+        "tasa_articulacion": round(n / (tiempo_articulacion / 60), 1) if tiempo_articulacion else 0.0,
+        "ritmo_score": _ritmo([p["inicio"] for p in palabras]),
+    }
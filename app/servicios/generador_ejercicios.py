@@ -4,6 +4,7 @@ from collections import defaultdict
 from sqlalchemy.orm import Session
 
 from app.modelos import EjercicioPractica, FragmentoPractica, Estudiante
+from app.servicios.tts import servicio_tts
 
 
 class GeneradorEjercicios:
@@ -100,6 +101,9 @@ class GeneradorEjercicios:
                 db.add(fragmento)
 
         db.commit()
+        servicio_tts.encolar_palabras(
+            p for palabras in palabras_por_tipo.values() for p in palabras
+        )
         return ejercicios_ids
     
 
@@ -1,36 +1,44 @@
+import hashlib
 import json
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
-import torch
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
 from sqlalchemy.orm import Session
 
+from app import settings
 from app.modelos import ContenidoLectura, Actividad, Pregunta
 from app.esquemas.actividad_ia import GenerarActividadesIARequest
 from app.logs.logger import logger
+from app.servicios.cache_disco import CacheDiscoLRU
+from app.servicios.decodificacion_restringida import (
+    ProcesadorPlantillaJSON,
+    construir_plantilla,
+    extraer_actividad,
+    tipos_preguntas,
+    tokens_maximos,
+)
+from app.servicios.registro_modelos import registro_modelos
 
+# Versión del prompt: cambiarla invalida las actividades guardadas en caché
+VERSION_PROMPT = 1
 
-# ================================
-# 📌 Cargar modelo IA liviano (FLAN-T5-SMALL)
-# ================================
-logger.info("Cargando modelo FLAN-T5-Small...")
+# Decodificaciones simultáneas en el proceso, sin importar el tipo de trabajo
+_limite_generacion = threading.BoundedSemaphore(max(1, settings.TRABAJOS_GENERACION_HILOS))
 
-tokenizer = AutoTokenizer.from_pretrained("google/flan-t5-small")
-model = AutoModelForSeq2SeqLM.from_pretrained(
-    "google/flan-t5-small",
-    torch_dtype=torch.float32
+cache_generacion = CacheDiscoLRU(
+    settings.CACHE_GENERACION_DIR,
+    max_mb=settings.CACHE_GENERACION_MAX_MB,
 )
-
-logger.info("Modelo cargado correctamente en CPU.")
+_lock_metricas = threading.Lock()
+_segundos_ahorrados = 0.0
 
 
 # ================================
 # 🚀 IA — Generación del JSON estructurado
 # ================================
-def generar_json_actividad_ia(texto: str, opciones: GenerarActividadesIARequest) -> dict:
-    """
-    Genera una actividad en formato JSON usando FLAN-T5.
-    """
-
-    prompt = f"""
+def _construir_prompt(texto: str, opciones: GenerarActividadesIARequest) -> str:
+    return f"""
 Genera una actividad educativa para niños de 7 a 10 años basada en el siguiente texto:
 
 TEXTO:
@@ -67,44 +75,189 @@ Devuelve ÚNICAMENTE un JSON válido con esta estructura:
 NO agregues texto adicional.
 """
 
-    inputs = tokenizer(prompt, return_tensors="pt")
 
-    output = model.generate(
-        **inputs,
-        max_new_tokens=600,
-        temperature=0.4
-    )
+def _construir_prompt_restringido(texto: str, opciones: GenerarActividadesIARequest) -> str:
+    # La estructura la impone la plantilla al decodificar: el prompt solo
+    # describe el contenido y nombra los rótulos que el modelo va a ver
+    return f"""
+Lee el texto y escribe una actividad de comprensión lectora para niños de 7 a 10 años.
 
-    result = tokenizer.decode(output[0], skip_special_tokens=True)
+TEXTO:
+\"""{texto}\"""
+
+Escribe Titulo, Descripcion y {max(1, opciones.num_preguntas)} preguntas sobre el texto.
+Cada pregunta lleva su respuesta Correcta y una Explicacion corta.
+"""
 
-    # Extraer JSON
+
+def _extraer_json(result: str) -> dict:
     try:
         json_start = result.index("{")
         json_end = result.rindex("}") + 1
         json_str = result[json_start:json_end]
-        final_json = json.loads(json_str)
+        return json.loads(json_str)
 
     except Exception as e:
         logger.error(f"❌ Error procesando JSON generado: {e}")
         logger.error(f"Texto recibido: {result}")
         raise ValueError("La IA devolvió un JSON inválido.")
 
-    return final_json
+
+# ================================
+# 💾 Caché de actividades generadas
+# ================================
+def _clave_generacion(texto: str, opciones: GenerarActividadesIARequest) -> str:
+    # El texto forma parte de la clave: si la lectura cambia, la entrada
+    # anterior deja de usarse y la LRU la termina expulsando
+    parametros = {
+        "modelo": settings.GENERADOR_MODELO,
+        "compute_type": settings.GENERADOR_COMPUTE_TYPE,
+        "prompt": VERSION_PROMPT,
+        "restringida": settings.GENERADOR_DECODIFICACION_RESTRINGIDA,
+        "opciones": opciones.model_dump(exclude={"regenerar"}),
+    }
+    firma = json.dumps(parametros, sort_keys=True)
+    return hashlib.sha256(f"{texto}|{firma}".encode("utf-8")).hexdigest()
+
+
+def estado_cache_generacion() -> Dict:
+    with _lock_metricas:
+        ahorrados = _segundos_ahorrados
+    return {**cache_generacion.estado(), "segundos_ahorrados": round(ahorrados, 2)}
+
+
+def _desde_cache(clave: str) -> Optional[Dict]:
+    global _segundos_ahorrados
+
+    guardado = cache_generacion.leer_json(clave)
+    if not guardado:
+        return None
+    with _lock_metricas:
+        _segundos_ahorrados += guardado.get("segundos", 0.0)
+    return {"json": guardado["json"], "cache": True}
+
+
+def generar_json_actividades_lote(
+    solicitudes: List[Tuple[str, GenerarActividadesIARequest]]
+) -> List[Dict]:
+    """
+    Genera varias actividades con llamadas `generate` en lote (con padding).
+    Devuelve, en el mismo orden, `{"json": ...}` o `{"error": "..."}` por
+    cada (texto, opciones).
+
+    Las actividades ya generadas para el mismo texto y opciones salen de la
+    caché sin pasar por el modelo, salvo que las opciones pidan `regenerar`.
+    """
+    resultados: List[Dict] = [{} for _ in solicitudes]
+    claves: List[str] = [None] * len(solicitudes)
+    pendientes: List[int] = []
+
+    for i, (texto, opciones) in enumerate(solicitudes):
+        if settings.CACHE_GENERACION_ACTIVO:
+            claves[i] = _clave_generacion(texto, opciones)
+            guardado = None if opciones.regenerar else _desde_cache(claves[i])
+            if guardado:
+                resultados[i] = guardado
+                continue
+        pendientes.append(i)
+
+    if len(pendientes) < len(solicitudes):
+        logger.info(
+            f"💾 Actividades desde caché: {len(solicitudes) - len(pendientes)} "
+            f"de {len(solicitudes)}"
+        )
+    if not pendientes:
+        return resultados
+
+    # FLAN-T5-Small: se carga una vez por proceso (precarga o primer uso)
+    tokenizer, model = registro_modelos.obtener_generador()
+    restringida = settings.GENERADOR_DECODIFICACION_RESTRINGIDA
+    construir = _construir_prompt_restringido if restringida else _construir_prompt
+    prompts = {i: construir(*solicitudes[i]) for i in pendientes}
+
+    # Ordenar por longitud deja prompts parecidos en el mismo lote: menos padding
+    orden = sorted(pendientes, key=lambda i: len(prompts[i]))
+    tamano_lote = max(1, settings.GENERADOR_LOTE_MAX)
+
+    for desde in range(0, len(orden), tamano_lote):
+        indices = orden[desde:desde + tamano_lote]
+        inicio = time.time()
+        try:
+            inputs = tokenizer(
+                [prompts[i] for i in indices],
+                return_tensors="pt",
+                padding=True,
+            )
+            parametros = {"max_new_tokens": 600, "temperature": 0.4}
+            if restringida:
+                from transformers import LogitsProcessorList
+
+                # Cada fila sigue la plantilla de sus opciones y corta con EOS
+                # al completarla: la salida siempre es una actividad completa
+                plantillas = [construir_plantilla(tokenizer, solicitudes[i][1]) for i in indices]
+                parametros["max_new_tokens"] = max(tokens_maximos(p) for p in plantillas)
+                parametros["logits_processor"] = LogitsProcessorList([
+                    ProcesadorPlantillaJSON(
+                        plantillas,
+                        tokenizer.eos_token_id,
+                        prohibidos=[tokenizer.pad_token_id, tokenizer.unk_token_id],
+                    )
+                ])
+            with _limite_generacion:
+                output = model.generate(**inputs, **parametros)
+        except Exception as e:
+            logger.error(f"❌ Error en el lote de generación: {e}")
+            for i in indices:
+                resultados[i] = {"error": f"Error al generar: {e}"}
+            continue
+
+        # El costo del lote se reparte entre sus prompts para las métricas
+        segundos = (time.time() - inicio) / len(indices)
+        for fila, i in enumerate(indices):
+            try:
+                if restringida:
+                    json_data = extraer_actividad(
+                        tokenizer, plantillas[fila], output[fila], tipos_preguntas(solicitudes[i][1])
+                    )
+                else:
+                    json_data = _extraer_json(tokenizer.decode(output[fila], skip_special_tokens=True))
+            except ValueError as e:
+                resultados[i] = {"error": str(e)}
+                continue
+
+            resultados[i] = {"json": json_data}
+            if claves[i]:
+                cache_generacion.guardar_json(
+                    claves[i], {"json": json_data, "segundos": segundos}
+                )
+
+        logger.info(
+            f"🧠 Lote de generación | prompts={len(indices)} | "
+            f"tiempo={time.time() - inicio:.2f}s"
+        )
+
+    return resultados
+
+
+def generar_json_actividad_ia(texto: str, opciones: GenerarActividadesIARequest) -> dict:
+    """
+    Genera una actividad en formato JSON usando FLAN-T5.
+    """
+    resultado = generar_json_actividades_lote([(texto, opciones)])[0]
+    if "error" in resultado:
+        raise ValueError(resultado["error"])
+    return resultado["json"]
 
 
 # ================================
 # 🧩 Crear Actividad y Preguntas en BD
 # ================================
-def generar_actividad_ia_para_contenido(
+def _crear_actividad(
     db: Session,
     contenido: ContenidoLectura,
-    opciones: GenerarActividadesIARequest
-):
-    logger.info(f"Generando actividades IA para contenido_id={contenido.id}")
-
-    texto = contenido.contenido
-    json_data = generar_json_actividad_ia(texto, opciones)
-
+    opciones: GenerarActividadesIARequest,
+    json_data: dict
+) -> Actividad:
     # Crear la actividad
     actividad = Actividad(
         contenido_id=contenido.id,
@@ -141,6 +294,99 @@ def generar_actividad_ia_para_contenido(
     db.refresh(actividad)
 
     logger.info(f"Actividad IA creada con {len(actividad.preguntas)} preguntas.")
+    return actividad
+
+
+def generar_actividad_ia_para_contenido(
+    db: Session,
+    contenido: ContenidoLectura,
+    opciones: GenerarActividadesIARequest
+):
+    logger.info(f"Generando actividades IA para contenido_id={contenido.id}")
+
+    texto = contenido.contenido
+    json_data = generar_json_actividad_ia(texto, opciones)
 
     # 🔥🔥🔥 IMPORTANTE: devolver SOLO actividad (NO tupla)
-    return actividad
+    return _crear_actividad(db, contenido, opciones, json_data)
+
+
+def generar_actividades_para_contenidos(
+    db: Session,
+    contenidos: List[ContenidoLectura],
+    opciones: GenerarActividadesIARequest
+) -> List[Dict]:
+    """
+    Una actividad por lectura, generadas en lote. Cada elemento del
+    resultado trae `actividad_id` o `error`: una lectura que falla no
+    impide guardar las demás.
+    """
+    logger.info(f"Generando actividades IA en lote para {len(contenidos)} lecturas")
+    generados = generar_json_actividades_lote([(c.contenido, opciones) for c in contenidos])
+
+    resultados = []
+    for contenido, generado in zip(contenidos, generados):
+        item = {"contenido_id": contenido.id}
+        if "error" in generado:
+            item["error"] = generado["error"]
+        else:
+            try:
+                actividad = _crear_actividad(db, contenido, opciones, generado["json"])
+                item["actividad_id"] = actividad.id
+                item["total_preguntas"] = len(actividad.preguntas)
+            except Exception as e:
+                db.rollback()
+                item["error"] = f"JSON generado incompleto: {e}"
+        resultados.append(item)
+    return resultados
+
+
+# ================================
+# ⚙️ Trabajo en segundo plano (cola trabajo_ia)
+# ================================
+def procesar_trabajo_generacion(db: Session, parametros: dict) -> dict:
+    """Manejador del tipo de trabajo `generar_actividades`."""
+    contenido = (
+        db.query(ContenidoLectura)
+        .filter(
+            ContenidoLectura.id == parametros["contenido_id"],
+            ContenidoLectura.activo == True
+        )
+        .first()
+    )
+    if not contenido:
+        raise ValueError("Contenido de lectura no encontrado")
+
+    opciones = GenerarActividadesIARequest(**parametros.get("opciones", {}))
+    actividad = generar_actividad_ia_para_contenido(db, contenido, opciones)
+
+    return {
+        "contenido_id": contenido.id,
+        "actividad_id": actividad.id,
+        "total_preguntas": len(actividad.preguntas),
+    }
+
+
+def procesar_trabajo_generacion_curso(db: Session, parametros: dict) -> dict:
+    """Manejador del tipo de trabajo `generar_actividades_curso`."""
+    contenidos = (
+        db.query(ContenidoLectura)
+        .filter(
+            ContenidoLectura.curso_id == parametros["curso_id"],
+            ContenidoLectura.activo == True
+        )
+        .order_by(ContenidoLectura.id)
+        .all()
+    )
+    if not contenidos:
+        raise ValueError("El curso no tiene lecturas activas")
+
+    opciones = GenerarActividadesIARequest(**parametros.get("opciones", {}))
+    resultados = generar_actividades_para_contenidos(db, contenidos, opciones)
+
+    return {
+        "curso_id": parametros["curso_id"],
+        "generadas": sum(1 for r in resultados if "actividad_id" in r),
+        "errores": sum(1 for r in resultados if "error" in r),
+        "lecturas": resultados,
+    }
@@ -1,12 +1,13 @@
-import re
+import hashlib
+import json
+import math
 import time
-import unicodedata
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from difflib import SequenceMatcher
 from sqlalchemy.orm import Session
-from faster_whisper import WhisperModel
 
+from app import settings
 from app.logs.logger import logger
 from app.modelos import (
     ContenidoLectura,
@@ -17,35 +18,85 @@ from app.modelos import (
     Estudiante,
     IntentoLectura,
 )
+from app.servicios.registro_modelos import registro_modelos
+from app.servicios.perfiles_asr import obtener_perfil, opciones_decodificacion
+from app.servicios.alineacion import IGUAL, INSERCION, SUSTITUCION, alinear
+from app.servicios.cache_disco import CacheDiscoLRU
+from app.servicios.almacen_audio import almacen_audio
+from app.servicios.preprocesado_audio import (
+    FRECUENCIA,
+    VERSION as VERSION_PREPROCESADO,
+    preparar_audio_con_info,
+)
+from app.servicios.fluidez import analizar_fluidez, palabras_de_segmentos
+from app.servicios.indice_lectura import (
+    es_puntuacion,
+    normalizar_texto,
+    obtener_tokens_referencia,
+    tokenizar_texto,
+)
+
+
+cache_transcripcion = CacheDiscoLRU(
+    settings.CACHE_TRANSCRIPCION_DIR,
+    max_mb=settings.CACHE_TRANSCRIPCION_MAX_MB,
+)
 
 
 class ServicioAnalisisLectura:
     TOKEN_REGEX = r"[A-Za-zÁÉÍÓÚÜáéíóúüñÑ0-9]+|[¿\?¡!.,;:]"
 
-    def __init__(self, modelo: str = "small") -> None:
-        logger.info(f"Cargando modelo Faster-Whisper '{modelo}' (modo niños)...")
-        self.model = WhisperModel(modelo, device="cpu", compute_type="int8")
-        logger.info("Modelo Faster-Whisper cargado correctamente.")
+    # Opciones comunes; beam_size / best_of / temperature vienen del perfil ASR
+    OPCIONES_TRANSCRIPCION = {
+        "language": "es",
+        "vad_filter": True,
+        "vad_parameters": {
+            "min_silence_duration_ms": 300,
+            "speech_pad_ms": 200,
+        },
+        "condition_on_previous_text": False,
+    }
+    # Whisper admite 448 tokens entre prompt y salida; faster-whisper recorta
+    # el prompt a la mitad, y el resto (menos los tokens de inicio) queda
+    # para max_new_tokens
+    MAX_TOKENS_RESTRINGIDO = 448 // 2 - 8
+
+    def __init__(self, modelo: Optional[str] = None) -> None:
+        # Fuerza un modelo para todos los perfiles (benchmarks, pruebas)
+        self.modelo_forzado = modelo
+
+    # ================= PERFILES ASR =================
+    def perfil(self, nombre: Optional[str] = None) -> Dict:
+        perfil = obtener_perfil(nombre)
+        if self.modelo_forzado:
+            perfil["modelo"] = self.modelo_forzado
+        return perfil
+
+    # El modelo se comparte entre todas las instancias del proceso y se
+    # pide al registro recién al usarlo (crear el servicio no carga nada)
+    def modelo_whisper(self, perfil: Dict):
+        return registro_modelos.obtener_whisper_perfil(perfil)
+
+    def _planificador(self, perfil: Dict):
+        # Con servidor de modelos no hay acceso al encoder: sin micro-lotes
+        if not settings.WHISPER_LOTES_ACTIVO or settings.MODELOS_SOCKET:
+            return None
+        self.modelo_whisper(perfil)
+        return registro_modelos.obtener_planificador(
+            perfil["modelo"],
+            perfil["compute_type"],
+            beam_size=perfil["beam_size"],
+        )
 
     # ================= UTILIDADES TEXTO =================
     def _normalizar_texto(self, texto: str) -> str:
-        if not texto:
-            return ""
-        texto = texto.replace("\n", " ").strip().lower()
-        texto = unicodedata.normalize("NFD", texto)
-        texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
-        texto = re.sub(r"\s+", " ", texto)
-        return texto
+        return normalizar_texto(texto)
 
     def _tokenizar(self, texto: str) -> List[str]:
-        return re.findall(
-            self.TOKEN_REGEX,
-            self._normalizar_texto(texto),
-            flags=re.UNICODE,
-        )
+        return tokenizar_texto(texto)
 
     def _es_puntuacion(self, token: str) -> bool:
-        return bool(re.fullmatch(r"[¿\?¡!.,;:]", token or ""))
+        return es_puntuacion(token)
 
     def _limpiar_repeticiones(self, tokens: List[str]) -> List[str]:
         resultado = []
@@ -59,37 +110,226 @@ class ServicioAnalisisLectura:
             return 0.0
         return SequenceMatcher(None, a, b).ratio()
 
+    def _tokens_con_tiempos(self, palabras: List[Dict]):
+        """
+        Tokens leídos a partir de las palabras con tiempos de Whisper, con el
+        mismo criterio que `_tokenizar` + `_limpiar_repeticiones`. Devuelve
+        los tokens y, para cada uno, la palabra de la que salió.
+        """
+        tokens, origen = [], []
+        for palabra in palabras:
+            for t in self._tokenizar(palabra["palabra"]):
+                if tokens and tokens[-1] == t:
+                    continue
+                tokens.append(t)
+                origen.append(palabra)
+        return tokens, origen
+
     # ================= TRANSCRIPCIÓN =================
-    def _transcribir_audio(self, audio_path: str) -> Dict:
+    def _audio_entrada(self, audio_path: str, hash_audio: str) -> Tuple[object, Optional[Dict]]:
+        """
+        Array ya decodificado (desde la caché .npy) o la ruta local, según
+        la config, y la info del recorte (None sin preprocesado).
+        `audio_path` puede ser una referencia del almacén.
+        """
+        if not settings.PREPROCESADO_AUDIO_ACTIVO:
+            return almacen_audio.ruta_local(audio_path), None
+        return preparar_audio_con_info(audio_path, hash_audio)
+
+    @staticmethod
+    def _a_audio_original(resultado: Dict, info: Optional[Dict]) -> Dict:
+        """
+        Lleva tiempos y duración del audio recortado al archivo original, que
+        es el que se reproduce desde `audio_url`.
+        """
+        if not info:
+            return resultado
+        desfase = info["recorte_inicio"]
+        for palabra in resultado.get("palabras") or []:
+            palabra["inicio"] = round(palabra["inicio"] + desfase, 3)
+            palabra["fin"] = round(palabra["fin"] + desfase, 3)
+        resultado["duracion"] = info["duracion_original"]
+        return resultado
+
+    def _clave_cache(self, hash_audio: str, perfil: Dict, opciones: Optional[Dict] = None) -> str:
+        parametros = {
+            "modelo": perfil["modelo"],
+            "compute_type": perfil["compute_type"],
+            "modo": "lotes" if settings.WHISPER_LOTES_ACTIVO and not settings.MODELOS_SOCKET else "normal",
+            "opciones": opciones or opciones_decodificacion(perfil, self.OPCIONES_TRANSCRIPCION),
+            "preprocesado": VERSION_PREPROCESADO if settings.PREPROCESADO_AUDIO_ACTIVO else None,
+        }
+        firma = json.dumps(parametros, sort_keys=True)
+        return hashlib.sha256(f"{hash_audio}|{firma}".encode("utf-8")).hexdigest()
+
+    def _transcribir_audio(
+        self,
+        audio_path: str,
+        hash_audio: Optional[str] = None,
+        perfil: Optional[str] = None,
+        con_tiempos: bool = False,
+    ) -> Dict:
+        """
+        Con `con_tiempos` se piden los tiempos por palabra en la misma
+        decodificación (Whisper alinea con la atención cruzada al terminar
+        cada segmento) y el resultado trae además `palabras`.
+        """
         inicio = time.time()
+        perfil = self.perfil(perfil)
+        opciones = opciones_decodificacion(perfil, self.OPCIONES_TRANSCRIPCION)
+        if con_tiempos:
+            opciones["word_timestamps"] = True
+        if not hash_audio and (settings.CACHE_TRANSCRIPCION_ACTIVO or settings.PREPROCESADO_AUDIO_ACTIVO):
+            hash_audio = almacen_audio.hash_audio(audio_path)
+
+        clave = None
+        if settings.CACHE_TRANSCRIPCION_ACTIVO:
+            clave = self._clave_cache(hash_audio, perfil, opciones)
+            guardado = cache_transcripcion.leer_json(clave)
+            if guardado:
+                logger.info(f"Transcripción desde caché | duración={guardado['duracion']:.2f}s")
+                return {**guardado, "tiempo_procesamiento": time.time() - inicio}
+
+        audio, info_audio = self._audio_entrada(audio_path, hash_audio)
+
+        resultado = None
+        # Los micro-lotes no devuelven tiempos por palabra
+        planificador = None if con_tiempos else self._planificador(perfil)
+        if planificador:
+            resultado = planificador.transcribir(audio)
+
+        if resultado is None:
+            segments, info = self.modelo_whisper(perfil).transcribe(audio, **opciones)
+            segments = list(segments)
+            resultado = {
+                "texto": "".join(seg.text for seg in segments).strip(),
+                "duracion": float(getattr(info, "duration", 0.0) or 0.0),
+            }
+            if con_tiempos:
+                resultado["palabras"] = palabras_de_segmentos(segments)
+
+        self._a_audio_original(resultado, info_audio)
+        resultado["modelo"] = f"whisper-{perfil['modelo']} ({perfil['compute_type']})"
 
-        segments, info = self.model.transcribe(
-            audio_path,
-            language="es",
-            beam_size=1,
-            best_of=1,
-            temperature=0.4,
-            vad_filter=True,
-            vad_parameters={
-                "min_silence_duration_ms": 300,
-                "speech_pad_ms": 200,
-            },
-            condition_on_previous_text=False,
+        logger.info(
+            f"Transcripción completada | perfil={perfil['nombre']} | "
+            f"duración={resultado['duracion']:.2f}s | tiempo={time.time() - inicio:.2f}s"
         )
 
+        if clave:
+            cache_transcripcion.guardar_json(clave, resultado)
+
+        resultado["tiempo_procesamiento"] = time.time() - inicio
+        return resultado
+
+    def _transcribir_restringido(
+        self,
+        audio_path: str,
+        texto_esperado: str,
+        hash_audio: Optional[str] = None,
+        palabras_objetivo: Optional[List[str]] = None,
+    ) -> Optional[Dict]:
+        """
+        Camino rápido para fragmentos de práctica: las palabras objetivo van
+        como pistas de vocabulario en el prompt, decodificación greedy sin
+        reintentos de temperatura, sin timestamps y con un tope de tokens
+        acorde a lo que hay que leer. Devuelve None si la confianza es baja
+        o la salida parece un eco del prompt (hay que decodificar completo).
+
+        No se usa la oración como prompt: Whisper tiende a repetirla y la
+        confianza de esa repetición es alta aunque el estudiante lea mal.
+        """
+        inicio = time.time()
+        tokens = 8 + 4 * len(texto_esperado.split())
+        if tokens > self.MAX_TOKENS_RESTRINGIDO:
+            logger.info(f"Práctica: texto largo para el modo restringido ({tokens} tokens), se decodifica completo")
+            return None
+
+        perfil = self.perfil(settings.ASR_PERFIL_PRACTICA)
+        pistas = ", ".join(dict.fromkeys(p.strip() for p in palabras_objetivo or [] if p.strip()))
+        opciones = {
+            **self.OPCIONES_TRANSCRIPCION,
+            "beam_size": 1,
+            "best_of": 1,
+            "temperature": 0.0,
+            "initial_prompt": pistas or None,
+            "without_timestamps": True,
+            "max_new_tokens": tokens,
+        }
+
+        if not hash_audio and (settings.CACHE_TRANSCRIPCION_ACTIVO or settings.PREPROCESADO_AUDIO_ACTIVO):
+            hash_audio = almacen_audio.hash_audio(audio_path)
+
+        clave = None
+        if settings.CACHE_TRANSCRIPCION_ACTIVO:
+            clave = self._clave_cache(hash_audio, perfil, opciones)
+            guardado = cache_transcripcion.leer_json(clave)
+            if guardado:
+                return {**guardado, "tiempo_procesamiento": time.time() - inicio}
+
+        audio, info_audio = self._audio_entrada(audio_path, hash_audio)
+        try:
+            segments, info = self.modelo_whisper(perfil).transcribe(audio, **opciones)
+            segments = list(segments)
+        except ValueError as e:
+            # prompt + max_new_tokens por encima del max_length del modelo
+            logger.warning(f"Práctica: el modo restringido no se pudo aplicar ({e}), se decodifica completo")
+            return None
         texto = "".join(seg.text for seg in segments).strip()
-        duracion = float(getattr(info, "duration", 0.0) or 0.0)
+
+        logprob = sum(seg.avg_logprob for seg in segments) / len(segments) if segments else float("-inf")
+        sin_voz = max((seg.no_speech_prob for seg in segments), default=1.0)
+        confianza = math.exp(logprob)
+
+        if not texto or confianza < settings.PRACTICA_CONFIANZA_MINIMA or sin_voz > 0.6:
+            logger.info(
+                f"Práctica: confianza baja en modo restringido ({confianza:.2f}), "
+                f"se decodifica completo"
+            )
+            return None
+
+        segundos_voz = (
+            audio.shape[0] / FRECUENCIA if hasattr(audio, "shape")
+            else float(getattr(info, "duration", 0.0) or 0.0)
+        )
+        if self._es_eco(texto, [pistas, texto_esperado], sin_voz, segundos_voz):
+            logger.info(
+                f"Práctica: la salida repite el prompt (no_speech={sin_voz:.2f}, "
+                f"voz={segundos_voz:.2f}s), se decodifica completo"
+            )
+            return None
+
+        resultado = {
+            "texto": texto,
+            "duracion": float(getattr(info, "duration", 0.0) or 0.0),
+            "confianza": round(confianza, 3),
+        }
+        self._a_audio_original(resultado, info_audio)
+        if clave:
+            cache_transcripcion.guardar_json(clave, resultado)
 
         logger.info(
-            f"Transcripción completada | duración={duracion:.2f}s | "
+            f"Transcripción restringida | confianza={confianza:.2f} | "
             f"tiempo={time.time() - inicio:.2f}s"
         )
+        resultado["tiempo_procesamiento"] = time.time() - inicio
+        return resultado
 
-        return {
-            "texto": texto,
-            "duracion": duracion,
-            "tiempo_procesamiento": time.time() - inicio,
-        }
+    def _es_eco(self, texto: str, prompts: List[str], sin_voz: float, segundos_voz: float) -> bool:
+        """
+        La salida coincide palabra por palabra con el prompt (o el texto
+        esperado) y el audio no la respalda: mucha probabilidad de silencio
+        o menos voz de la que hace falta para decir esas palabras.
+        """
+        palabras = [t for t in self._tokenizar(texto) if not es_puntuacion(t)]
+        repetidos = [
+            [t for t in self._tokenizar(prompt) if not es_puntuacion(t)] for prompt in prompts if prompt
+        ]
+        if not palabras or palabras not in repetidos:
+            return False
+
+        cobertura = segundos_voz / (len(palabras) * settings.PRACTICA_SEGUNDOS_MIN_PALABRA)
+        return sin_voz > settings.PRACTICA_ECO_SIN_VOZ or cobertura < 1.0
 
     # ================= COMPARACIÓN =================
     def _comparar_textos(
@@ -97,50 +337,57 @@ class ServicioAnalisisLectura:
         texto_referencia: str,
         texto_leido: str,
         duracion_segundos: float,
+        ref_tokens: Optional[List[str]] = None,
+        leido_tokens: Optional[List[str]] = None,
     ) -> Dict:
 
-        ref_tokens = self._tokenizar(texto_referencia)
-        leido_tokens = self._limpiar_repeticiones(
-            self._tokenizar(texto_leido)
-        )
+        if ref_tokens is None:
+            ref_tokens = self._tokenizar(texto_referencia)
+        if leido_tokens is None:
+            leido_tokens = self._limpiar_repeticiones(
+                self._tokenizar(texto_leido)
+            )
 
-        matcher = SequenceMatcher(a=ref_tokens, b=leido_tokens)
         errores_detectados = []
         tokens_correctos = 0
-
-        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
-            if tag == "equal":
-                tokens_correctos += (i2 - i1)
+        # Token leído -> posición de la palabra de la referencia que le toca
+        posiciones_referencia = {}
+
+        # Cada palabra de la referencia queda emparejada con la palabra leída
+        # que le corresponde (o con ninguna, si se omitió)
+        for op, i, j in alinear(ref_tokens, leido_tokens):
+            if op in (IGUAL, SUSTITUCION):
+                posiciones_referencia[j] = i
+            if op == IGUAL:
+                tokens_correctos += 1
+                continue
+            if op == INSERCION:
                 continue
 
-            for i in range(i1, i2):
-                palabra_original = ref_tokens[i] if i < len(ref_tokens) else None
-                palabra_leida = leido_tokens[j1] if j1 < len(leido_tokens) else None
+            palabra_original = ref_tokens[i]
+            palabra_leida = leido_tokens[j] if op == SUSTITUCION else None
 
-                if self._es_puntuacion(palabra_original or ""):
-                    continue
+            if self._es_puntuacion(palabra_original):
+                continue
 
-                if tag == "replace":
-                    if self._similitud_palabra(palabra_original, palabra_leida) >= 0.75:
-                        tokens_correctos += 1
-                        continue
-                    tipo_error = "sustitucion"
-                elif tag == "delete":
-                    tipo_error = "omision"
-                elif tag == "insert":
-                    tipo_error = "insercion"
-                else:
-                    tipo_error = "otro"
-
-                errores_detectados.append(
-                    {
-                        "tipo_error": tipo_error,
-                        "palabra_original": palabra_original,
-                        "palabra_leida": palabra_leida,
-                        "posicion": i,
-                        "severidad": 2,
-                    }
-                )
+            if op == SUSTITUCION:
+                if self._similitud_palabra(palabra_original, palabra_leida) >= 0.75:
+                    tokens_correctos += 1
+                    continue
+                tipo_error = "sustitucion"
+            else:
+                tipo_error = "omision"
+
+            errores_detectados.append(
+                {
+                    "tipo_error": tipo_error,
+                    "palabra_original": palabra_original,
+                    "palabra_leida": palabra_leida,
+                    "posicion": i,
+                    "posicion_leida": j,
+                    "severidad": 2,
+                }
+            )
 
         total = max(1, len(ref_tokens))
         precision = (tokens_correctos / total) * 100
@@ -166,6 +413,7 @@ class ServicioAnalisisLectura:
             "palabras_por_minuto": ppm,
             "errores_detectados": errores_detectados,
             "tokens_leidos": leido_tokens,
+            "posiciones_referencia": posiciones_referencia,
         }
 
     # ================= FEEDBACK =================
@@ -188,6 +436,7 @@ class ServicioAnalisisLectura:
         contenido_id: int,
         audio_path: str,
         evaluacion_id: Optional[int] = None,
+        hash_audio: Optional[str] = None,
     ) -> Dict:
 
         estudiante = db.get(Estudiante, estudiante_id)
@@ -196,27 +445,90 @@ class ServicioAnalisisLectura:
         if not estudiante or not contenido:
             raise ValueError("Estudiante o contenido no encontrado")
 
-        trans = self._transcribir_audio(audio_path)
+        trans = self._transcribir_audio(
+            audio_path,
+            hash_audio,
+            perfil=settings.ASR_PERFIL_EVALUACION,
+            con_tiempos=True,
+        )
+        return self.registrar_evaluacion(db, contenido, estudiante_id, trans, audio_path)
+
+    def registrar_evaluacion(
+        self,
+        db: Session,
+        contenido: ContenidoLectura,
+        estudiante_id: int,
+        trans: Dict,
+        audio_path: str,
+    ) -> Dict:
+        """
+        Compara una transcripción ya hecha contra la lectura y guarda la
+        evaluación. Lo usan tanto el análisis por archivo como el streaming.
+        """
+        contenido_id = contenido.id
+        palabras = trans.get("palabras") or []
+        fluidez = analizar_fluidez(palabras, trans["duracion"])
+
+        leido_tokens, origen = None, []
+        if palabras:
+            leido_tokens, origen = self._tokens_con_tiempos(palabras)
+
+        # Con tiempos por palabra, la velocidad se mide sobre el tramo con voz
+        ref_tokens = obtener_tokens_referencia(db, contenido)
         analisis = self._comparar_textos(
             contenido.contenido,
             trans["texto"],
-            trans["duracion"],
+            fluidez["tiempo_habla"] if fluidez else trans["duracion"],
+            ref_tokens=ref_tokens,
+            leido_tokens=leido_tokens,
         )
 
         feedback = self._generar_feedback(analisis)
+        ritmo = fluidez["ritmo_score"] if fluidez else None
 
         evaluacion = EvaluacionLectura(
             estudiante_id=estudiante_id,
             contenido_id=contenido_id,
             puntuacion_pronunciacion=analisis["precision_global"],
             velocidad_lectura=analisis["palabras_por_minuto"],
+            fluidez=ritmo,
             precision_palabras=analisis["precision_global"],
             retroalimentacion_ia=feedback,
             audio_url=audio_path,
+            duracion_audio=round(trans["duracion"]),
             estado="completado",
         )
 
-        db.add(evaluacion)
+        # Evaluación, análisis y errores van en un solo commit: el flush
+        # los inserta agrupados por tabla
+        objetos = [
+            evaluacion,
+            AnalisisIA(
+                evaluacion=evaluacion,
+                modelo_usado=trans.get("modelo"),
+                precision_global=analisis["precision_global"],
+                palabras_detectadas={
+                    "total": len(palabras),
+                    "palabras": fluidez["palabras"] if fluidez else [],
+                },
+                errores_detectados={
+                    "total": len(analisis["errores_detectados"]),
+                    "errores": analisis["errores_detectados"],
+                },
+                tiempo_procesamiento=trans.get("tiempo_procesamiento"),
+                palabras_por_minuto=analisis["palabras_por_minuto"],
+                pausas_detectadas=(
+                    {k: v for k, v in fluidez.items() if k not in ("palabras", "ritmo_score")}
+                    if fluidez else None
+                ),
+                ritmo_score=ritmo,
+            ),
+        ]
+        objetos.extend(
+            self._errores_pronunciacion(evaluacion, analisis, ref_tokens, palabras, origen, fluidez)
+        )
+
+        db.add_all(objetos)
         db.commit()
         db.refresh(evaluacion)
 
@@ -225,16 +537,102 @@ class ServicioAnalisisLectura:
             "evaluacion_id": evaluacion.id,
             "precision_global": analisis["precision_global"],
             "palabras_por_minuto": analisis["palabras_por_minuto"],
+            "tasa_articulacion": fluidez["tasa_articulacion"] if fluidez else None,
+            "pausas": len(fluidez["pausas"]) if fluidez else None,
+            "ritmo_score": ritmo,
             "errores": analisis["errores_detectados"],
             "texto_transcrito": trans["texto"],
             "retroalimentacion": feedback,
         }
 
+    def _errores_pronunciacion(
+        self,
+        evaluacion: EvaluacionLectura,
+        analisis: Dict,
+        ref_tokens: List[str],
+        palabras: List[Dict],
+        origen: List[Dict],
+        fluidez: Optional[Dict],
+    ) -> List:
+        """
+        Un DetalleEvaluacion por palabra con error y su ErrorPronunciacion,
+        con los tiempos de la palabra leída cuando se conocen. Las pausas
+        largas se registran como error de fluidez de la palabra que sigue.
+        """
+        objetos = []
+
+        for error in analisis["errores_detectados"]:
+            j = error.get("posicion_leida")
+            palabra = origen[j] if j is not None and j < len(origen) else None
+            inicio = palabra["inicio"] if palabra else None
+            fin = palabra["fin"] if palabra else None
+
+            similitud = self._similitud_palabra(error["palabra_original"], error["palabra_leida"])
+            detalle = DetalleEvaluacion(
+                evaluacion=evaluacion,
+                palabra=error["palabra_original"][:100],
+                posicion_en_texto=error["posicion"],
+                precision_pronunciacion=round(similitud * 100, 1),
+                timestamp_inicio=inicio,
+                timestamp_fin=fin,
+                tipo_tokenizacion="palabra",
+            )
+            objetos.append(detalle)
+            objetos.append(
+                ErrorPronunciacion(
+                    detalle=detalle,
+                    tipo_error=error["tipo_error"],
+                    palabra_original=error["palabra_original"][:100],
+                    palabra_detectada=(error["palabra_leida"] or "")[:100] or None,
+                    timestamp_inicio=inicio,
+                    timestamp_fin=fin,
+                    severidad=error["severidad"],
+                )
+            )
+
+        # Pausa larga: error de fluidez en la palabra de la referencia que
+        # se leyó justo después
+        primer_token = {}
+        for k, palabra in enumerate(origen):
+            primer_token.setdefault(id(palabra), k)
+        for pausa in fluidez["pausas"] if fluidez else []:
+            if not pausa["larga"]:
+                continue
+            k = primer_token.get(id(palabras[pausa["posicion"]]))
+            i = analisis["posiciones_referencia"].get(k)
+            if i is None:
+                continue
+
+            detalle = DetalleEvaluacion(
+                evaluacion=evaluacion,
+                palabra=ref_tokens[i][:100],
+                posicion_en_texto=i,
+                timestamp_inicio=pausa["inicio"],
+                timestamp_fin=pausa["fin"],
+                tipo_tokenizacion="palabra",
+            )
+            objetos.append(detalle)
+            objetos.append(
+                ErrorPronunciacion(
+                    detalle=detalle,
+                    tipo_error="fluidez",
+                    palabra_original=ref_tokens[i][:100],
+                    timestamp_inicio=pausa["inicio"],
+                    timestamp_fin=pausa["fin"],
+                    severidad=1,
+                    sugerencia_correccion=f"Pausa de {pausa['duracion']:.1f} s antes de esta palabra",
+                )
+            )
+
+        return objetos
+
     # ================= PRÁCTICA DE EJERCICIOS =================
     def analizar_practica_ejercicio(
         self,
         texto_practica: str,
         audio_path: str,
+        hash_audio: Optional[str] = None,
+        palabras_objetivo: Optional[List[str]] = None,
     ) -> Dict:
         """
         Analiza un ejercicio de práctica específico.
@@ -242,9 +640,21 @@ class ServicioAnalisisLectura:
         """
         logger.info(f"🎯 Analizando práctica de ejercicio | audio={audio_path}")
 
-        trans = self._transcribir_audio(audio_path)
+        trans = None
+        # En los ejercicios generados texto_practica es la consigna; lo que
+        # se lee son las palabras objetivo
+        palabras = [p.strip() for p in palabras_objetivo or [] if p.strip()]
+        texto_esperado = " ".join(palabras) if palabras else texto_practica
+        if settings.PRACTICA_RAPIDA_ACTIVA and texto_esperado:
+            trans = self._transcribir_restringido(
+                audio_path, texto_esperado, hash_audio, palabras_objetivo=palabras_objetivo
+            )
+        modo = "restringido" if trans else "completo"
+
+        if trans is None:
+            trans = self._transcribir_audio(audio_path, hash_audio, perfil=settings.ASR_PERFIL_PRACTICA)
         analisis = self._comparar_textos(
-            texto_practica,
+            texto_esperado,
             trans["texto"],
             trans["duracion"],
         )
@@ -260,4 +670,5 @@ class ServicioAnalisisLectura:
             "palabras_por_minuto": analisis["palabras_por_minuto"],
             "errores_detectados": analisis["errores_detectados"],
             "texto_transcrito": trans["texto"],
+            "modo_transcripcion": modo,
         }
\ No newline at end of file
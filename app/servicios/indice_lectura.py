@@ -0,0 +1,92 @@
+import hashlib
+import re
+import unicodedata
+from typing import Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.logs.logger import logger
+from app.modelos import ContenidoLectura, IndiceLectura
+
+TOKEN_REGEX = re.compile(r"[A-Za-zÁÉÍÓÚÜáéíóúüñÑ0-9]+|[¿\?¡!.,;:]", re.UNICODE)
+PUNTUACION_REGEX = re.compile(r"[¿\?¡!.,;:]")
+ESPACIOS_REGEX = re.compile(r"\s+")
+
+
+# ================= NORMALIZACIÓN / TOKENIZACIÓN =================
+def normalizar_texto(texto: str) -> str:
+    if not texto:
+        return ""
+    texto = texto.replace("\n", " ").strip().lower()
+    texto = unicodedata.normalize("NFD", texto)
+    texto = "".join(c for c in texto if unicodedata.category(c) != "Mn")
+    return ESPACIOS_REGEX.sub(" ", texto)
+
+
+def tokenizar_texto(texto: str) -> List[str]:
+    return TOKEN_REGEX.findall(normalizar_texto(texto))
+
+
+def es_puntuacion(token: str) -> bool:
+    return bool(PUNTUACION_REGEX.fullmatch(token or ""))
+
+
+def hash_texto(texto: str) -> str:
+    return hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+
+
+def construir_indice(texto: str) -> Dict:
+    """
+    Tokens normalizados de la lectura, máscara de puntuación y, para cada
+    token, su posición como palabra (-1 si es puntuación).
+    """
+    tokens = tokenizar_texto(texto)
+    mascara = [es_puntuacion(t) for t in tokens]
+
+    posiciones = []
+    n = 0
+    for es_punt in mascara:
+        if es_punt:
+            posiciones.append(-1)
+        else:
+            posiciones.append(n)
+            n += 1
+
+    return {
+        "hash_contenido": hash_texto(texto),
+        "tokens": tokens,
+        "mascara_puntuacion": mascara,
+        "posiciones": posiciones,
+    }
+
+
+# ================= PERSISTENCIA =================
+def actualizar_indice(db: Session, contenido: ContenidoLectura) -> IndiceLectura:
+    """
+    Recalcula el índice de una lectura. No hace commit: se guarda junto
+    con la transacción que creó o modificó el contenido.
+    """
+    datos = construir_indice(contenido.contenido)
+
+    indice = db.get(IndiceLectura, contenido.id)
+    if indice is None:
+        indice = IndiceLectura(contenido_id=contenido.id, **datos)
+        db.add(indice)
+    elif indice.hash_contenido != datos["hash_contenido"]:
+        for campo, valor in datos.items():
+            setattr(indice, campo, valor)
+
+    return indice
+
+
+def obtener_tokens_referencia(db: Session, contenido: ContenidoLectura) -> List[str]:
+    """
+    Tokens de referencia precalculados. Si el índice falta o quedó
+    desactualizado (texto editado por otra vía) se regenera.
+    """
+    indice = db.get(IndiceLectura, contenido.id)
+    if indice is not None and indice.hash_contenido == hash_texto(contenido.contenido):
+        return list(indice.tokens)
+
+    logger.info(f"Regenerando índice de lectura | contenido_id={contenido.id}")
+    return list(actualizar_indice(db, contenido).tokens)
@@ -0,0 +1,220 @@
+import time
+import wave
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.alineacion import IGUAL, INSERCION, SUSTITUCION, alinear
+
+FRECUENCIA = 16000
+MUESTRAS_TRAMA = 480  # 30 ms a 16 kHz
+
+
+class SesionLecturaStreaming:
+    """
+    Evaluación incremental de una lectura en voz alta.
+
+    Recibe PCM 16-bit mono a 16 kHz, corta segmentos de voz con un VAD
+    de energía, transcribe cada segmento al cerrarse y re-alinea la
+    hipótesis acumulada contra los tokens de la lectura para emitir
+    eventos por palabra (correcto / omitido / sustituido).
+    """
+
+    def __init__(
+        self,
+        analizador,
+        texto_referencia: str,
+        ref_tokens: Optional[List[str]] = None,
+    ) -> None:
+        self.analizador = analizador
+        self.perfil = analizador.perfil(settings.ASR_PERFIL_STREAMING)
+        self.ref_tokens = ref_tokens or analizador._tokenizar(texto_referencia)
+
+        self._pendiente = np.zeros(0, dtype=np.float32)
+        self._segmento: List[np.ndarray] = []
+        self._silencio_tramas = 0
+        self._hay_voz = False
+        self._audio_total: List[bytes] = []
+        self._resto = b""
+
+        self.leido_tokens: List[str] = []
+        self.textos: List[str] = []
+        self._estados: Dict[int, str] = {}
+        self.inicio = time.time()
+
+    # ================= AUDIO / VAD =================
+    @property
+    def duracion(self) -> float:
+        return sum(len(b) for b in self._audio_total) / 2 / FRECUENCIA
+
+    def agregar_audio(self, pcm: bytes) -> List[np.ndarray]:
+        """
+        Acumula audio. Devuelve los segmentos listos para transcribir: uno
+        por cada pausa detectada o cada vez que se alcanza la duración
+        máxima (un bloque largo puede cerrar varios).
+        """
+        pcm = self._resto + pcm
+        corte = len(pcm) - (len(pcm) % 2)
+        pcm, self._resto = pcm[:corte], pcm[corte:]
+
+        self._audio_total.append(pcm)
+        muestras = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        self._pendiente = np.concatenate([self._pendiente, muestras])
+        return self._procesar_tramas()
+
+    def _procesar_tramas(self) -> List[np.ndarray]:
+        """Pasa por el VAD todas las tramas completas del buffer."""
+        silencio_max = settings.STREAMING_SILENCIO_MS // 30
+        tramas_max = settings.STREAMING_SEGMENTO_MAX_S * 1000 // 30
+        cerrados: List[np.ndarray] = []
+
+        while self._pendiente.shape[0] >= MUESTRAS_TRAMA:
+            trama = self._pendiente[:MUESTRAS_TRAMA]
+            self._pendiente = self._pendiente[MUESTRAS_TRAMA:]
+
+            es_voz = float(np.sqrt(np.mean(trama ** 2))) >= settings.STREAMING_UMBRAL_VOZ
+            if es_voz:
+                self._hay_voz = True
+                self._silencio_tramas = 0
+            elif self._hay_voz:
+                self._silencio_tramas += 1
+
+            if self._hay_voz:
+                self._segmento.append(trama)
+
+            if self._hay_voz and (
+                self._silencio_tramas >= silencio_max
+                or len(self._segmento) >= tramas_max
+            ):
+                segmento = self._cerrar_segmento()
+                if segmento is not None:
+                    cerrados.append(segmento)
+
+        return cerrados
+
+    def _cerrar_segmento(self) -> Optional[np.ndarray]:
+        if not self._segmento:
+            return None
+        segmento = np.concatenate(self._segmento)
+        self._segmento = []
+        self._silencio_tramas = 0
+        self._hay_voz = False
+        return segmento
+
+    # ================= TRANSCRIPCIÓN =================
+    def procesar_segmento(self, segmento: np.ndarray) -> List[Dict]:
+        # Las últimas palabras leídas sirven de contexto para el siguiente segmento
+        contexto = " ".join(self.textos)[-200:] or None
+
+        segments, _ = self.analizador.modelo_whisper(self.perfil).transcribe(
+            segmento,
+            language="es",
+            beam_size=self.perfil["beam_size"],
+            best_of=self.perfil["best_of"],
+            temperature=self.perfil["temperature"],
+            vad_filter=False,
+            condition_on_previous_text=False,
+            initial_prompt=contexto,
+            without_timestamps=True,
+        )
+        texto = "".join(seg.text for seg in segments).strip()
+        if not texto:
+            return []
+
+        self.textos.append(texto)
+        self.leido_tokens = self.analizador._limpiar_repeticiones(
+            self.analizador._tokenizar(" ".join(self.textos))
+        )
+
+        eventos = [{"tipo": "parcial", "texto": " ".join(self.textos)}]
+        eventos.extend(self._eventos_palabras(final=False))
+        return eventos
+
+    # ================= ALINEACIÓN INCREMENTAL =================
+    def _eventos_palabras(self, final: bool) -> List[Dict]:
+        """
+        Re-alinea referencia vs hipótesis y emite eventos solo para las
+        palabras resueltas (o cuyo estado cambió). Mientras la lectura
+        sigue, solo se resuelven las palabras anteriores a la última
+        coincidencia; al final se resuelven todas.
+        """
+        operaciones = alinear(self.ref_tokens, self.leido_tokens)
+
+        frontera = len(self.ref_tokens)
+        if not final:
+            frontera = 0
+            for op, i, _ in operaciones:
+                if op == IGUAL:
+                    frontera = i + 1
+
+        eventos = []
+        for op, i, j in operaciones:
+            if op == INSERCION or i >= frontera:
+                continue
+            palabra = self.ref_tokens[i]
+            if self.analizador._es_puntuacion(palabra):
+                continue
+
+            leida = self.leido_tokens[j] if j is not None else None
+
+            if op == IGUAL:
+                estado = "correcto"
+            elif op == SUSTITUCION and (
+                self.analizador._similitud_palabra(palabra, leida) >= 0.75
+            ):
+                estado = "correcto"
+            elif op == SUSTITUCION:
+                estado = "sustituido"
+            else:
+                estado = "omitido"
+
+            if self._estados.get(i) == estado:
+                continue
+            self._estados[i] = estado
+            eventos.append(
+                {
+                    "tipo": "palabra",
+                    "posicion": i,
+                    "palabra": palabra,
+                    "estado": estado,
+                    "palabra_leida": leida,
+                }
+            )
+        return eventos
+
+    # ================= CIERRE =================
+    def finalizar(self) -> List[Dict]:
+        """Transcribe lo que quede en el buffer y resuelve todas las palabras."""
+        segmentos = self._procesar_tramas()
+        # La última trama incompleta solo cuenta si cae dentro de la voz
+        if self._hay_voz and self._pendiente.shape[0]:
+            self._segmento.append(self._pendiente)
+        self._pendiente = np.zeros(0, dtype=np.float32)
+        segmento = self._cerrar_segmento()
+        if segmento is not None:
+            segmentos.append(segmento)
+
+        eventos: List[Dict] = []
+        for segmento in segmentos:
+            eventos.extend(self.procesar_segmento(segmento))
+        eventos.extend(self._eventos_palabras(final=True))
+        return eventos
+
+    def transcripcion(self) -> Dict:
+        return {
+            "texto": " ".join(self.textos).strip(),
+            "duracion": self.duracion,
+            "tiempo_procesamiento": time.time() - self.inicio,
+        }
+
+    def guardar_wav(self, ruta: str) -> str:
+        with wave.open(ruta, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(FRECUENCIA)
+            for bloque in self._audio_total:
+                wav.writeframes(bloque)
+        logger.info(f"💾 Audio de streaming guardado | path={ruta} | duración={self.duracion:.1f}s")
+        return ruta
@@ -3,13 +3,13 @@ from sqlalchemy.orm import Session
 
 from app.servicios.ia_lectura_service import ServicioAnalisisLectura
 from app.servicios.generador_ejercicios import GeneradorEjercicios
-from app.modelos import EjercicioPractica, FragmentoPractica
+from app.modelos import ContenidoLectura, EjercicioPractica, FragmentoPractica
 from app.logs.logger import logger
 
 
 class ManagerAprendizajeIA:
-    def __init__(self) -> None:
-        self.analizador = ServicioAnalisisLectura()
+    def __init__(self, analizador: Optional[ServicioAnalisisLectura] = None) -> None:
+        self.analizador = analizador or ServicioAnalisisLectura()
         self.generador = GeneradorEjercicios()
 
     def procesar_lectura(
@@ -19,6 +19,7 @@ class ManagerAprendizajeIA:
         contenido_id: int,
         audio_path: str,
         evaluacion_id: Optional[int] = None,
+        hash_audio: Optional[str] = None,
     ) -> Dict:
         resultado_analisis = self.analizador.analizar_lectura(
             db=db,
@@ -26,8 +27,30 @@ class ManagerAprendizajeIA:
             contenido_id=contenido_id,
             audio_path=audio_path,
             evaluacion_id=evaluacion_id,
+            hash_audio=hash_audio,
         )
+        return self._agregar_ejercicios(db, estudiante_id, resultado_analisis)
 
+    def procesar_transcripcion(
+        self,
+        db: Session,
+        estudiante_id: int,
+        contenido: ContenidoLectura,
+        trans: Dict,
+        audio_path: str,
+    ) -> Dict:
+        """Igual que procesar_lectura, pero con la transcripción ya hecha (streaming)."""
+        resultado_analisis = self.analizador.registrar_evaluacion(
+            db, contenido, estudiante_id, trans, audio_path
+        )
+        return self._agregar_ejercicios(db, estudiante_id, resultado_analisis)
+
+    def _agregar_ejercicios(
+        self,
+        db: Session,
+        estudiante_id: int,
+        resultado_analisis: Dict,
+    ) -> Dict:
         evaluacion_id_real = resultado_analisis["evaluacion_id"]
         errores = resultado_analisis.get("errores", [])
 
@@ -230,6 +253,7 @@ class ManagerAprendizajeIA:
         estudiante_id: int,
         ejercicio_id: int,
         audio_path: str,
+        hash_audio: Optional[str] = None,
     ) -> Dict:
         """
         El niño practica un ejercicio concreto con feedback de voz detallado.
@@ -270,6 +294,8 @@ class ManagerAprendizajeIA:
             analisis = self.analizador.analizar_practica_ejercicio(
                 texto_practica=ejercicio.texto_practica,
                 audio_path=audio_path,
+                hash_audio=hash_audio,
+                palabras_objetivo=ejercicio.palabras_objetivo,
             )
             
             logger.info(
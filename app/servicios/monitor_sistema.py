@@ -209,17 +209,15 @@ class MonitorSistema:
     async def _verificar_modelos_ia(self) -> dict:
         """Verifica el estado de los modelos de IA"""
         try:
-            from servicios.ia_lectura_service import ServicioAnalisisLectura
-            from servicios.generador_ejercicios import GeneradorEjercicios
-            
-            # Verificar que los servicios se pueden instanciar
-            servicio_analisis = ServicioAnalisisLectura()
-            generador_ejercicios = GeneradorEjercicios()
+            from app.servicios.registro_modelos import registro_modelos
+
+            # No se instancian servicios: se consulta el registro compartido
+            estado_registro = registro_modelos.estado()
             
             modelos = {
                 "analisis_pronunciacion": {
-                    "status": "activo",
-                    "modelo": "google_speech_v2",
+                    "status": "activo" if estado_registro["modelos_cargados"] else "sin_cargar",
+                    "modelo": "faster-whisper",
                     "caracteristicas": ["stt", "analisis_errores", "fluidez"]
                 },
                 "generacion_ejercicios": {
@@ -234,7 +232,8 @@ class MonitorSistema:
             
             return {
                 "status": "activo",
-                "modelos": modelos
+                "modelos": modelos,
+                "registro": estado_registro
             }
             
         except Exception as e:
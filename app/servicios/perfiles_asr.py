@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional
+
+from app import settings
+
+# Parámetros que definen la instancia cargada (el resto son de decodificación)
+CAMPOS_MOTOR = ("modelo", "compute_type", "cpu_threads", "num_workers")
+CAMPOS_DECODIFICACION = ("beam_size", "best_of", "temperature")
+
+
+def perfiles_configurados() -> List[str]:
+    return list(settings.ASR_PERFILES)
+
+
+def obtener_perfil(nombre: Optional[str] = None) -> Dict:
+    """
+    Perfil ASR con todos sus campos. Lo que el perfil no define se toma
+    de los WHISPER_* generales.
+    """
+    nombre = nombre or settings.ASR_PERFIL_EVALUACION
+    if nombre not in settings.ASR_PERFILES:
+        raise ValueError(f"Perfil ASR desconocido: {nombre}")
+
+    return {
+        "nombre": nombre,
+        "modelo": settings.WHISPER_MODELO,
+        "compute_type": settings.WHISPER_COMPUTE_TYPE,
+        "cpu_threads": settings.WHISPER_CPU_THREADS,
+        "num_workers": 1,
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": 0.0,
+        **settings.ASR_PERFILES[nombre],
+    }
+
+
+def opciones_decodificacion(perfil: Dict, base: Dict) -> Dict:
+    """Opciones de `transcribe` de `base` con la decodificación del perfil."""
+    return {**base, **{campo: perfil[campo] for campo in CAMPOS_DECODIFICACION}}
@@ -0,0 +1,175 @@
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from app import settings
+from app.logs.logger import logger
+
+
+class _PeticionLote:
+    def __init__(self, audio: np.ndarray, duracion: float) -> None:
+        self.audio = audio
+        self.duracion = duracion
+        self.encolado = time.monotonic()
+        self.listo = threading.Event()
+        self.texto: Optional[str] = None
+        self.error: Optional[Exception] = None
+
+
+class PlanificadorLotes:
+    """
+    Agrupa transcripciones concurrentes en micro-lotes.
+
+    Las peticiones que llegan dentro de la misma ventana (o hasta llenar
+    el lote) se codifican juntas: un solo `encode` sobre los mel-features
+    rellenados a 30 s y un solo `generate` para todo el lote. Los audios
+    que tras el VAD superan los 30 s no entran al lote y el llamador
+    debe usar la transcripción normal.
+    """
+
+    def __init__(
+        self,
+        model,
+        ventana_ms: Optional[int] = None,
+        max_lote: Optional[int] = None,
+        beam_size: int = 1,
+    ) -> None:
+        self.model = model
+        self.ventana = (ventana_ms or settings.WHISPER_LOTE_VENTANA_MS) / 1000.0
+        self.max_lote = max_lote or settings.WHISPER_LOTE_MAX
+        self.beam_size = beam_size
+
+        self._cola: "queue.Queue[_PeticionLote]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._audios = 0
+        self._max_observado = 0
+
+        self._hilo = threading.Thread(
+            target=self._bucle,
+            name="planificador-lotes-whisper",
+            daemon=True,
+        )
+        self._hilo.start()
+
+    # ================= API PARA LLAMADORES =================
+    def transcribir(self, audio: Union[str, np.ndarray]) -> Optional[Dict]:
+        """
+        Bloquea al hilo llamador hasta que su lote termine.
+        Acepta una ruta o el audio ya decodificado (16 kHz mono float32).
+        Devuelve None si el audio no cabe en un lote (más de 30 s de voz).
+        """
+        from faster_whisper.audio import decode_audio
+        from faster_whisper.vad import VadOptions, get_speech_timestamps, collect_chunks
+
+        extractor = self.model.feature_extractor
+        if isinstance(audio, str):
+            audio = decode_audio(audio, sampling_rate=extractor.sampling_rate)
+        duracion = audio.shape[0] / extractor.sampling_rate
+
+        chunks = get_speech_timestamps(
+            audio,
+            VadOptions(min_silence_duration_ms=300, speech_pad_ms=200),
+        )
+        if chunks:
+            audio = collect_chunks(audio, chunks)
+
+        if audio.shape[0] > extractor.n_samples:
+            return None
+
+        peticion = _PeticionLote(audio, duracion)
+        self._cola.put(peticion)
+        peticion.listo.wait()
+
+        if peticion.error:
+            raise peticion.error
+
+        return {"texto": peticion.texto, "duracion": peticion.duracion}
+
+    # ================= HILO DEL PLANIFICADOR =================
+    def _bucle(self) -> None:
+        while True:
+            lote: List[_PeticionLote] = [self._cola.get()]
+            limite = lote[0].encolado + self.ventana
+
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            try:
+                textos = self._procesar_lote(lote)
+                for peticion, texto in zip(lote, textos):
+                    peticion.texto = texto
+            except Exception as e:
+                logger.exception("Error transcribiendo lote Whisper")
+                for peticion in lote:
+                    peticion.error = e
+            finally:
+                for peticion in lote:
+                    peticion.listo.set()
+
+    def _procesar_lote(self, lote: List[_PeticionLote]) -> List[str]:
+        from faster_whisper.tokenizer import Tokenizer
+        from faster_whisper.transcribe import get_ctranslate2_storage, get_suppressed_tokens
+
+        inicio = time.time()
+        extractor = self.model.feature_extractor
+
+        # Mel-features rellenados/recortados a la ventana fija de 30 s
+        features = np.stack(
+            [extractor(p.audio)[:, : extractor.nb_max_frames] for p in lote]
+        ).astype(np.float32)
+        encoder_output = self.model.model.encode(get_ctranslate2_storage(features))
+
+        tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language="es",
+        )
+        prompt = self.model.get_prompt(tokenizer, [], without_timestamps=True)
+
+        resultados = self.model.model.generate(
+            encoder_output,
+            [prompt] * len(lote),
+            beam_size=self.beam_size,
+            max_length=self.model.max_length,
+            suppress_blank=True,
+            suppress_tokens=get_suppressed_tokens(tokenizer, [-1]),
+        )
+
+        textos = []
+        for r in resultados:
+            tokens = [t for t in r.sequences_ids[0] if t < tokenizer.eot]
+            textos.append(tokenizer.decode(tokens).strip())
+
+        with self._lock:
+            self._lotes += 1
+            self._audios += len(lote)
+            self._max_observado = max(self._max_observado, len(lote))
+
+        logger.info(
+            f"Lote Whisper transcrito | tamaño={len(lote)} | "
+            f"tiempo={time.time() - inicio:.2f}s"
+        )
+        return textos
+
+    def estado(self) -> Dict:
+        with self._lock:
+            return {
+                "ventana_ms": int(self.ventana * 1000),
+                "max_lote": self.max_lote,
+                "lotes": self._lotes,
+                "audios": self._audios,
+                "tamano_promedio": round(self._audios / self._lotes, 2) if self._lotes else 0.0,
+                "tamano_maximo": self._max_observado,
+                "en_espera": self._cola.qsize(),
+            }
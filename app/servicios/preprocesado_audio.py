@@ -0,0 +1,170 @@
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.almacen_audio import almacen_audio
+from app.servicios.cache_disco import CacheDiscoLRU
+from app.servicios.subida_audio import AudioInvalidoError
+
+FRECUENCIA = 16000
+# Versión del preprocesado: cambiarla invalida los arrays guardados
+# (y las transcripciones en caché, que la incluyen en su clave)
+VERSION = 2
+
+# Recorte de silencios: ventanas de 20 ms contra un umbral relativo al pico
+VENTANA_MUESTRAS = 320
+UMBRAL_SILENCIO_DB = -40.0
+MARGEN_S = 0.2
+# Menos que esto de voz se considera una grabación vacía
+VOZ_MINIMA_S = 0.3
+# Muestras en el tope y proporción a partir de la cual se rechaza por saturación
+NIVEL_SATURACION = 0.999
+PROPORCION_SATURADA_MAX = 0.01
+# Normalización de pico (sin amplificar más de 20 dB)
+PICO_OBJETIVO = 0.9
+GANANCIA_MAX = 10.0
+
+
+cache_audio = CacheDiscoLRU(
+    settings.CACHE_AUDIO_DIR,
+    max_mb=settings.CACHE_AUDIO_MAX_MB,
+    extension=".npy",
+)
+# Recorte y duración original de cada array: los tiempos de Whisper son
+# relativos al audio recortado y hay que llevarlos al original
+cache_info_audio = CacheDiscoLRU(
+    os.path.join(settings.CACHE_AUDIO_DIR, "info"),
+    max_mb=16,
+)
+
+
+def _clave(hash_audio: str) -> str:
+    return f"{hash_audio}-v{VERSION}"
+
+
+def decodificar(ruta: str) -> np.ndarray:
+    """Cualquier formato que lea PyAV (webm, m4a, wav...) a 16 kHz mono float32."""
+    from faster_whisper.audio import decode_audio
+
+    try:
+        return decode_audio(ruta, sampling_rate=FRECUENCIA)
+    except Exception as e:
+        raise AudioInvalidoError(f"No se pudo decodificar el audio: {e}")
+
+
+def _limites_voz(audio: np.ndarray, pico: float):
+    """Primera y última muestra con energía por encima del umbral."""
+    n = audio.shape[0] // VENTANA_MUESTRAS
+    if n == 0:
+        return None
+    ventanas = audio[: n * VENTANA_MUESTRAS].reshape(n, VENTANA_MUESTRAS)
+    rms = np.sqrt(np.mean(ventanas * ventanas, axis=1))
+    umbral = pico * 10 ** (UMBRAL_SILENCIO_DB / 20)
+
+    con_voz = np.flatnonzero(rms > umbral)
+    if con_voz.size == 0:
+        return None
+
+    margen = int(MARGEN_S * FRECUENCIA)
+    inicio = max(0, con_voz[0] * VENTANA_MUESTRAS - margen)
+    fin = min(audio.shape[0], (con_voz[-1] + 1) * VENTANA_MUESTRAS + margen)
+    return inicio, fin
+
+
+def procesar(audio: np.ndarray) -> Dict:
+    """
+    Recorta silencios de los extremos y normaliza el pico.
+    Rechaza grabaciones sin voz o saturadas.
+    """
+    if audio.size == 0:
+        raise AudioInvalidoError("El audio está vacío.")
+
+    absoluto = np.abs(audio)
+    pico = float(absoluto.max())
+    if pico < 1e-4:
+        raise AudioInvalidoError("No se detectó voz en el audio.")
+
+    saturadas = float(np.count_nonzero(absoluto >= NIVEL_SATURACION)) / audio.size
+    if saturadas > PROPORCION_SATURADA_MAX:
+        raise AudioInvalidoError(
+            "El audio está saturado: acerca menos el micrófono o habla un poco más bajo."
+        )
+
+    limites = _limites_voz(audio, pico)
+    if limites is None or (limites[1] - limites[0]) / FRECUENCIA < VOZ_MINIMA_S:
+        raise AudioInvalidoError("No se detectó voz en el audio.")
+
+    inicio, fin = limites
+    recortado = audio[inicio:fin]
+    ganancia = min(GANANCIA_MAX, PICO_OBJETIVO / pico)
+    if ganancia > 1.0:
+        recortado = recortado * np.float32(ganancia)
+
+    return {
+        "audio": np.ascontiguousarray(recortado, dtype=np.float32),
+        "duracion_original": audio.shape[0] / FRECUENCIA,
+        "recorte_inicio": inicio / FRECUENCIA,
+        "recorte_fin": (audio.shape[0] - fin) / FRECUENCIA,
+        "ganancia": round(max(1.0, ganancia), 2),
+    }
+
+
+def preparar_audio_con_info(ruta: str, hash_audio: Optional[str] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    Audio listo para Whisper (16 kHz mono float32, recortado y normalizado)
+    y `{"recorte_inicio", "duracion_original"}` en segundos.
+    `ruta` puede ser una ruta local o una referencia del almacén de audio.
+
+    Se decodifica una sola vez por contenido: el resultado queda en la
+    caché como `.npy` y las siguientes llamadas lo abren con mmap, así
+    la re-evaluación, el VAD y los micro-lotes no vuelven a decodificar.
+    """
+    clave = _clave(hash_audio or almacen_audio.hash_audio(ruta))
+
+    guardado = cache_audio.obtener_ruta(clave)
+    info = cache_info_audio.leer_json(clave) if guardado else None
+    if guardado and info:
+        try:
+            return np.load(guardado, mmap_mode="r"), info
+        except (OSError, ValueError):
+            logger.warning(f"Array de audio ilegible en caché: {guardado}")
+
+    inicio = time.time()
+    resultado = procesar(decodificar(almacen_audio.ruta_local(ruta)))
+    audio = resultado["audio"]
+    info = {
+        "recorte_inicio": resultado["recorte_inicio"],
+        "duracion_original": resultado["duracion_original"],
+    }
+
+    cache_audio.guardar_array(clave, audio)
+    cache_info_audio.guardar_json(clave, info)
+    logger.info(
+        f"🎚️ Audio preprocesado | {resultado['duracion_original']:.2f}s -> "
+        f"{audio.shape[0] / FRECUENCIA:.2f}s | recorte={resultado['recorte_inicio']:.2f}s/"
+        f"{resultado['recorte_fin']:.2f}s | ganancia={resultado['ganancia']}x | "
+        f"tiempo={time.time() - inicio:.2f}s"
+    )
+    return audio, info
+
+
+def preparar_audio(ruta: str, hash_audio: Optional[str] = None) -> np.ndarray:
+    return preparar_audio_con_info(ruta, hash_audio)[0]
+
+
+def ingerir_audio(ruta: str, hash_audio: str) -> float:
+    """
+    Etapa de ingesta de una subida: deja el audio preprocesado en la caché
+    y devuelve los segundos con voz. Si se rechaza, se borra el archivo.
+    """
+    try:
+        audio = preparar_audio(ruta, hash_audio)
+    except AudioInvalidoError:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        raise
+    return audio.shape[0] / FRECUENCIA
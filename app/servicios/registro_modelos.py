@@ -0,0 +1,399 @@
+import os
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Tuple
+
+import psutil
+from fastapi import HTTPException
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.perfiles_asr import obtener_perfil, perfiles_configurados
+
+
+class RegistroModelos:
+    """
+    Registro de modelos compartido por todo el proceso.
+
+    Cada combinación (modelo, compute_type) se carga una sola vez y se
+    entrega el mismo objeto a todos los servicios que lo pidan. Nada se
+    carga al importar: la precarga corre en un hilo al iniciar la API y
+    las rutas IA consultan `modelo_listo` mientras tanto.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._whisper: Dict[Tuple[str, str], object] = {}
+        self._generadores: Dict[Tuple[str, str], Tuple[object, object]] = {}
+        self._info: Dict[Tuple[str, str], Dict] = {}
+        self._planificadores: Dict[Tuple[str, str], object] = {}
+        self._cliente = None
+
+        self._lock_precarga = threading.Lock()
+        self._hilo_precarga: threading.Thread = None
+        self._precarga: Dict = {"estado": "sin_iniciar", "errores": {}}
+
+    # ================= WHISPER =================
+    def obtener_whisper(
+        self,
+        modelo: str = None,
+        compute_type: str = None,
+        cpu_threads: int = None,
+        num_workers: int = 1,
+    ):
+        """
+        Instancia de Whisper para (modelo, compute_type). Los hilos se fijan
+        al cargar: si dos perfiles comparten modelo y compute_type, manda
+        el que se cargó primero.
+        """
+        modelo = modelo or settings.WHISPER_MODELO
+        compute_type = compute_type or settings.WHISPER_COMPUTE_TYPE
+        clave = (modelo, compute_type)
+
+        instancia = self._whisper.get(clave)
+        if instancia is not None:
+            return instancia
+
+        with self._lock:
+            instancia = self._whisper.get(clave)
+            if instancia is not None:
+                return instancia
+
+            cpu_threads = cpu_threads or settings.WHISPER_CPU_THREADS
+            if settings.MODELOS_SOCKET:
+                return self._registrar_whisper_remoto(modelo, compute_type, cpu_threads, num_workers)
+
+            from faster_whisper import WhisperModel
+
+            logger.info(
+                f"Cargando modelo Faster-Whisper '{modelo}' "
+                f"compute_type={compute_type} (modo niños)..."
+            )
+            rss_antes = self._rss_actual()
+            inicio = time.time()
+
+            instancia = WhisperModel(
+                modelo,
+                device="cpu",
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+            )
+
+            self._whisper[clave] = instancia
+            self._info[clave] = {
+                "tipo": "faster-whisper",
+                "modelo": modelo,
+                "compute_type": compute_type,
+                "cpu_threads": cpu_threads,
+                "num_workers": num_workers,
+                "memoria_mb": round(max(0, self._rss_actual() - rss_antes) / (1024**2), 2),
+                "tiempo_carga_s": round(time.time() - inicio, 2),
+            }
+            logger.info(
+                f"Modelo Faster-Whisper cargado correctamente | "
+                f"memoria≈{self._info[clave]['memoria_mb']} MB"
+            )
+            return instancia
+
+    def obtener_whisper_perfil(self, perfil: Dict):
+        """Whisper configurado según un perfil ASR (ver perfiles_asr)."""
+        return self.obtener_whisper(
+            perfil["modelo"],
+            perfil["compute_type"],
+            cpu_threads=perfil["cpu_threads"],
+            num_workers=perfil["num_workers"],
+        )
+
+    # ================= FLAN-T5 =================
+    def obtener_generador(self, modelo: str = None, compute_type: str = None) -> Tuple[object, object]:
+        """
+        (tokenizer, modelo) seq2seq para generar actividades. Con
+        compute_type "int8" las capas Linear se cuantizan dinámicamente.
+        """
+        modelo = modelo or settings.GENERADOR_MODELO
+        compute_type = compute_type or settings.GENERADOR_COMPUTE_TYPE
+        clave = (modelo, compute_type)
+
+        generador = self._generadores.get(clave)
+        if generador is not None:
+            return generador
+
+        with self._lock:
+            generador = self._generadores.get(clave)
+            if generador is not None:
+                return generador
+
+            if settings.MODELOS_SOCKET:
+                return self._registrar_generador_remoto(modelo, compute_type)
+
+            if compute_type not in ("float32", "int8"):
+                raise ValueError(f"compute_type no soportado para el generador: {compute_type}")
+
+            import torch
+            from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+            logger.info(f"Cargando modelo {modelo} compute_type={compute_type}...")
+            rss_antes = self._rss_actual()
+            inicio = time.time()
+            hilos = self._configurar_hilos_torch(torch)
+
+            tokenizer = AutoTokenizer.from_pretrained(modelo)
+            model = AutoModelForSeq2SeqLM.from_pretrained(modelo, torch_dtype=torch.float32)
+            model.eval()
+            if compute_type == "int8":
+                model = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+            generador = (tokenizer, model)
+            self._generadores[clave] = generador
+            self._info[clave] = {
+                "tipo": "seq2seq",
+                "modelo": modelo,
+                "compute_type": compute_type,
+                "cpu_threads": hilos,
+                "memoria_mb": round(max(0, self._rss_actual() - rss_antes) / (1024**2), 2),
+                "tiempo_carga_s": round(time.time() - inicio, 2),
+            }
+            logger.info(
+                f"Modelo cargado correctamente en CPU | hilos={hilos} | "
+                f"memoria≈{self._info[clave]['memoria_mb']} MB"
+            )
+            return generador
+
+    def _configurar_hilos_torch(self, torch) -> int:
+        """
+        Hilos de torch para el generador. Por defecto, los núcleos que dejan
+        libres los perfiles ASR (todos pueden tener su modelo cargado y
+        trabajando a la vez), para no competir con Whisper.
+        """
+        hilos = settings.GENERADOR_HILOS
+        if hilos <= 0:
+            hilos_asr = 0
+            for nombre in perfiles_configurados():
+                perfil = obtener_perfil(nombre)
+                hilos_asr += perfil["cpu_threads"] * perfil["num_workers"]
+            hilos = max(1, (os.cpu_count() or 1) - (hilos_asr or settings.WHISPER_CPU_THREADS))
+
+        torch.set_num_threads(hilos)
+        try:
+            torch.set_num_interop_threads(max(1, settings.GENERADOR_HILOS_INTER_OP))
+        except RuntimeError:
+            # Solo se puede fijar antes del primer trabajo paralelo de torch
+            pass
+        return hilos
+
+    def obtener_planificador(
+        self,
+        modelo: str = None,
+        compute_type: str = None,
+        beam_size: int = 1,
+    ):
+        """Planificador de micro-lotes compartido para un modelo Whisper."""
+        modelo = modelo or settings.WHISPER_MODELO
+        compute_type = compute_type or settings.WHISPER_COMPUTE_TYPE
+        clave = (modelo, compute_type)
+
+        planificador = self._planificadores.get(clave)
+        if planificador is not None:
+            return planificador
+
+        whisper = self.obtener_whisper(modelo, compute_type)
+        with self._lock:
+            planificador = self._planificadores.get(clave)
+            if planificador is None:
+                from app.servicios.planificador_lotes import PlanificadorLotes
+
+                planificador = PlanificadorLotes(whisper, beam_size=beam_size)
+                self._planificadores[clave] = planificador
+            return planificador
+
+    # ================= SERVIDOR DE MODELOS =================
+    def _cliente_modelos(self):
+        if self._cliente is None:
+            from app.servicios.servidor_modelos import ClienteModelos
+            self._cliente = ClienteModelos(settings.MODELOS_SOCKET)
+        return self._cliente
+
+    def _registrar_whisper_remoto(
+        self,
+        modelo: str,
+        compute_type: str,
+        cpu_threads: int,
+        num_workers: int,
+    ):
+        """Whisper vive en el servidor de modelos; aquí solo queda un proxy."""
+        from app.servicios.servidor_modelos import WhisperRemoto
+
+        inicio = time.time()
+        # Bloquea hasta que el servidor tenga el modelo cargado
+        self._cliente_modelos().llamar(
+            "cargar", "whisper", modelo, compute_type, cpu_threads, num_workers
+        )
+
+        instancia = WhisperRemoto(self._cliente_modelos(), modelo, compute_type)
+        clave = (modelo, compute_type)
+        self._whisper[clave] = instancia
+        self._info[clave] = {
+            "tipo": "faster-whisper (remoto)",
+            "modelo": modelo,
+            "compute_type": compute_type,
+            "memoria_mb": 0.0,
+            "tiempo_carga_s": round(time.time() - inicio, 2),
+        }
+        logger.info(f"Usando Faster-Whisper del servidor de modelos ({settings.MODELOS_SOCKET})")
+        return instancia
+
+    def _registrar_generador_remoto(self, modelo: str, compute_type: str):
+        """El tokenizer (liviano) se carga local; `generate` corre en el servidor."""
+        from transformers import AutoTokenizer
+
+        from app.servicios.servidor_modelos import GeneradorRemoto
+
+        inicio = time.time()
+        self._cliente_modelos().llamar("cargar", "generador", modelo, compute_type)
+
+        generador = (
+            AutoTokenizer.from_pretrained(modelo),
+            GeneradorRemoto(self._cliente_modelos(), modelo, compute_type),
+        )
+        clave = (modelo, compute_type)
+        self._generadores[clave] = generador
+        self._info[clave] = {
+            "tipo": "seq2seq (remoto)",
+            "modelo": modelo,
+            "compute_type": compute_type,
+            "memoria_mb": 0.0,
+            "tiempo_carga_s": round(time.time() - inicio, 2),
+        }
+        return generador
+
+    # ================= PRECARGA =================
+    def _cargadores(self) -> List[Tuple[str, Callable]]:
+        cargadores = [
+            (f"asr:{nombre}", partial(self.obtener_whisper_perfil, obtener_perfil(nombre)))
+            for nombre in perfiles_configurados()
+        ]
+        cargadores.append(("generador", self.obtener_generador))
+        return cargadores
+
+    def modelo_listo(self, nombre: str) -> bool:
+        """`asr:<perfil>` para Whisper según perfil, `generador` para FLAN-T5."""
+        if nombre.startswith("asr:"):
+            perfil = obtener_perfil(nombre[len("asr:"):])
+            return (perfil["modelo"], perfil["compute_type"]) in self._whisper
+        if nombre == "generador":
+            return (settings.GENERADOR_MODELO, settings.GENERADOR_COMPUTE_TYPE) in self._generadores
+        return False
+
+    def iniciar_precarga(self) -> bool:
+        """
+        Carga los modelos en un hilo de fondo. No hace nada si ya hay una
+        precarga en curso o si todos están cargados.
+        """
+        with self._lock_precarga:
+            if self._hilo_precarga and self._hilo_precarga.is_alive():
+                return False
+            if all(self.modelo_listo(nombre) for nombre, _ in self._cargadores()):
+                return False
+
+            self._precarga = {
+                "estado": "cargando",
+                "inicio": time.time(),
+                "fin": None,
+                "tiempos_s": {},
+                "errores": {},
+            }
+            self._hilo_precarga = threading.Thread(
+                target=self._precargar,
+                name="precarga-modelos",
+                daemon=True,
+            )
+            self._hilo_precarga.start()
+            return True
+
+    def _precargar(self) -> None:
+        logger.info("🔥 Precarga de modelos IA en segundo plano...")
+        for nombre, cargar in self._cargadores():
+            inicio = time.time()
+            try:
+                cargar()
+                self._precarga["tiempos_s"][nombre] = round(time.time() - inicio, 2)
+            except Exception as e:
+                logger.error(f"❌ No se pudo precargar el modelo '{nombre}': {e}")
+                self._precarga["errores"][nombre] = str(e)
+
+        self._precarga["fin"] = time.time()
+        self._precarga["estado"] = "error" if self._precarga["errores"] else "listo"
+        logger.info(
+            f"Precarga de modelos terminada | estado={self._precarga['estado']} | "
+            f"tiempo={self._precarga['fin'] - self._precarga['inicio']:.1f}s"
+        )
+
+    def estado_precarga(self) -> Dict:
+        return self._precarga
+
+    def esperar_precarga(self, timeout: float = None) -> bool:
+        hilo = self._hilo_precarga
+        if hilo is not None:
+            hilo.join(timeout)
+        return self._precarga["estado"] == "listo"
+
+    # ================= ESTADO =================
+    def _rss_actual(self) -> int:
+        return psutil.Process(os.getpid()).memory_info().rss
+
+    def estado(self) -> Dict:
+        """Modelos cargados en este proceso y memoria residente aproximada."""
+        modelos = [dict(info) for info in self._info.values()]
+        estado = {
+            "pid": os.getpid(),
+            "memoria_proceso_mb": round(self._rss_actual() / (1024**2), 2),
+            "modelos_cargados": len(modelos),
+            "memoria_modelos_mb": round(sum(m["memoria_mb"] for m in modelos), 2),
+            "modelos": modelos,
+            "precarga": {
+                **self._precarga,
+                "listos": {nombre: self.modelo_listo(nombre) for nombre, _ in self._cargadores()},
+            },
+            "lotes": {
+                f"{m}/{c}": p.estado()
+                for (m, c), p in self._planificadores.items()
+            },
+        }
+
+        if settings.MODELOS_SOCKET:
+            try:
+                estado["servidor_modelos"] = self._cliente_modelos().llamar("estado")
+            except Exception as e:
+                estado["servidor_modelos"] = {"error": str(e)}
+        return estado
+
+
+registro_modelos = RegistroModelos()
+
+
+def requiere_modelo(nombre: str):
+    """
+    Dependencia para rutas IA: 503 + Retry-After mientras el modelo no
+    está cargado. Si nadie lo está cargando (precarga desactivada o
+    fallida), dispara la precarga en segundo plano.
+    """
+
+    def verificar() -> None:
+        if registro_modelos.modelo_listo(nombre):
+            return
+        error = registro_modelos.estado_precarga()["errores"].get(nombre)
+        registro_modelos.iniciar_precarga()
+        detalle = "Los modelos de IA se están cargando, intenta de nuevo en unos segundos."
+        if error:
+            detalle = f"El modelo '{nombre}' no pudo cargarse ({error}); reintentando."
+        raise HTTPException(
+            status_code=503,
+            detail=detalle,
+            headers={"Retry-After": str(settings.IA_COLA_RETRY_AFTER_SEGUNDOS)},
+        )
+
+    return verificar
@@ -0,0 +1,220 @@
+import os
+import threading
+import traceback
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Tuple
+
+from app import settings
+from app.logs.logger import logger
+
+
+class ModeloRemotoError(RuntimeError):
+    """Error devuelto por el servidor de modelos."""
+
+
+# Clave que traía la configuración por defecto: es pública, no autentica nada
+CLAVE_PUBLICA = "tutoria-modelos"
+
+
+def clave_socket() -> bytes:
+    """
+    Clave compartida del socket. Quien la conozca puede mandar pickle al
+    servidor (ejecutar código en él): sin una clave propia no se arranca.
+    """
+    clave = settings.MODELOS_SOCKET_CLAVE
+    if not clave or clave == CLAVE_PUBLICA:
+        raise RuntimeError(
+            "MODELOS_SOCKET necesita una MODELOS_SOCKET_CLAVE propia "
+            "(p. ej. python -c \"import secrets; print(secrets.token_hex(32))\")"
+        )
+    return clave.encode()
+
+
+def _directorio_privado(ruta_socket: str) -> None:
+    """
+    El socket vive en un directorio solo del usuario del servidor: se crea
+    con 0700 y, si ya existe, se exige que sea suyo y sin permisos para otros.
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta_socket))
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    info = os.stat(directorio)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(
+            f"El directorio del socket de modelos ({directorio}) debe ser del "
+            f"usuario del servidor y con permisos 0700"
+        )
+
+
+# ================= SERVIDOR =================
+class ServidorModelos:
+    """
+    Proceso único que mantiene Whisper y FLAN-T5 en memoria y atiende a
+    todos los workers de la API por un socket Unix.
+
+    Cada conexión se atiende en su propio hilo; los mensajes son tuplas
+    (operación, *argumentos) serializadas con pickle por
+    multiprocessing.connection (con autenticación por clave compartida).
+    """
+
+    def __init__(self, ruta_socket: str = None) -> None:
+        self.ruta_socket = ruta_socket or settings.MODELOS_SOCKET
+        self._detener = threading.Event()
+        self._listener = None
+
+    def _registro(self):
+        from app.servicios.registro_modelos import registro_modelos
+        return registro_modelos
+
+    # ----- operaciones -----
+    def _cargar(self, tipo: str, modelo: str = None, *args) -> bool:
+        registro = self._registro()
+        if tipo == "whisper":
+            registro.obtener_whisper(modelo, *args)
+        else:
+            registro.obtener_generador(modelo, *args)
+        return True
+
+    def _transcribir(self, modelo: str, compute_type: str, audio, opciones: Dict) -> Tuple:
+        whisper = self._registro().obtener_whisper(modelo, compute_type)
+        segments, info = whisper.transcribe(audio, **opciones)
+        # El generador de segmentos se consume aquí: solo viajan datos
+        return list(segments), info
+
+    def _generar(self, modelo: str, compute_type: str, kwargs: Dict):
+        import torch
+
+        _, model = self._registro().obtener_generador(modelo, compute_type)
+        with torch.inference_mode():
+            return model.generate(**kwargs)
+
+    def _despachar(self, operacion: str, argumentos: Tuple) -> Any:
+        if operacion == "cargar":
+            return self._cargar(*argumentos)
+        if operacion == "transcribir":
+            return self._transcribir(*argumentos)
+        if operacion == "generar":
+            return self._generar(*argumentos)
+        if operacion == "estado":
+            return self._registro().estado()
+        raise ValueError(f"Operación desconocida: {operacion}")
+
+    def _atender(self, conexion) -> None:
+        with conexion:
+            while not self._detener.is_set():
+                try:
+                    operacion, *argumentos = conexion.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    respuesta = ("ok", self._despachar(operacion, tuple(argumentos)))
+                except Exception as e:
+                    logger.error(f"❌ Servidor de modelos | {operacion}: {e}")
+                    respuesta = ("error", f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=3)}")
+
+                try:
+                    conexion.send(respuesta)
+                except (EOFError, OSError):
+                    return
+
+    def servir(self) -> None:
+        clave = clave_socket()
+        _directorio_privado(self.ruta_socket)
+        if os.path.exists(self.ruta_socket):
+            os.remove(self.ruta_socket)
+
+        # El socket nace con 0600: no hay ventana con permisos más abiertos
+        umask = os.umask(0o177)
+        try:
+            self._listener = Listener(self.ruta_socket, family="AF_UNIX", authkey=clave)
+        finally:
+            os.umask(umask)
+        os.chmod(self.ruta_socket, 0o600)
+        logger.info(f"🧠 Servidor de modelos escuchando en {self.ruta_socket}")
+
+        while not self._detener.is_set():
+            try:
+                conexion = self._listener.accept()
+            except OSError:
+                break
+            except Exception as e:
+                # Cliente con clave incorrecta u otro error de handshake
+                logger.warning(f"Conexión rechazada en el servidor de modelos: {e}")
+                continue
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        if self._listener is not None:
+            self._listener.close()
+        if os.path.exists(self.ruta_socket):
+            os.remove(self.ruta_socket)
+
+
+# ================= CLIENTE =================
+class ClienteModelos:
+    """Una conexión por hilo al servidor de modelos, reutilizada entre llamadas."""
+
+    def __init__(self, ruta_socket: str = None) -> None:
+        self.ruta_socket = ruta_socket or settings.MODELOS_SOCKET
+        self._clave = clave_socket()
+        self._local = threading.local()
+
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = Client(self.ruta_socket, family="AF_UNIX", authkey=self._clave)
+            self._local.conexion = conexion
+        return conexion
+
+    def _cerrar(self) -> None:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is not None:
+            try:
+                conexion.close()
+            except OSError:
+                pass
+        self._local.conexion = None
+
+    def llamar(self, operacion: str, *argumentos) -> Any:
+        # Un reintento: el servidor pudo reiniciarse desde la última llamada
+        for intento in range(2):
+            try:
+                conexion = self._conexion()
+                conexion.send((operacion, *argumentos))
+                estado, resultado = conexion.recv()
+                break
+            except (EOFError, OSError, ConnectionError):
+                self._cerrar()
+                if intento:
+                    raise
+        if estado == "error":
+            raise ModeloRemotoError(resultado)
+        return resultado
+
+
+class WhisperRemoto:
+    """Se usa igual que WhisperModel.transcribe, pero corre en el servidor."""
+
+    def __init__(self, cliente: ClienteModelos, modelo: str, compute_type: str) -> None:
+        self.cliente = cliente
+        self.modelo = modelo
+        self.compute_type = compute_type
+
+    def transcribe(self, audio, **opciones):
+        segmentos, info = self.cliente.llamar(
+            "transcribir", self.modelo, self.compute_type, audio, opciones
+        )
+        return iter(segmentos), info
+
+
+class GeneradorRemoto:
+    """Expone `generate` del modelo seq2seq que vive en el servidor."""
+
+    def __init__(self, cliente: ClienteModelos, modelo: str, compute_type: str) -> None:
+        self.cliente = cliente
+        self.modelo = modelo
+        self.compute_type = compute_type
+
+    def generate(self, **kwargs):
+        return self.cliente.llamar("generar", self.modelo, self.compute_type, dict(kwargs))
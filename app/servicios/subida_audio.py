@@ -0,0 +1,99 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+
+from app import settings
+from app.logs.logger import logger
+
+TAMANO_BLOQUE = 1024 * 1024  # 1 MiB
+
+
+class AudioInvalidoError(ValueError):
+    """Audio rechazado antes de llegar a Whisper."""
+
+    def __init__(self, mensaje: str, status_code: int = 400) -> None:
+        super().__init__(mensaje)
+        self.status_code = status_code
+
+
+async def guardar_audio_en_disco(
+    audio: UploadFile,
+    destino: str,
+    max_bytes: Optional[int] = None,
+) -> Dict:
+    """
+    Copia el upload a disco por bloques calculando el SHA-256 al vuelo.
+    Nunca se tiene el archivo completo en memoria.
+    """
+    max_bytes = max_bytes or settings.AUDIO_MAX_MB * 1024 * 1024
+    h = hashlib.sha256()
+    total = 0
+
+    try:
+        with open(destino, "wb") as f:
+            while True:
+                bloque = await audio.read(TAMANO_BLOQUE)
+                if not bloque:
+                    break
+                total += len(bloque)
+                if total > max_bytes:
+                    raise AudioInvalidoError(
+                        f"El audio supera el tamaño máximo de {max_bytes // (1024 * 1024)} MB.",
+                        status_code=413,
+                    )
+                h.update(bloque)
+                f.write(bloque)
+    except Exception:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+
+    if total == 0:
+        os.remove(destino)
+        raise AudioInvalidoError("El audio está vacío.")
+
+    return {"ruta": destino, "tamano": total, "sha256": h.hexdigest()}
+
+
+def obtener_duracion_audio(ruta: str) -> Optional[float]:
+    """
+    Duración leyendo solo los metadatos del contenedor.
+    Si el contenedor no la trae (webm de MediaRecorder), se recorren los
+    paquetes sin decodificarlos.
+    """
+    import av
+
+    try:
+        with av.open(ruta) as contenedor:
+            if contenedor.duration:
+                return contenedor.duration / av.time_base
+
+            if not contenedor.streams.audio:
+                return None
+            stream = contenedor.streams.audio[0]
+            if stream.duration and stream.time_base:
+                return float(stream.duration * stream.time_base)
+
+            fin = 0.0
+            for paquete in contenedor.demux(stream):
+                if paquete.pts is not None and paquete.time_base:
+                    fin = max(fin, float((paquete.pts + (paquete.duration or 0)) * paquete.time_base))
+            return fin or None
+    except Exception as e:
+        logger.warning(f"No se pudo leer la duración de {ruta}: {e}")
+        return None
+
+
+def validar_duracion_audio(ruta: str, max_segundos: Optional[int] = None) -> Optional[float]:
+    max_segundos = max_segundos or settings.AUDIO_MAX_SEGUNDOS
+    duracion = obtener_duracion_audio(ruta)
+
+    if duracion is not None and duracion > max_segundos:
+        os.remove(ruta)
+        raise AudioInvalidoError(
+            f"El audio dura {duracion:.0f}s y el máximo permitido es {max_segundos}s.",
+            status_code=413,
+        )
+    return duracion
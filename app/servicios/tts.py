@@ -0,0 +1,254 @@
+import hashlib
+import math
+import os
+import queue
+import tempfile
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+from app import settings
+from app.logs.logger import logger
+from app.servicios.cache_disco import CacheDiscoLRU
+
+
+# ================= MOTORES =================
+class MotorTTS(ABC):
+    """Convierte un texto en un archivo de audio."""
+
+    nombre = "base"
+    extension = ".mp3"
+    media_type = "audio/mpeg"
+
+    def __init__(self, idioma: str = "es") -> None:
+        self.idioma = idioma
+
+    @abstractmethod
+    def sintetizar(self, texto: str, destino: str, lento: bool = False) -> None:
+        """Escribe en `destino` el audio del texto."""
+
+
+class MotorGTTS(MotorTTS):
+    """Google Translate TTS (necesita salida a Internet)."""
+
+    nombre = "gtts"
+
+    def sintetizar(self, texto: str, destino: str, lento: bool = False) -> None:
+        from gtts import gTTS
+
+        gTTS(text=texto, lang=self.idioma, slow=lento).save(destino)
+
+
+class MotorTTSPrueba(MotorTTS):
+    """
+    Sintetizador local sin red para pruebas y entornos sin salida a
+    Internet: un tono por palabra, con duración proporcional al texto.
+    """
+
+    nombre = "stub"
+    extension = ".wav"
+    media_type = "audio/wav"
+    FRECUENCIA = 16000
+
+    def sintetizar(self, texto: str, destino: str, lento: bool = False) -> None:
+        duracion_palabra = 0.5 if lento else 0.3
+        muestras = bytearray()
+        for k, _ in enumerate(texto.split() or [""]):
+            tono = 220 + 20 * (k % 8)
+            for n in range(int(duracion_palabra * self.FRECUENCIA)):
+                valor = int(8000 * math.sin(2 * math.pi * tono * n / self.FRECUENCIA))
+                muestras += valor.to_bytes(2, "little", signed=True)
+            muestras += bytes(int(0.1 * self.FRECUENCIA) * 2)
+
+        with wave.open(destino, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.FRECUENCIA)
+            wav.writeframes(bytes(muestras))
+
+
+MOTORES_TTS = {
+    MotorGTTS.nombre: MotorGTTS,
+    MotorTTSPrueba.nombre: MotorTTSPrueba,
+}
+
+
+def registrar_motor(clase) -> None:
+    MOTORES_TTS[clase.nombre] = clase
+
+
+# ================= SERVICIO =================
+class ServicioTTS:
+    """
+    Audio de referencia (lecturas completas y palabras de práctica)
+    cacheado en disco por hash del texto, con expulsión LRU.
+
+    Los textos se precalculan en lotes en un hilo propio; si alguien pide
+    un audio que ese hilo está generando, espera a ese resultado en vez de
+    sintetizarlo otra vez.
+    """
+
+    def __init__(self, motor: Optional[MotorTTS] = None) -> None:
+        self._motor = motor
+        self._cache: Optional[CacheDiscoLRU] = None
+        self._cola: "queue.Queue[tuple]" = queue.Queue()
+        self._en_curso: Dict[str, threading.Event] = {}
+        self._encolados: set = set()
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self.sintetizados = 0
+        self.errores = 0
+
+    @property
+    def motor(self) -> MotorTTS:
+        if self._motor is None:
+            self._motor = MOTORES_TTS[settings.TTS_MOTOR](idioma=settings.TTS_IDIOMA)
+        return self._motor
+
+    @property
+    def cache(self) -> CacheDiscoLRU:
+        if self._cache is None:
+            self._cache = CacheDiscoLRU(
+                settings.TTS_CACHE_DIR,
+                max_mb=settings.TTS_CACHE_MAX_MB,
+                extension=self.motor.extension,
+            )
+        return self._cache
+
+    # ----- claves -----
+    @staticmethod
+    def normalizar(texto: str) -> str:
+        # Mayúsculas y espacios no cambian la pronunciación; las tildes sí
+        return " ".join((texto or "").split()).lower()
+
+    def clave(self, texto: str, lento: bool = False) -> str:
+        firma = f"{self.motor.nombre}|{self.motor.idioma}|{int(lento)}|{self.normalizar(texto)}"
+        return hashlib.sha256(firma.encode("utf-8")).hexdigest()
+
+    # ----- síntesis -----
+    def en_cache(self, texto: str, lento: bool = False) -> Optional[str]:
+        return self.cache.obtener_ruta(self.clave(texto, lento))
+
+    def encolado(self, texto: str, lento: bool = False) -> bool:
+        """Si el texto espera en la cola de lotes (o lo está generando)."""
+        clave = self.clave(texto, lento)
+        with self._lock:
+            return clave in self._encolados or clave in self._en_curso
+
+    def obtener(self, texto: str, lento: bool = False) -> str:
+        """Ruta del audio del texto; lo sintetiza si todavía no está."""
+        clave = self.clave(texto, lento)
+        ruta = self.cache.obtener_ruta(clave)
+        if ruta:
+            return ruta
+
+        with self._lock:
+            evento = self._en_curso.get(clave)
+            propio = evento is None
+            if propio:
+                evento = self._en_curso[clave] = threading.Event()
+
+        if not propio:
+            evento.wait(timeout=settings.TTS_ESPERA_SEGUNDOS)
+            ruta = self.cache.obtener_ruta(clave)
+            if ruta:
+                return ruta
+            raise RuntimeError("No se pudo generar el audio del texto")
+
+        try:
+            return self._sintetizar(clave, texto, lento)
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+    def _sintetizar(self, clave: str, texto: str, lento: bool) -> str:
+        inicio = time.time()
+        fd, tmp = tempfile.mkstemp(suffix=self.motor.extension)
+        os.close(fd)
+        try:
+            self.motor.sintetizar(self.normalizar(texto), tmp, lento=lento)
+            ruta = self.cache.guardar_archivo(clave, tmp)
+        except Exception:
+            self.errores += 1
+            raise
+        finally:
+            os.remove(tmp)
+
+        self.sintetizados += 1
+        logger.info(
+            f"🔊 TTS generado | motor={self.motor.nombre} | caracteres={len(texto)} | "
+            f"tiempo={time.time() - inicio:.2f}s"
+        )
+        return ruta
+
+    # ----- lotes en segundo plano -----
+    def encolar(self, textos: Iterable[str], lento: bool = False) -> int:
+        """Agenda la síntesis de los textos que no estén en caché."""
+        nuevos = 0
+        vistos = set()
+        for texto in textos:
+            if not self.normalizar(texto):
+                continue
+            clave = self.clave(texto, lento)
+            if clave in vistos or os.path.exists(self.cache.ruta(clave)):
+                continue
+            vistos.add(clave)
+            with self._lock:
+                if clave in self._encolados:
+                    continue
+                self._encolados.add(clave)
+            self._cola.put((texto, lento))
+            nuevos += 1
+
+        if nuevos:
+            self._iniciar()
+        return nuevos
+
+    def encolar_contenido(self, contenido) -> int:
+        return self.encolar([contenido.contenido])
+
+    def encolar_palabras(self, palabras: Iterable[str]) -> int:
+        # Las palabras sueltas se leen despacio, como en el botón "escuchar"
+        return self.encolar(palabras, lento=True)
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._hilo and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._bucle, name="tts-lotes", daemon=True)
+            self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            lote: List[tuple] = [self._cola.get()]
+            while len(lote) < settings.TTS_LOTE_MAX:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            inicio = time.time()
+            for texto, lento in lote:
+                try:
+                    self.obtener(texto, lento)
+                except Exception as e:
+                    logger.warning(f"TTS: no se pudo generar '{texto[:40]}': {e}")
+                finally:
+                    with self._lock:
+                        self._encolados.discard(self.clave(texto, lento))
+            logger.info(f"🔊 Lote TTS de {len(lote)} textos en {time.time() - inicio:.2f}s")
+
+    def estado(self) -> Dict:
+        return {
+            "motor": self.motor.nombre,
+            "pendientes": self._cola.qsize(),
+            "sintetizados": self.sintetizados,
+            "errores": self.errores,
+            "cache": self.cache.estado(),
+        }
+
+
+servicio_tts = ServicioTTS()
@@ -0,0 +1,13 @@
+"""
+Benchmarks de ServicioAnalisisLectura (ASR + comparación de textos) y de
+la generación de actividades con FLAN-T5.
+
+Uso:
+    python -m benchmarks --n 20 --salida resultados.json
+    python -m benchmarks --suites comparacion            # sin modelo ni audio
+    python -m benchmarks --corpus benchmarks/corpus_local --suites transcripcion,analisis
+    python -m benchmarks --suites generacion --generador-compute-types float32,int8
+
+Los resultados (p50/p95, RTF, pico de memoria, WER, tasa de JSON válido
+de la generación) se guardan en JSON para poder comparar corridas en CI.
+"""
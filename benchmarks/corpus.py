@@ -0,0 +1,161 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+# Frases cortas del nivel de lectura de primaria
+FRASES = [
+    "El perro de Ana corre feliz por el parque.",
+    "Mi mamá prepara una sopa caliente para la cena.",
+    "La tortuga camina despacio hasta el río.",
+    "Los niños juegan con la pelota en el patio.",
+    "El sol sale temprano y calienta la casa.",
+    "Mi abuelo tiene un huerto con tomates rojos.",
+    "La maestra lee un cuento sobre un dragón amable.",
+    "El gato duerme encima de la silla azul.",
+    "Hoy llueve mucho y llevo mi paraguas amarillo.",
+    "Pedro dibuja una montaña con nieve en la cima.",
+    "Las aves vuelan alto cuando llega el verano.",
+    "Mi hermana encontró una concha en la playa.",
+    "El tren pasa por el puente a las ocho.",
+    "La luna brilla sobre el lago tranquilo.",
+    "Compramos pan, leche y frutas en la tienda.",
+    "El conejo come zanahorias en el jardín.",
+    "Mañana vamos de paseo al bosque con papá.",
+    "La abeja busca flores para hacer miel.",
+]
+
+
+def _texto_referencia(rng: random.Random, palabras: int) -> str:
+    frases = []
+    total = 0
+    while total < palabras:
+        frase = rng.choice(FRASES)
+        frases.append(frase)
+        total += len(frase.split())
+    return " ".join(frases)
+
+
+def _deformar(palabra: str, rng: random.Random) -> str:
+    """Error típico de lectura inicial: se pierde o cambia una letra."""
+    if len(palabra) <= 3:
+        return palabra + rng.choice("aeos")
+    i = rng.randrange(1, len(palabra) - 1)
+    return palabra[:i] + palabra[i + 1:]
+
+
+def simular_lectura(referencia: str, rng: random.Random, tasa_error: float = 0.08) -> str:
+    """
+    Lo que "dijo" el niño: la referencia con omisiones, sustituciones y
+    repeticiones a la tasa indicada.
+    """
+    leidas = []
+    for palabra in referencia.split():
+        r = rng.random()
+        if r < tasa_error / 3:
+            continue
+        if r < 2 * tasa_error / 3:
+            leidas.append(_deformar(palabra.strip(".,"), rng))
+        elif r < tasa_error:
+            leidas.extend([palabra.strip(".,"), palabra])
+        else:
+            leidas.append(palabra)
+    return " ".join(leidas)
+
+
+def generar_corpus(
+    n: int = 20,
+    semilla: int = 1234,
+    min_palabras: int = 40,
+    max_palabras: int = 150,
+    tasa_error: float = 0.08,
+) -> List[Dict]:
+    """Corpus sintético reproducible de pares (referencia, lectura)."""
+    rng = random.Random(semilla)
+    corpus = []
+    for k in range(n):
+        referencia = _texto_referencia(rng, rng.randint(min_palabras, max_palabras))
+        corpus.append(
+            {
+                "id": f"sintetico-{k:03d}",
+                "referencia": referencia,
+                "lectura": simular_lectura(referencia, rng, tasa_error),
+                "audio": None,
+            }
+        )
+    return corpus
+
+
+# ================= AUDIO =================
+def motor_tts_disponible() -> Optional[str]:
+    if shutil.which("espeak-ng") or shutil.which("espeak"):
+        return "espeak"
+    try:
+        import gtts  # noqa: F401
+        return "gtts"
+    except ImportError:
+        return None
+
+
+def sintetizar_audio(corpus: List[Dict], directorio: str, motor: Optional[str] = None) -> List[Dict]:
+    """
+    Genera el audio de cada `lectura` (lo que se leyó, con sus errores).
+    espeak-ng funciona sin red; gTTS necesita salida a Internet.
+    """
+    motor = motor or motor_tts_disponible()
+    if motor is None:
+        raise RuntimeError(
+            "No hay motor TTS para generar audio (instalar espeak-ng o gTTS), "
+            "o usar --corpus con audios propios."
+        )
+
+    os.makedirs(directorio, exist_ok=True)
+    for item in corpus:
+        if item.get("audio") and os.path.exists(item["audio"]):
+            continue
+
+        if motor == "espeak":
+            ruta = os.path.join(directorio, f"{item['id']}.wav")
+            binario = shutil.which("espeak-ng") or shutil.which("espeak")
+            subprocess.run(
+                [binario, "-v", "es", "-s", "130", "-w", ruta, item["lectura"]],
+                check=True,
+                capture_output=True,
+            )
+        else:
+            from gtts import gTTS
+
+            ruta = os.path.join(directorio, f"{item['id']}.mp3")
+            gTTS(text=item["lectura"], lang="es", slow=True).save(ruta)
+
+        item["audio"] = ruta
+    return corpus
+
+
+# ================= MANIFIESTO =================
+def cargar_corpus(directorio: str) -> List[Dict]:
+    """
+    Lee `manifest.json` del directorio: lista de
+    {"id", "referencia", "lectura" (opcional), "audio" (relativo al directorio)}.
+    """
+    with open(os.path.join(directorio, "manifest.json"), encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    for item in corpus:
+        if item.get("audio") and not os.path.isabs(item["audio"]):
+            item["audio"] = os.path.join(directorio, item["audio"])
+    return corpus
+
+
+def guardar_corpus(corpus: List[Dict], directorio: str) -> str:
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, "manifest.json")
+    datos = [
+        {**item, "audio": os.path.relpath(item["audio"], directorio) if item.get("audio") else None}
+        for item in corpus
+    ]
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    return ruta
@@ -0,0 +1,78 @@
+from datetime import date
+from typing import Dict, List, Tuple
+
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+# SQLite solo autoincrementa "INTEGER PRIMARY KEY" y no tiene ARRAY
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(tipo, compilador, **kw):
+    return "INTEGER"
+
+
+@compiles(ARRAY, "sqlite")
+def _array_sqlite(tipo, compilador, **kw):
+    return "JSON"
+
+
+def crear_sesion_sqlite(url: str = "sqlite://") -> Session:
+    """Base SQLite (en memoria por defecto) con todas las tablas del modelo."""
+    from app.config import Base
+    import app.modelos  # noqa: F401  registra las tablas
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+
+def sembrar_datos(db: Session, corpus: List[Dict]) -> Tuple[int, Dict[str, int]]:
+    """Un docente, un estudiante y una lectura por entrada del corpus."""
+    from app.modelos import ContenidoLectura, Docente, Estudiante, Usuario
+    from app.servicios.indice_lectura import actualizar_indice
+
+    usuario = Usuario(
+        email="benchmark@tutoria.local",
+        password_hash="-",
+        nombre="Bench",
+        apellido="Mark",
+    )
+    db.add(usuario)
+    db.flush()
+
+    docente = Docente(usuario_id=usuario.id)
+    db.add(docente)
+    db.flush()
+
+    estudiante = Estudiante(
+        docente_id=docente.id,
+        nombre="Niño",
+        apellido="Benchmark",
+        fecha_nacimiento=date(2017, 1, 1),
+        nivel_educativo=2,
+    )
+    db.add(estudiante)
+
+    contenidos = {}
+    for item in corpus:
+        contenido = ContenidoLectura(
+            docente_id=docente.id,
+            titulo=item["id"],
+            contenido=item["referencia"],
+            nivel_dificultad=1,
+            edad_recomendada=7,
+        )
+        db.add(contenido)
+        db.flush()
+        actualizar_indice(db, contenido)
+        contenidos[item["id"]] = contenido.id
+
+    db.commit()
+    return estudiante.id, contenidos
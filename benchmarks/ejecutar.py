@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# La app exige DATABASE_URL al importarse; el benchmark usa su propia base SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app import settings  # noqa: E402
+from app.servicios.ia_lectura_service import ServicioAnalisisLectura  # noqa: E402
+from app.servicios.registro_modelos import registro_modelos  # noqa: E402
+from benchmarks.corpus import (  # noqa: E402
+    cargar_corpus,
+    generar_corpus,
+    guardar_corpus,
+    sintetizar_audio,
+)
+from benchmarks.db_sqlite import crear_sesion_sqlite, sembrar_datos  # noqa: E402
+from benchmarks.suites import (  # noqa: E402
+    bench_alineacion,
+    bench_analisis_completo,
+    bench_comparacion,
+    bench_generacion,
+    bench_transcripcion,
+)
+
+SUITES = ("alineacion", "comparacion", "transcripcion", "analisis", "generacion")
+# La generación necesita torch y transformers: solo corre si se pide
+SUITES_POR_DEFECTO = ("alineacion", "comparacion", "transcripcion", "analisis")
+
+
+def _commit_actual() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _entorno(perfil: Dict) -> Dict:
+    return {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "perfil_asr": perfil,
+        "lotes": settings.WHISPER_LOTES_ACTIVO,
+        "cache_transcripcion": settings.CACHE_TRANSCRIPCION_ACTIVO,
+        "generador": settings.GENERADOR_MODELO,
+    }
+
+
+def _generacion_en_subproceso(args, compute_type: str) -> Dict:
+    """
+    Suite de generación de un compute_type en un proceso nuevo: en el mismo
+    proceso el RSS del segundo modelo arrastra el del primero y torch no
+    devuelve esa memoria al sistema.
+    """
+    fd, salida = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    comando = [
+        sys.executable, "-m", "benchmarks",
+        "--suites", "generacion",
+        "--generador-compute-types", compute_type,
+        "--n", str(args.n),
+        "--semilla", str(args.semilla),
+        "--n-generacion", str(args.n_generacion),
+        "--repeticiones", str(args.repeticiones),
+        "--salida", salida,
+    ]
+    if args.corpus:
+        comando += ["--corpus", args.corpus]
+    if args.con_cache:
+        comando.append("--con-cache")
+    if args.generacion_libre:
+        comando.append("--generacion-libre")
+
+    try:
+        subprocess.run(comando, check=True, stdout=subprocess.DEVNULL)
+        with open(salida, encoding="utf-8") as f:
+            return json.load(f)["suites"]["generacion"][compute_type]
+    finally:
+        os.remove(salida)
+
+
+def _preparar_corpus(args) -> List[Dict]:
+    if args.corpus and os.path.exists(os.path.join(args.corpus, "manifest.json")):
+        return cargar_corpus(args.corpus)
+
+    corpus = generar_corpus(n=args.n, semilla=args.semilla)
+    if args.corpus:
+        necesita_audio = any(s in args.suites for s in ("transcripcion", "analisis"))
+        if necesita_audio:
+            sintetizar_audio(corpus, os.path.join(args.corpus, "audio"))
+        guardar_corpus(corpus, args.corpus)
+    return corpus
+
+
+def main(argv=None) -> Dict:
+    parser = argparse.ArgumentParser(description="Benchmarks de análisis de lectura")
+    parser.add_argument("--corpus", help="Directorio con manifest.json (se crea si no existe)")
+    parser.add_argument("--n", type=int, default=20, help="Lecturas del corpus sintético")
+    parser.add_argument("--semilla", type=int, default=1234)
+    parser.add_argument("--perfil", default=settings.ASR_PERFIL_EVALUACION, help="Perfil ASR a medir")
+    parser.add_argument("--modelo", help="Forzar un modelo distinto al del perfil")
+    parser.add_argument("--suites", default=",".join(SUITES_POR_DEFECTO))
+    parser.add_argument("--repeticiones", type=int, default=1)
+    parser.add_argument("--con-cache", action="store_true", help="No desactivar las cachés de transcripciones y actividades")
+    parser.add_argument(
+        "--generador-compute-types",
+        default="float32,int8",
+        help="compute_type del generador a comparar en la suite de generación",
+    )
+    parser.add_argument(
+        "--palabras-alineacion", type=int, default=300, help="Largo de la lectura en la suite de alineación"
+    )
+    parser.add_argument("--n-generacion", type=int, default=10, help="Lecturas a usar en la suite de generación")
+    parser.add_argument(
+        "--generacion-libre",
+        action="store_true",
+        help="Generar sin la plantilla de decodificación restringida (JSON libre)",
+    )
+    parser.add_argument("--salida", default="benchmarks/resultados.json")
+    args = parser.parse_args(argv)
+
+    args.suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    desconocidas = set(args.suites) - set(SUITES)
+    if desconocidas:
+        parser.error(f"Suites desconocidas: {', '.join(sorted(desconocidas))}")
+
+    if not args.con_cache:
+        settings.CACHE_TRANSCRIPCION_ACTIVO = False
+        settings.CACHE_GENERACION_ACTIVO = False
+    if args.generacion_libre:
+        settings.GENERADOR_DECODIFICACION_RESTRINGIDA = False
+    # analizar_lectura usa el perfil de evaluación: se apunta al perfil medido
+    settings.ASR_PERFIL_EVALUACION = args.perfil
+
+    corpus = _preparar_corpus(args)
+    # Crear el servicio no carga Whisper; la suite de comparación no lo usa
+    servicio = ServicioAnalisisLectura(args.modelo)
+    perfil = servicio.perfil(args.perfil)
+    resultados = {"entorno": _entorno(perfil), "corpus": len(corpus), "suites": {}}
+
+    if "alineacion" in args.suites:
+        print("⏱️  alineación de palabras...")
+        resultados["suites"]["alineacion"] = bench_alineacion(
+            palabras=args.palabras_alineacion, semilla=args.semilla
+        )
+
+    if "comparacion" in args.suites:
+        print("⏱️  comparación de textos...")
+        resultados["suites"]["comparacion"] = bench_comparacion(
+            servicio, corpus, repeticiones=max(5, args.repeticiones)
+        )
+
+    if {"transcripcion", "analisis"} & set(args.suites):
+        if not any(item.get("audio") for item in corpus):
+            parser.error("Las suites con audio necesitan --corpus (con audios o un motor TTS)")
+
+        # Carga fuera de las mediciones
+        registro_modelos.obtener_whisper_perfil(perfil)
+        resultados["modelo"] = registro_modelos.estado()["modelos"]
+
+        if "transcripcion" in args.suites:
+            print("⏱️  transcripción...")
+            resultados["suites"]["transcripcion"] = bench_transcripcion(
+                servicio, corpus, repeticiones=args.repeticiones
+            )
+
+        if "analisis" in args.suites:
+            print("⏱️  analizar_lectura completo (SQLite)...")
+            db = crear_sesion_sqlite()
+            estudiante_id, contenidos = sembrar_datos(db, corpus)
+            resultados["suites"]["analisis"] = bench_analisis_completo(
+                servicio, db, estudiante_id, contenidos, corpus, repeticiones=args.repeticiones
+            )
+            db.close()
+
+    if "generacion" in args.suites:
+        resultados["suites"]["generacion"] = {}
+        compute_types = [c.strip() for c in args.generador_compute_types.split(",") if c.strip()]
+        for compute_type in compute_types:
+            print(f"⏱️  generación de actividades ({compute_type})...")
+            # Si solo se mide este compute_type, el proceso ya está limpio
+            if len(compute_types) > 1 or len(args.suites) > 1:
+                medicion = _generacion_en_subproceso(args, compute_type)
+            else:
+                medicion = bench_generacion(
+                    corpus[: args.n_generacion], compute_type, repeticiones=args.repeticiones
+                )
+            resultados["suites"]["generacion"][compute_type] = medicion
+
+    directorio = os.path.dirname(args.salida)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(resultados["suites"], ensure_ascii=False, indent=2))
+    print(f"💾 Resultados guardados en {args.salida}")
+    return resultados
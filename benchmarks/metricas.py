@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from app.servicios.alineacion import IGUAL, alinear
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def resumen(valores: List[float]) -> Dict:
+    if not valores:
+        return {"n": 0}
+    return {
+        "n": len(valores),
+        "p50": percentil(valores, 0.50),
+        "p95": percentil(valores, 0.95),
+        "media": sum(valores) / len(valores),
+        "max": max(valores),
+    }
+
+
+def wer(referencia: Sequence[str], hipotesis: Sequence[str]) -> float:
+    """(sustituciones + omisiones + inserciones) / palabras de referencia."""
+    if not referencia:
+        return 0.0 if not hipotesis else 1.0
+    errores = sum(1 for op, _, _ in alinear(referencia, hipotesis) if op != IGUAL)
+    return errores / len(referencia)
+
+
+class MonitorMemoria:
+    """
+    Pico de RSS del proceso mientras dura el bloque `with`. Se muestrea
+    en un hilo porque la memoria de CTranslate2 no pasa por tracemalloc.
+    """
+
+    def __init__(self, intervalo_s: float = 0.02) -> None:
+        self.intervalo_s = intervalo_s
+        self.inicial_mb = 0.0
+        self.pico_mb = 0.0
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _rss_mb() -> float:
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / (1024 * 1024)
+        except ImportError:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def _muestrear(self) -> None:
+        while not self._detener.is_set():
+            self.pico_mb = max(self.pico_mb, self._rss_mb())
+            time.sleep(self.intervalo_s)
+
+    def __enter__(self) -> "MonitorMemoria":
+        self.inicial_mb = self.pico_mb = self._rss_mb()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._detener.set()
+        self._hilo.join()
+        self.pico_mb = max(self.pico_mb, self._rss_mb())
+
+    def resultado(self) -> Dict:
+        return {
+            "rss_inicial_mb": round(self.inicial_mb, 1),
+            "rss_pico_mb": round(self.pico_mb, 1),
+            "incremento_mb": round(self.pico_mb - self.inicial_mb, 1),
+        }
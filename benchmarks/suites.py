@@ -0,0 +1,224 @@
+import time
+from typing import Dict, List, Optional
+
+from app import settings
+from app.esquemas.actividad_ia import GenerarActividadesIARequest
+from app.servicios.alineacion import alinear
+from app.servicios.ia_actividades import generar_json_actividades_lote
+from app.servicios.indice_lectura import es_puntuacion, tokenizar_texto
+from app.servicios.registro_modelos import registro_modelos
+
+from benchmarks.corpus import generar_corpus
+from benchmarks.metricas import MonitorMemoria, resumen, wer
+
+# Objetivo de latencia de alinear() para una lectura de ~300 palabras
+OBJETIVO_ALINEACION_MS = 1.0
+
+
+def _palabras(texto: str) -> List[str]:
+    return [t for t in tokenizar_texto(texto) if not es_puntuacion(t)]
+
+
+def _duracion_estimada(texto: str) -> float:
+    # ~90 palabras por minuto, ritmo típico de 2.º grado
+    return len(texto.split()) / 1.5
+
+
+def bench_comparacion(servicio, corpus: List[Dict], repeticiones: int = 5) -> Dict:
+    """
+    _comparar_textos sobre la lectura simulada (no necesita modelo ni audio).
+    La precisión global no distingue los errores que inyecta el corpus (casi
+    siempre da 100): se mide la tasa de errores detectados frente al WER
+    entre la referencia y la lectura simulada.
+    """
+    latencias = []
+    detectados, inyectados = [], []
+
+    with MonitorMemoria() as memoria:
+        for _ in range(repeticiones):
+            for item in corpus:
+                ref_tokens = tokenizar_texto(item["referencia"])
+                inicio = time.perf_counter()
+                analisis = servicio._comparar_textos(
+                    item["referencia"],
+                    item["lectura"],
+                    _duracion_estimada(item["lectura"]),
+                    ref_tokens=ref_tokens,
+                )
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+                palabras = _palabras(item["referencia"])
+                detectados.append(len(analisis["errores_detectados"]) / max(1, len(palabras)))
+                inyectados.append(wer(palabras, _palabras(item["lectura"])))
+
+    return {
+        "latencia_ms": resumen(latencias),
+        "errores_por_palabra": sum(detectados) / max(1, len(detectados)),
+        "wer_lectura_simulada": sum(inyectados) / max(1, len(inyectados)),
+        "palabras_medias": sum(len(_palabras(i["referencia"])) for i in corpus) / max(1, len(corpus)),
+        "memoria": memoria.resultado(),
+    }
+
+
+def bench_alineacion(
+    palabras: int = 300,
+    tasas_error=(0.0, 0.08, 0.3),
+    repeticiones: int = 50,
+    semilla: int = 1234,
+) -> Dict:
+    """
+    alinear() sola sobre una lectura de `palabras` palabras, a distintas
+    tasas de error (con 0 % el prefijo común se lleva todo; con errores
+    la DP recorre casi todas las filas), contra OBJETIVO_ALINEACION_MS.
+    """
+    resultados = {"objetivo_ms": OBJETIVO_ALINEACION_MS, "palabras": palabras}
+    for tasa in tasas_error:
+        item = generar_corpus(
+            n=1, semilla=semilla, min_palabras=palabras, max_palabras=palabras, tasa_error=tasa
+        )[0]
+        ref = tokenizar_texto(item["referencia"])
+        leido = tokenizar_texto(item["lectura"])
+
+        alinear(ref, leido)  # calentamiento
+        latencias = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            alinear(ref, leido)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+        medicion = resumen(latencias)
+        resultados[f"error_{tasa:.0%}"] = {
+            "tokens": [len(ref), len(leido)],
+            "latencia_ms": medicion,
+            "cumple_objetivo": medicion["p50"] < OBJETIVO_ALINEACION_MS,
+        }
+    return resultados
+
+
+def _con_audio(corpus: List[Dict]) -> List[Dict]:
+    return [item for item in corpus if item.get("audio")]
+
+
+def bench_transcripcion(servicio, corpus: List[Dict], repeticiones: int = 1) -> Dict:
+    """_transcribir_audio: latencia, factor de tiempo real y WER contra lo leído."""
+    latencias, rtfs, wers = [], [], []
+    audio_total = 0.0
+
+    with MonitorMemoria() as memoria:
+        for _ in range(repeticiones):
+            for item in _con_audio(corpus):
+                inicio = time.perf_counter()
+                trans = servicio._transcribir_audio(item["audio"])
+                segundos = time.perf_counter() - inicio
+
+                latencias.append(segundos * 1000)
+                if trans["duracion"]:
+                    rtfs.append(segundos / trans["duracion"])
+                    audio_total += trans["duracion"]
+
+                esperado = item.get("lectura") or item["referencia"]
+                wers.append(wer(_palabras(esperado), _palabras(trans["texto"])))
+
+    return {
+        "latencia_ms": resumen(latencias),
+        "rtf": resumen(rtfs),
+        "wer_medio": sum(wers) / len(wers) if wers else None,
+        "audio_total_s": audio_total,
+        "memoria": memoria.resultado(),
+    }
+
+
+def bench_analisis_completo(
+    servicio,
+    db,
+    estudiante_id: int,
+    contenidos: Dict[str, int],
+    corpus: List[Dict],
+    repeticiones: int = 1,
+) -> Dict:
+    """analizar_lectura completo (transcripción + comparación + guardado en BD)."""
+    latencias, precisiones = [], []
+
+    with MonitorMemoria() as memoria:
+        for _ in range(repeticiones):
+            for item in _con_audio(corpus):
+                inicio = time.perf_counter()
+                resultado = servicio.analizar_lectura(
+                    db,
+                    estudiante_id,
+                    contenidos[item["id"]],
+                    item["audio"],
+                )
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                precisiones.append(resultado["precision_global"])
+
+    return {
+        "latencia_ms": resumen(latencias),
+        "precision_media": sum(precisiones) / len(precisiones) if precisiones else None,
+        "memoria": memoria.resultado(),
+    }
+
+
+def _bytes_tensores(valor) -> int:
+    if isinstance(valor, (tuple, list)):
+        return sum(_bytes_tensores(v) for v in valor)
+    if hasattr(valor, "element_size") and hasattr(valor, "numel"):
+        return valor.numel() * valor.element_size()
+    return 0
+
+
+def _pesos_mb(modelo) -> Optional[float]:
+    """
+    Bytes de parámetros y buffers. Se recorre el state_dict porque las
+    Linear cuantizadas guardan sus pesos empaquetados fuera de parameters().
+    """
+    if not hasattr(modelo, "state_dict"):
+        return None
+    return round(sum(_bytes_tensores(v) for v in modelo.state_dict().values()) / (1024**2), 2)
+
+
+def bench_generacion(corpus: List[Dict], compute_type: str, repeticiones: int = 1) -> Dict:
+    """
+    Generación de actividades con FLAN-T5 en un compute_type ("float32" o
+    "int8"): latencia por actividad, memoria del modelo y tasa de JSON válido.
+    La memoria solo es comparable si cada compute_type corre en su propio
+    proceso (ver `ejecutar.py`).
+    """
+    settings.GENERADOR_COMPUTE_TYPE = compute_type
+    opciones = GenerarActividadesIARequest()
+    latencias, preguntas = [], []
+    invalidos = 0
+
+    with MonitorMemoria() as memoria:
+        inicio = time.perf_counter()
+        _, modelo = registro_modelos.obtener_generador(compute_type=compute_type)
+        carga_s = time.perf_counter() - inicio
+
+        for _ in range(repeticiones):
+            for item in corpus:
+                inicio = time.perf_counter()
+                resultado = generar_json_actividades_lote([(item["referencia"], opciones)])[0]
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+                if "error" in resultado:
+                    invalidos += 1
+                else:
+                    preguntas.append(len(resultado["json"].get("preguntas") or []))
+
+    info = next(
+        (m for m in registro_modelos.estado()["modelos"]
+         if m["tipo"].startswith("seq2seq") and m["compute_type"] == compute_type),
+        {},
+    )
+    total = len(latencias)
+    return {
+        "latencia_ms": resumen(latencias),
+        "restringida": settings.GENERADOR_DECODIFICACION_RESTRINGIDA,
+        "json_valido": (total - invalidos) / total if total else None,
+        "preguntas_medias": sum(preguntas) / len(preguntas) if preguntas else None,
+        "carga_s": round(carga_s, 2),
+        "memoria_modelo_mb": info.get("memoria_mb"),
+        "pesos_mb": _pesos_mb(modelo),
+        "hilos": info.get("cpu_threads"),
+        "memoria": memoria.resultado(),
+    }
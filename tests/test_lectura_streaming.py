@@ -0,0 +1,70 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+# La app exige DATABASE_URL al importarse
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.servicios.ia_lectura_service import ServicioAnalisisLectura  # noqa: E402
+from app.servicios.lectura_streaming import FRECUENCIA, SesionLecturaStreaming  # noqa: E402
+
+PALABRAS = ["uno", "dos", "tres"]
+
+
+class WhisperFalso:
+    """Una palabra por segmento transcrito; guarda los segundos con voz de cada uno."""
+
+    def __init__(self):
+        self.voz_s = []
+
+    def transcribe(self, audio, **opciones):
+        tramas = audio[: len(audio) // 480 * 480].reshape(-1, 480)
+        voz = np.sqrt(np.mean(tramas ** 2, axis=1)) > 0.05
+        self.voz_s.append(float(voz.sum()) * 480 / FRECUENCIA)
+        texto = PALABRAS[len(self.voz_s) - 1]
+        return [SimpleNamespace(text=f" {texto}")], SimpleNamespace(duration=len(audio) / FRECUENCIA)
+
+
+def _pcm(*tramos):
+    """(segundos, hay_voz) -> PCM 16-bit: tono de 220 Hz o silencio."""
+    partes = []
+    for segundos, voz in tramos:
+        t = np.arange(int(segundos * FRECUENCIA)) / FRECUENCIA
+        partes.append(0.3 * np.sin(2 * np.pi * 220 * t) if voz else np.zeros_like(t))
+    return (np.concatenate(partes) * 32767).astype("<i2").tobytes()
+
+
+def _sesion():
+    analizador = ServicioAnalisisLectura()
+    whisper = WhisperFalso()
+    analizador.modelo_whisper = lambda perfil: whisper
+    return SesionLecturaStreaming(analizador, "uno dos"), whisper
+
+
+def test_voz_pausa_voz_en_un_bloque_se_transcribe_completa():
+    sesion, whisper = _sesion()
+
+    segmentos = sesion.agregar_audio(_pcm((1.5, True), (1.0, False), (1.5, True)))
+    for segmento in segmentos:
+        sesion.procesar_segmento(segmento)
+    eventos = sesion.finalizar()
+
+    assert len(segmentos) == 1
+    assert len(whisper.voz_s) == 2
+    assert sum(whisper.voz_s) >= 2.9
+    assert sesion.transcripcion()["texto"] == "uno dos"
+    estados = [e["estado"] for e in eventos if e["tipo"] == "palabra"]
+    assert estados and all(estado == "correcto" for estado in estados)
+
+
+def test_un_bloque_con_varias_pausas_devuelve_todos_los_segmentos():
+    sesion, _ = _sesion()
+
+    segmentos = sesion.agregar_audio(
+        _pcm((1.0, True), (1.0, False), (1.0, True), (1.0, False), (1.0, True))
+    )
+
+    assert len(segmentos) == 2
+    # El último tramo de voz sigue abierto hasta la próxima pausa o el final
+    assert len(sesion.finalizar()) > 0